@@ -0,0 +1,99 @@
+"""
+Throughput of /api/chat and /api/spending under 50/200/1000 concurrent
+requests, with the in-process DynamoDB and Bedrock stand-ins adding
+per-call latency.
+
+"sync" mounts the same service calls behind plain `def` handlers, the way
+the API was served before the async path: every request holds one of
+Starlette's threadpool workers (40 by default) while it waits on AWS.
+"async" is the real app, whose blocking AWS calls run on the
+AWS_MAX_POOL_CONNECTIONS-sized executor.
+
+Usage (from backend/):
+    python -m benchmarks.bench_async_load --concurrency 50 200 1000 --pool 64
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+
+from benchmarks.local_aws import install_bedrock, install_dynamodb, seed_transactions
+from services import aws_clients
+from services.agents.orchestrator import AgentOrchestrator
+from services.bedrock_service import BedrockService
+from services.rag_service import RAGService
+from services.transaction_service import TransactionService
+
+
+def sync_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/api/chat")
+    def chat(request: dict):
+        ranked = RAGService.retrieve_ranked(request["message"])
+        return {"response": AgentOrchestrator.process_request(request["message"], ranked),
+                "context": [r["text"] for r in ranked]}
+
+    @app.get("/api/spending")
+    def spending(user_id: str, limit: int):
+        items, _ = TransactionService.get_user_transactions_page(limit, None, user_id)
+        return items
+
+    return app
+
+
+async def run_load(app, concurrency: int, requests: int, users: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i):
+            async with semaphore:
+                start = time.perf_counter()
+                if i % 2:
+                    response = await client.post("/api/chat", json={"message": f"How should I budget for goal {i}?"})
+                else:
+                    response = await client.get("/api/spending", params={"user_id": f"user-{i % users}", "limit": 50})
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return requests / elapsed, p50, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--pool", type=int, default=aws_clients.MAX_POOL_CONNECTIONS)
+    parser.add_argument("--db-latency", type=float, default=0.01)
+    parser.add_argument("--model-latency", type=float, default=0.1)
+    parser.add_argument("--users", type=int, default=50)
+    args = parser.parse_args()
+
+    aws_clients.MAX_POOL_CONNECTIONS = args.pool
+    install_dynamodb(latency=args.db_latency)
+    seed_transactions(20000, users=args.users)
+    install_bedrock(latency=args.model_latency)
+    # Every chat prompt differs, but measure the model path rather than cache hits
+    BedrockService.CACHE_ENABLED = False
+    RAGService.get_index()
+
+    import main as api
+    apps = {"sync": sync_app(), "async": api.app}
+    print(f"db latency {args.db_latency * 1000:.0f}ms  model latency {args.model_latency * 1000:.0f}ms  "
+          f"AWS pool {args.pool}  requests {args.requests} (half chat, half spending)")
+    for concurrency in args.concurrency:
+        for name, app in apps.items():
+            throughput, p50, p99 = asyncio.run(run_load(app, concurrency, args.requests, args.users))
+            print(f"{name:>5} c={concurrency:<5} {throughput:8.1f} req/s  p50 {p50:8.1f}ms  p99 {p99:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Endpoint load-test suite. Runs the FastAPI app in-process against the local
+DynamoDB (or, with --storage sqlite, a SQLite file) and Bedrock stand-ins, seeded with a synthetic transaction history
+of each --rows size, and reports p50/p95/p99 latency, throughput and
+errors for /api/spending, /api/chat, /api/smartspend and
+/api/export-summary at each --concurrency.
+
+Stand-in latency, jitter and throttling (with botocore-style backoff and
+retries) are configurable per service. Datasets, request mixes and
+injected faults are seeded, so two runs with the same flags do the same
+work. --output writes the results as JSON; --compare prints the change
+against an earlier JSON file.
+
+Usage (from backend/):
+    python -m benchmarks.bench_endpoints --rows 1000 100000 --concurrency 1 32 --output run.json
+    python -m benchmarks.bench_endpoints --db-throttle 0.05 --backoff-scale 0.05 --compare run.json
+    python -m benchmarks.bench_endpoints --rows 1000000 --endpoints spending smartspend
+    python -m benchmarks.bench_endpoints --storage sqlite --rows 100000 --compare run.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+from benchmarks.local_aws import install_bedrock, install_dynamodb, install_sqlite, seed_dataset
+from services.bedrock_service import BedrockService
+from services.budget_service import BudgetService
+from services.rag_service import RAGService
+from services.report_service import ReportService
+from services.transaction_cache import TransactionCache
+
+CATEGORIES = ["Food", "Transport", "Shopping", "Groceries", "Entertainment"]
+QUESTIONS = ["How should I budget for a vacation?", "Tips for paying off credit card debt?",
+             "Am I overspending on food?", "How big should my emergency fund be?"]
+
+
+def _user(i: int, users: int) -> str:
+    return f"user-{i % users}"
+
+
+# Each endpoint maps a request index to (method, path, keyword arguments for httpx)
+ENDPOINTS = {
+    "spending": lambda i, users: ("GET", "/api/spending", {"params": {"user_id": _user(i, users)}}),
+    "chat": lambda i, users: ("POST", "/api/chat", {"json": {"message": f"{QUESTIONS[i % len(QUESTIONS)]} ({i})",
+                                                            "user_id": _user(i, users)}}),
+    "smartspend": lambda i, users: ("POST", "/api/smartspend", {"json": {
+        "amount": float(5 + i * 37 % 400), "category": CATEGORIES[i % len(CATEGORIES)], "user_id": _user(i, users)}}),
+    "export-summary": lambda i, users: ("GET", "/api/export-summary", {"params": {"user_id": _user(i, users)}}),
+}
+
+
+def summarize(latencies, statuses, elapsed: float) -> dict:
+    ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    errors = sum(1 for status in statuses if status >= 400)
+    return {
+        "requests": len(ms),
+        "throughput_rps": round(len(ms) / elapsed, 2),
+        "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(ms.mean()), 3), "max_ms": round(float(ms.max()), 3),
+        "errors": errors, "error_rate": round(errors / len(ms), 4),
+    }
+
+
+async def run_endpoint(client: httpx.AsyncClient, name: str, concurrency: int, requests: int,
+                       warmup: int, users: int) -> dict:
+    make = ENDPOINTS[name]
+
+    async def one(i):
+        method, path, kwargs = make(i, users)
+        start = time.perf_counter()
+        response = await client.request(method, path, **kwargs)
+        await response.aread()
+        return time.perf_counter() - start, response.status_code
+
+    for i in range(warmup):
+        await one(i)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(i):
+        async with semaphore:
+            return await one(i)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(limited(warmup + i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    return summarize([r[0] for r in results], [r[1] for r in results], elapsed)
+
+
+async def run_suite(app, endpoints, concurrencies, requests: int, warmup: int, users: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name in endpoints:
+            for concurrency in concurrencies:
+                yield name, concurrency, await run_endpoint(client, name, concurrency, requests, warmup, users)
+
+
+def run(args) -> dict:
+    import main as api
+
+    results = []
+    for rows in args.rows:
+        resource = None
+        if args.storage == "sqlite":
+            install_sqlite()
+        else:
+            resource = install_dynamodb(latency=args.db_latency, jitter=args.db_jitter, throttle_rate=args.db_throttle,
+                                        backoff_scale=args.backoff_scale, seed=args.seed)
+        model = install_bedrock(latency=args.model_latency, jitter=args.model_jitter,
+                                throttle_rate=args.model_throttle, backoff_scale=args.backoff_scale, seed=args.seed)
+        TransactionCache.clear()
+        BudgetService.clear()
+        ReportService.cache.clear()
+        BedrockService.CACHE_ENABLED = args.bedrock_cache
+        if not args.report_cache:
+            ReportService.cache.max_entries = 0
+        RAGService.get_index()
+
+        start = time.perf_counter()
+        seed_dataset(rows, users=args.users, seed=args.seed)
+        print(f"{rows:,} rows over {args.users} users seeded in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        def counters():
+            tables = resource.tables.values() if resource is not None else []
+            return {"dynamodb": sum(t.calls for t in tables), "dynamodb_throttles": sum(t.throttles for t in tables),
+                    "bedrock": model.calls, "bedrock_throttles": model.throttles}
+
+        async def collect():
+            last = counters()
+            async for name, concurrency, summary in run_suite(api.app, args.endpoints, args.concurrency,
+                                                              args.requests, args.warmup, args.users):
+                now = counters()
+                # Stand-in calls made by this endpoint's run, warmup included
+                summary.update(endpoint=name, rows=rows, concurrency=concurrency,
+                               stand_in_calls={key: now[key] - last[key] for key in now})
+                last = now
+                results.append(summary)
+                print(f"{name:>14} rows={rows:<8} c={concurrency:<4} {summary['throughput_rps']:9.1f} req/s  "
+                      f"p50 {summary['p50_ms']:8.1f}  p95 {summary['p95_ms']:8.1f}  p99 {summary['p99_ms']:8.1f} ms  "
+                      f"errors {summary['errors']}", file=sys.stderr)
+
+        asyncio.run(collect())
+    return {"meta": meta(args), "results": results}
+
+
+def meta(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare")}
+    return {"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"), "commit": commit,
+            "python": platform.python_version(), "machine": platform.machine(), "config": config}
+
+
+def compare(current: dict, baseline: dict):
+    """Prints the relative change of each matching result against a baseline run."""
+    before = {(r["endpoint"], r["rows"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"vs {baseline['meta'].get('commit')} ({baseline['meta']['timestamp']}):")
+    for r in current["results"]:
+        old = before.get((r["endpoint"], r["rows"], r["concurrency"]))
+        if old is None:
+            continue
+        changes = "  ".join(f"{key} {100 * (r[key] - old[key]) / old[key]:+6.1f}%"
+                            for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms") if old[key])
+        print(f"{r['endpoint']:>14} rows={r['rows']:<8} c={r['concurrency']:<4} {changes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="dataset sizes; each gets a fresh stand-in (1k-1M)")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=300, help="measured requests per endpoint and concurrency")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--storage", choices=["dynamodb", "sqlite"], default="dynamodb",
+                        help="storage backend; the --db-* options only apply to the DynamoDB stand-in")
+    parser.add_argument("--db-latency", type=float, default=0.005)
+    parser.add_argument("--db-jitter", type=float, default=0.002, help="mean of the exponential extra latency")
+    parser.add_argument("--db-throttle", type=float, default=0.0, help="probability an attempt is throttled")
+    parser.add_argument("--model-latency", type=float, default=0.2)
+    parser.add_argument("--model-jitter", type=float, default=0.05)
+    parser.add_argument("--model-throttle", type=float, default=0.0)
+    parser.add_argument("--backoff-scale", type=float, default=1.0,
+                        help="multiplies botocore's throttling backoff; below 1 shortens throttled runs")
+    parser.add_argument("--bedrock-cache", action="store_true", help="keep the Bedrock response cache on")
+    parser.add_argument("--report-cache", action="store_true", help="keep the rendered PDF cache on")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Transaction id generation and insert throughput: ids/s from one generator
+shared by 1..N threads, and add_transaction throughput from N threads
+against the in-process DynamoDB stand-in, checking no insert was lost.
+
+Usage (from backend/):
+    python -m benchmarks.bench_ids --threads 1 8 32 --inserts 5000
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.local_aws import install_dynamodb
+from services.id_generator import SnowflakeGenerator
+from services.transaction_service import TransactionService
+
+
+def id_rate(threads: int, per_thread: int) -> float:
+    generator = SnowflakeGenerator(worker_id=0)
+
+    def generate(_):
+        next_id = generator.next_id
+        return [next_id() for _ in range(per_thread)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        ids = [i for batch in pool.map(generate, range(threads)) for i in batch]
+    elapsed = time.perf_counter() - start
+    assert len(set(ids)) == len(ids)
+    return len(ids) / elapsed
+
+
+def insert_rate(threads: int, inserts: int, latency: float) -> float:
+    install_dynamodb(latency=latency)
+    user_id = f"bench-{threads}"
+
+    def insert(i):
+        return TransactionService.add_transaction(1.0, "Food", f"Shop {i}", date="2024-06-01", user_id=user_id)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(insert, range(inserts)))
+    elapsed = time.perf_counter() - start
+    assert all(results) and len(TransactionService.get_user_transactions(user_id)) == inserts
+    return inserts / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--ids", type=int, default=200000)
+    parser.add_argument("--inserts", type=int, default=5000)
+    parser.add_argument("--db-latency", type=float, default=0.002)
+    args = parser.parse_args()
+
+    for threads in args.threads:
+        ids = id_rate(threads, args.ids // threads)
+        inserts = insert_rate(threads, args.inserts, args.db_latency)
+        print(f"{threads:>3} threads  {ids:12,.0f} ids/s  {inserts:10,.0f} inserts/s  "
+              f"collisions {TransactionService.id_collisions}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Wall-clock time of a full-table read versus parallel scan segment count,
+against the in-process DynamoDB stand-in with simulated network latency.
+
+Usage (from backend/):
+    python -m benchmarks.bench_parallel_scan --rows 50000 --latency 0.02
+"""
+import argparse
+import time
+
+from services.db_service import DynamoDBService
+from benchmarks.local_aws import install_dynamodb, seed_transactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per scan call")
+    parser.add_argument("--segments", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    install_dynamodb(latency=args.latency)
+    seed_transactions(args.rows, users=100)
+
+    print(f"rows={args.rows} latency={args.latency * 1000:.0f}ms/call")
+    print(f"{'segments':>8} {'seconds':>9} {'rows':>8} {'speedup':>8}")
+    baseline = None
+    for segments in args.segments:
+        start = time.perf_counter()
+        items = DynamoDBService.get_all_transactions(parallel=segments > 1, total_segments=segments)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{segments:>8} {elapsed:>9.3f} {len(items):>8} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
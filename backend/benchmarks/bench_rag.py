@@ -0,0 +1,61 @@
+"""
+BM25 retrieval latency at tens of thousands of passages: build time, on-disk
+load time (memory-mapped) and per-query p50/p99 latency.
+
+Usage (from backend/):
+    python -m benchmarks.bench_rag --passages 50000
+"""
+import argparse
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from services.lexical_index import BM25Index, STOP_WORDS, tokenize
+from services.rag_service import load_corpus, RAGService
+
+
+def synthetic_passages(count: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    corpus_words = sorted({w for p in load_corpus(RAGService.CORPUS_DIR) for w in tokenize(p)})
+    # Zipf-distributed words, as in natural text, where the head of the
+    # distribution is function words that the tokenizer drops as stop words
+    words = sorted(STOP_WORDS) + corpus_words + [f"term{i}" for i in range(20000)]
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    return [" ".join(rng.choices(words, weights, k=rng.randint(20, 60))) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--passages", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    passages = synthetic_passages(args.passages)
+    start = time.perf_counter()
+    index = BM25Index.build(passages)
+    build_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        index.save(directory)
+        start = time.perf_counter()
+        index = BM25Index.load(directory)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        rng = random.Random(3)
+        queries = [" ".join(rng.sample(passages[rng.randrange(len(passages))].split(), 4))
+                   for _ in range(args.queries)]
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, 4)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"passages={args.passages} terms={len(index.vocab)} postings={len(index.doc_ids)}")
+    print(f"build {build_s:.2f}s  load {load_ms:.1f}ms  query p50 {p50:.3f}ms  p99 {p99:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+PDF export latency: summary renders on a cache miss (process pool vs
+threads) and on a hit, the event-loop stall while concurrent misses render,
+and the streamed monthly report's time to first page and total time for a
+long history, against the in-process DynamoDB stand-in.
+
+Usage (from backend/):
+    python -m benchmarks.bench_reports --transactions 20000 --concurrency 8
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.local_aws import install_dynamodb
+from services.report_service import ReportService
+from services.transaction_service import TransactionService
+
+CATEGORIES = ["Food", "Transport", "Shopping", "Utilities", "Entertainment"]
+
+
+def seed(user_id: str, transactions: int):
+    rng = random.Random(7)
+    for i in range(transactions):
+        day = f"20{20 + i * 60 // transactions:02d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        TransactionService.add_transaction(round(rng.uniform(2, 300), 2), rng.choice(CATEGORIES),
+                                           f"Merchant {rng.randint(1, 500)}", date=day, user_id=user_id)
+
+
+async def loop_stall(work) -> tuple:
+    """Runs `work` while a ticker measures the longest gap between event-loop wakeups."""
+    worst, done = 0.0, False
+
+    async def ticker():
+        nonlocal worst
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            worst, last = max(worst, now - last), now
+
+    tick = asyncio.ensure_future(ticker())
+    start = time.perf_counter()
+    await work
+    elapsed = time.perf_counter() - start
+    done = True
+    await tick
+    return elapsed, worst
+
+
+async def summaries(users, workers: int) -> tuple:
+    ReportService.PROCESS_WORKERS, ReportService._pool = workers, None
+    ReportService.cache.clear()
+    if workers:
+        await ReportService._render(sum, [0])  # start the pool outside the timing
+    return await loop_stall(asyncio.gather(*(ReportService.asummary_pdf(u) for u in users)))
+
+
+async def monthly(user_id: str) -> tuple:
+    ReportService.cache.clear()
+    start = time.perf_counter()
+    first, size = None, 0
+    async for chunk in ReportService.amonthly_report(user_id):
+        size += len(chunk)
+        if first is None and size > 2000:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start, size
+
+
+async def monthly_hit(user_id: str):
+    return [chunk async for chunk in ReportService.amonthly_report(user_id)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    install_dynamodb()
+    users = [f"bench-{i}" for i in range(args.concurrency)]
+    for user in users:
+        seed(user, 50)
+    seed("history", args.transactions)
+
+    for workers, label in ((0, "threads"), (2, "process pool")):
+        elapsed, stall = asyncio.run(summaries(users, workers))
+        print(f"summary x{args.concurrency} ({label:>12}): {elapsed * 1000:8.1f} ms  worst loop stall {stall * 1000:6.1f} ms")
+    start = time.perf_counter()
+    asyncio.run(ReportService.asummary_pdf(users[0]))
+    print(f"summary cache hit: {(time.perf_counter() - start) * 1000:8.2f} ms  {ReportService.cache.stats()}")
+
+    first, total, size = asyncio.run(monthly("history"))
+    print(f"monthly report, {args.transactions} transactions: first page {first * 1000:.1f} ms, "
+          f"complete {total:.2f} s, {size / 1024:.0f} KiB")
+    start = time.perf_counter()
+    asyncio.run(monthly_hit("history"))
+    print(f"monthly report cache hit: {(time.perf_counter() - start) * 1000:.2f} ms")
+    if ReportService._pool:
+        ReportService._pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Monte Carlo projection speed and memory: wall time and peak NumPy
+allocation for one run, in the default chunked mode and with all paths in a
+single chunk.
+
+Usage (from backend/):
+    python -m benchmarks.bench_simulation --paths 100000 --months 360
+"""
+import argparse
+import time
+import tracemalloc
+
+from services.simulation_service import MonteCarloEngine, SimulationParams
+
+
+def measure(params: SimulationParams, repeats: int):
+    MonteCarloEngine.run(params)  # warm up
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        MonteCarloEngine.run(params)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    MonteCarloEngine.run(params)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paths", type=int, default=100000)
+    parser.add_argument("--months", type=int, default=360)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    modes = {
+        f"chunked ({MonteCarloEngine.DEFAULT_CHUNK_PATHS})": None,
+        "single chunk": args.paths,
+    }
+    print(f"{args.paths} paths x {args.months} months")
+    for name, chunk_size in modes.items():
+        params = SimulationParams(paths=args.paths, months=args.months, seed=1, chunk_size=chunk_size)
+        seconds, peak = measure(params, args.repeats)
+        print(f"{name:>16}: {seconds * 1000:8.1f} ms  peak {peak / 2 ** 20:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
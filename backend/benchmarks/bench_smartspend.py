@@ -0,0 +1,73 @@
+"""
+Pre-screening N candidate purchases: N sequential /api/smartspend calls
+against one /api/smartspend/batch call, through the ASGI app with the
+in-process DynamoDB stand-in. Both read the same hot budget copy, so the
+difference is per-request overhead versus one vectorized pass.
+
+Usage (from backend/):
+    python -m benchmarks.bench_smartspend --items 100 1000 10000
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from benchmarks.local_aws import install_dynamodb
+from services.budget_service import BudgetService
+
+CATEGORIES = ["Food", "Shopping", "Transport", "Entertainment", "Bills", "Health"]
+
+
+async def sequential(client, amounts, categories, user_id):
+    for amount, category in zip(amounts, categories):
+        response = await client.post("/api/smartspend",
+                                     json={"amount": amount, "category": category, "user_id": user_id})
+        response.raise_for_status()
+
+
+async def batch(client, amounts, categories, user_id):
+    response = await client.post("/api/smartspend/batch",
+                                 json={"amounts": amounts, "categories": categories, "user_id": user_id})
+    response.raise_for_status()
+
+
+async def measure(app, items: int, user_id: str, max_sequential: int):
+    rng = random.Random(items)
+    amounts = [round(rng.uniform(1, 600), 2) for _ in range(items)]
+    categories = [rng.choice(CATEGORIES) for _ in range(items)]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await batch(client, amounts[:10], categories[:10], user_id)  # load the hot copy
+
+        start = time.perf_counter()
+        await batch(client, amounts, categories, user_id)
+        batch_s = time.perf_counter() - start
+
+        # Long sequential runs are timed on a prefix and scaled
+        n = min(items, max_sequential)
+        start = time.perf_counter()
+        await sequential(client, amounts[:n], categories[:n], user_id)
+        sequential_s = (time.perf_counter() - start) * items / n
+    return sequential_s, batch_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--max-sequential", type=int, default=2000)
+    args = parser.parse_args()
+
+    install_dynamodb()
+    BudgetService.set_limits("bench", {c: {"day": 200, "week": 600, "month": 2000} for c in CATEGORIES})
+
+    import main as api
+    for items in args.items:
+        sequential_s, batch_s = asyncio.run(measure(api.app, items, "bench", args.max_sequential))
+        print(f"{items:>6} items  sequential {sequential_s * 1000:9.1f} ms  batch {batch_s * 1000:7.1f} ms  "
+              f"speedup {sequential_s / batch_s:6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
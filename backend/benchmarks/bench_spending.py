@@ -0,0 +1,103 @@
+"""
+/api/spending serialization and payload size at 10k and 100k rows: per-row
+model validation (response_model), per-row json.dumps, and the bulk orjson
+encoder; body size plain and gzipped; and end-to-end GET latency for a full
+response vs a 304 revalidation against the in-process DynamoDB stand-in.
+
+Usage (from backend/):
+    python -m benchmarks.bench_spending --rows 10000 100000
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import time
+from typing import List
+
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+from benchmarks.local_aws import install_dynamodb
+from services.db_service import DynamoDBService
+
+CATEGORIES = ["Food", "Transport", "Shopping", "Utilities", "Entertainment"]
+
+
+def make_rows(n: int, user_id: str) -> List[dict]:
+    rng = random.Random(3)
+    return [{"id": 1_000_000 + i, "user_id": user_id, "category": rng.choice(CATEGORIES),
+             "amount": round(rng.uniform(2, 300), 2), "date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+             "merchant": f"Merchant {rng.randint(1, 500)}"} for i in range(n)]
+
+
+def timed(fn, repeat: int = 3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def serialization(rows: List[dict]):
+    import main
+    adapter = TypeAdapter(List[main.SpendingItem])
+    pages = [rows[i:i + main.SPENDING_PAGE_SIZE] for i in range(0, len(rows), main.SPENDING_PAGE_SIZE)]
+
+    loop = asyncio.new_event_loop()
+
+    async def collect(body):
+        return b"".join([chunk async for chunk in body])
+
+    variants = {
+        "validated (response_model)": lambda: adapter.dump_json(adapter.validate_python(rows)),
+        "json.dumps per row": lambda: ("[" + ",".join(json.dumps(row) for row in rows) + "]").encode(),
+        "bulk encoder, streamed": lambda: loop.run_until_complete(collect(main._stream_json_array(pages, project=False))),
+    }
+    for name, fn in variants.items():
+        elapsed, body = timed(fn)
+        print(f"  {name:<28} {elapsed * 1000:8.1f} ms  {len(body) / 1024:8.0f} KiB")
+    for level in (1, 6):
+        elapsed, packed = timed(lambda: gzip.compress(body, level))
+        print(f"  gzip level {level:<17} {elapsed * 1000:8.1f} ms  {len(packed) / 1024:8.0f} KiB")
+    loop.close()
+
+
+def endpoint(rows: List[dict], user_id: str):
+    install_dynamodb()
+    with DynamoDBService.get_table().batch_writer() as batch:
+        for row in rows:
+            batch.put_item(Item={**row, "date_id": f"{row['date']}#{row['id']}"})
+    import main
+    client = TestClient(main.app)
+    params = {"user_id": user_id}
+
+    elapsed, response = timed(lambda: client.get("/api/spending", params=params,
+                                                 headers={"Accept-Encoding": "identity"}), repeat=1)
+    print(f"  GET, cold columns            {elapsed * 1000:8.1f} ms  {len(response.content) / 1024:8.0f} KiB")
+    elapsed, response = timed(lambda: client.get("/api/spending", params=params, headers={"Accept-Encoding": "identity"}))
+    print(f"  GET, cached columns          {elapsed * 1000:8.1f} ms")
+    elapsed, _ = timed(lambda: client.get("/api/spending", params=params, headers={"Accept-Encoding": "gzip"}))
+    print(f"  GET, cached columns, gzip    {elapsed * 1000:8.1f} ms")
+    etag = response.headers["etag"]
+    elapsed, revalidated = timed(lambda: client.get("/api/spending", params=params, headers={"If-None-Match": etag}))
+    assert revalidated.status_code == 304
+    print(f"  GET, If-None-Match -> 304    {elapsed * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    for n in args.rows:
+        user_id = f"bench-{n}"
+        rows = make_rows(n, user_id)
+        print(f"{n:,} rows")
+        serialization(rows)
+        endpoint(rows, user_id)
+
+
+if __name__ == "__main__":
+    main()
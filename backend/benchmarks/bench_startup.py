@@ -0,0 +1,128 @@
+"""
+Cold-start budget for the Vercel entry point. Each run is a fresh Python
+process (VERCEL=1, as deployed) that imports api/index.py, then sends the
+first requests straight to the ASGI app: GET / and GET /api/spending
+against the in-process DynamoDB stand-in (the first DynamoDB call also
+pays the deferred boto3 import). It also times the ReportLab import that is
+deferred to the first PDF. Medians over --runs are compared
+with the budgets; the exit status is 1 when one is exceeded, so CI can
+treat it as a regression gate.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --profile   # slowest modules by import time
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, "api")
+import index
+imported = time.perf_counter()
+
+import asyncio
+sys.path.insert(0, "backend")
+from benchmarks.local_aws import install_dynamodb
+
+async def get(path, query=b""):
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query,
+             "root_path": "", "headers": [(b"host", b"localhost")], "client": ("127.0.0.1", 1),
+             "server": ("localhost", 80)}
+    sent, done, requests = {}, asyncio.Event(), iter([{"type": "http.request", "body": b"", "more_body": False}])
+    async def receive():
+        message = next(requests, None)
+        if message is None:
+            # Streaming responses listen for a disconnect until they finish
+            await done.wait()
+            message = {"type": "http.disconnect"}
+        return message
+    async def send(message):
+        if message["type"] == "http.response.start":
+            sent["status"] = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body"):
+            done.set()
+    await index.app(scope, receive, send)
+    return sent["status"]
+
+loop = asyncio.new_event_loop()
+first = time.perf_counter()
+assert loop.run_until_complete(get("/")) == 200
+root = time.perf_counter() - first
+install_dynamodb()
+first = time.perf_counter()
+assert loop.run_until_complete(get("/api/spending", b"user_id=cold")) == 200
+spending = time.perf_counter() - first
+
+t = time.perf_counter()
+import reportlab.pdfgen.canvas
+deferred = (time.perf_counter() - t) * 1000
+print(json.dumps({"import_ms": (imported - start) * 1000, "first_root_ms": root * 1000,
+                  "first_spending_ms": spending * 1000, "reportlab_ms": deferred}))
+"""
+
+
+def run_once() -> dict:
+    env = dict(os.environ, VERCEL="1", PYTHONDONTWRITEBYTECODE="1")
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def profile(top: int):
+    env = dict(os.environ, VERCEL="1")
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import sys; sys.path.insert(0, 'api'); import index"],
+                         cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    for cumulative, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative / 1000:8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=1500)
+    parser.add_argument("--first-response-budget-ms", type=float, default=500)
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    if args.profile:
+        profile(args.top)
+        return
+
+    runs = [run_once() for _ in range(args.runs)]
+    medians = {key: statistics.median(run[key] for run in runs)
+               for key in ("import_ms", "first_root_ms", "first_spending_ms", "process_ms")}
+    for key, value in medians.items():
+        print(f"{key:<18} {value:8.1f} ms")
+    print(f"{'deferred reportlab':<18} {statistics.median(run['reportlab_ms'] for run in runs):8.1f} ms")
+
+    over = []
+    if medians["import_ms"] > args.import_budget_ms:
+        over.append(f"import {medians['import_ms']:.0f} ms > {args.import_budget_ms:.0f} ms")
+    if max(medians["first_root_ms"], medians["first_spending_ms"]) > args.first_response_budget_ms:
+        over.append(f"first response over {args.first_response_budget_ms:.0f} ms")
+    if over:
+        print("Over budget: " + "; ".join(over))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Cost of tracing: a span inside and outside a sampled request, and
+GET / and POST /api/chat (against the local stand-ins, Bedrock cache on)
+at TRACE_SAMPLE_RATE 0, 0.1 and 1.
+
+Usage (from backend/):
+    python -m benchmarks.bench_tracing --requests 2000
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.local_aws import install_bedrock, install_dynamodb
+from services import tracing
+
+
+def span_cost(n: int):
+    start = time.perf_counter()
+    for _ in range(n):
+        with tracing.span("stage"):
+            pass
+    unsampled = (time.perf_counter() - start) / n
+    token = tracing._current.set(tracing.Trace())
+    start = time.perf_counter()
+    for _ in range(n):
+        with tracing.span("stage"):
+            pass
+    sampled = (time.perf_counter() - start) / n
+    tracing._current.reset(token)
+    print(f"  span, unsampled   {unsampled * 1e9:8.0f} ns")
+    print(f"  span, sampled     {sampled * 1e9:8.0f} ns")
+
+
+async def request_cost(requests: int):
+    import main
+    install_dynamodb()
+    install_bedrock()
+    transport = httpx.ASGITransport(app=main.app)
+    calls = {"GET /": ("GET", "/", {}),
+             "POST /api/chat": ("POST", "/api/chat", {"json": {"message": "How should I save?", "user_id": "bench"}})}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, (method, path, kwargs) in calls.items():
+            for rate in (0.0, 0.1, 1.0):
+                tracing.SAMPLE_RATE = rate
+                await client.request(method, path, **kwargs)
+                start = time.perf_counter()
+                for _ in range(requests):
+                    await client.request(method, path, **kwargs)
+                elapsed = (time.perf_counter() - start) / requests
+                print(f"  {name:<16} sample rate {rate:<4} {elapsed * 1e6:8.1f} us/request")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--spans", type=int, default=200000)
+    args = parser.parse_args()
+    span_cost(args.spans)
+    asyncio.run(request_cost(args.requests))
+
+
+if __name__ == "__main__":
+    main()
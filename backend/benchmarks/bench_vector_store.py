@@ -0,0 +1,77 @@
+"""
+Dense-vector retrieval at tens of thousands of passages: embedding/append
+throughput, exhaustive batched top-k latency, and IVF (k-means) latency and
+recall against the exhaustive results.
+
+Usage (from backend/):
+    python -m benchmarks.bench_vector_store --passages 50000 --dtype float16
+"""
+import argparse
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_rag import synthetic_passages
+from services.vector_store import VectorStore
+
+
+def timed_queries(store, queries, k, nprobe=None):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(store.search(query, k, nprobe))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.percentile(latencies, [50, 99]), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--passages", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dtype", choices=("float16", "float32"), default="float16")
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("-k", type=int, default=4)
+    args = parser.parse_args()
+
+    passages = synthetic_passages(args.passages)
+    rng = random.Random(3)
+    queries = [" ".join(rng.sample(passages[rng.randrange(len(passages))].split(), 4))
+               for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = VectorStore(directory, dtype=args.dtype)
+        start = time.perf_counter()
+        store.append(passages)
+        append_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store = VectorStore(directory)
+        open_ms = (time.perf_counter() - start) * 1000
+
+        (p50, p99), exact = timed_queries(store, queries, args.k)
+
+        start = time.perf_counter()
+        batch = store.search_vectors(store.embedder.embed(queries), args.k)
+        batch_ms = (time.perf_counter() - start) * 1000
+        assert [[row for row, _ in hits] for hits in batch] == [[row for row, _ in hits] for hits in exact]
+
+        start = time.perf_counter()
+        store.build_clusters()
+        cluster_s = time.perf_counter() - start
+        (ivf_p50, ivf_p99), approximate = timed_queries(store, queries, args.k, args.nprobe)
+
+    recall = np.mean([
+        len({row for row, _ in a} & {row for row, _ in e}) / max(len(e), 1)
+        for a, e in zip(approximate, exact)
+    ])
+    print(f"passages={args.passages} dim={store.embedder.dim} dtype={args.dtype} "
+          f"matrix={store.vectors.nbytes / 1e6:.1f}MB")
+    print(f"append {append_s:.2f}s  open {open_ms:.1f}ms  clusters={len(store.centroids)} built in {cluster_s:.2f}s")
+    print(f"exhaustive p50 {p50:.2f}ms  p99 {p99:.2f}ms  batched {batch_ms / len(queries):.3f}ms/query")
+    print(f"ivf nprobe={args.nprobe} p50 {ivf_p50:.2f}ms  p99 {ivf_p99:.2f}ms  recall@{args.k} {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
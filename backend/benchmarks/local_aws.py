@@ -0,0 +1,591 @@
+"""
+In-process stand-ins for the AWS services used by the backend.
+
+They mimic the slice of the boto3 DynamoDB resource API the services call
+(create_table, put_item, batch_writer, scan pages with
+Limit/ExclusiveStartKey/Segment, key-condition queries on the table and its
+global secondary indexes) and of the Bedrock runtime client (invoke_model and
+invoke_model_with_response_stream for Nova and Titan request bodies). Calls
+can be given latency, jitter and throttling so concurrency and retry effects
+show up in benchmarks without touching real AWS.
+"""
+import bisect
+import io
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+from botocore.exceptions import ClientError
+
+from services import aws_clients, tracing
+from services.bedrock_service import BedrockService
+from services.db_service import DynamoDBService
+from services.sqlite_service import SQLiteService
+from services.storage import get_store, use_store
+from services.data_prep_service import DataPrepService
+from services.budget_service import BudgetService
+from services.rollup_service import RollupService
+from services.transaction_cache import TransactionCache
+
+
+class _Top:
+    """Sorts after any value; used as an open upper bound in key tuples."""
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+_TOP = _Top()
+
+
+def _to_decimal(item: dict) -> dict:
+    return {
+        k: Decimal(str(v)) if isinstance(v, (int, float)) and not isinstance(v, bool) else v
+        for k, v in item.items()
+    }
+
+
+def _range_bounds(condition):
+    """Turns a boto3 sort-key condition into (low, high) bounds on sorted entries."""
+    expression = condition.get_expression()
+    operator, values = expression['operator'], expression['values']
+    if operator == '=':
+        return (values[1],), (values[1], _TOP)
+    if operator == '<':
+        return None, (values[1],)
+    if operator == '<=':
+        return None, (values[1], _TOP)
+    if operator == '>':
+        return (values[1], _TOP), None
+    if operator == '>=':
+        return (values[1],), None
+    if operator == 'BETWEEN':
+        return (values[1],), (values[2], _TOP)
+    if operator == 'begins_with':
+        return (values[1],), (values[1] + '\U0010ffff',)
+    raise ValueError(f"Unsupported key condition {operator}")
+
+
+def _key_condition(condition):
+    """Flattens a boto3 KeyConditionExpression into (hash attr, hash value, low, high)."""
+    expression = condition.get_expression()
+    if expression['operator'] == 'AND':
+        hash_condition, range_condition = expression['values']
+        hash_attr, hash_value, _, _ = _key_condition(hash_condition)
+        return (hash_attr, hash_value) + _range_bounds(range_condition)
+    key, value = expression['values']
+    return key.name, value, None, None
+
+
+class SimulatedCalls:
+    """
+    Latency and throttling for a stand-in's calls. Every attempt sleeps
+    `latency` plus exponentially distributed `jitter` (mean, seconds). With
+    probability `throttle_rate` an attempt is throttled and retried after
+    botocore's throttling backoff, rand * min(2 ** (attempt - 1), 20) seconds
+    times `backoff_scale`; after aws_clients.MAX_ATTEMPTS attempts the
+    throttling error reaches the caller, as it would through boto3. Each
+    call is reported to tracing like a real client's.
+    """
+    SERVICE = "bedrock-runtime"
+    THROTTLE_CODE = "ThrottlingException"
+
+    def _init_calls(self, latency: float = 0.0, jitter: float = 0.0, throttle_rate: float = 0.0,
+                    backoff_scale: float = 1.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.backoff_scale = backoff_scale
+        self.calls = 0
+        self.throttles = 0
+        self._random = random.Random(seed)
+        self._calls_lock = threading.Lock()
+
+    def _sleep_round_trip(self):
+        delay = self.latency + (self._random.expovariate(1 / self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+
+    def _wait(self, operation: str = "Call"):
+        with self._calls_lock:
+            self.calls += 1
+        start, error = time.perf_counter(), None
+        try:
+            self._attempts(operation)
+        except ClientError:
+            error = self.THROTTLE_CODE
+            raise
+        finally:
+            tracing.record_aws_call(self.SERVICE, operation, time.perf_counter() - start, error)
+
+    def _attempts(self, operation: str):
+        attempt = 1
+        while self.throttle_rate and self._random.random() < self.throttle_rate:
+            self.throttles += 1
+            self._sleep_round_trip()
+            if attempt >= aws_clients.MAX_ATTEMPTS:
+                raise ClientError({"Error": {"Code": self.THROTTLE_CODE, "Message": "Rate exceeded"}}, operation)
+            time.sleep(self._random.random() * min(2 ** (attempt - 1), 20) * self.backoff_scale)
+            attempt += 1
+        self._sleep_round_trip()
+
+
+class LocalTable(SimulatedCalls):
+    # DynamoDB stops a page at 1 MB; approximate that with an item count
+    MAX_PAGE_ITEMS = 1000
+    SERVICE = "dynamodb"
+    THROTTLE_CODE = "ProvisionedThroughputExceededException"
+
+    def __init__(self, name: str, key_schema=("id",), indexes=None, latency: float = 0.0, **faults):
+        self.name = name
+        self.key_schema = tuple(key_schema)
+        # index name -> key attributes; None is the table itself
+        self.indexes = {None: self.key_schema}
+        self.indexes.update(indexes or {})
+        self._init_calls(latency, **faults)
+        self._items = {}
+        self._segments = {}
+        # index name -> hash value -> sorted [(range value, primary key)]
+        self._partitions = {index_name: {} for index_name in self.indexes}
+        self._lock = threading.Lock()
+
+    def _key(self, item: dict) -> tuple:
+        return tuple(item[attr] for attr in self.key_schema)
+
+    def _index_entry(self, index_name, item, key):
+        attrs = self.indexes[index_name]
+        if any(attr not in item for attr in attrs):
+            return None, None
+        range_value = item[attrs[1]] if len(attrs) > 1 else None
+        return item[attrs[0]], (range_value, key)
+
+    def _unindex(self, key):
+        old = self._items.get(key)
+        if old is None:
+            return
+        for index_name, partitions in self._partitions.items():
+            hash_value, entry = self._index_entry(index_name, old, key)
+            if hash_value is not None:
+                entries = partitions[hash_value]
+                entries.pop(bisect.bisect_left(entries, entry))
+
+    def _delete(self, key_attrs: dict):
+        key = self._key(key_attrs)
+        self._unindex(key)
+        if self._items.pop(key, None) is not None:
+            self._segments.clear()
+
+    def _store(self, item: dict):
+        item = _to_decimal(item)
+        key = self._key(item)
+        self._unindex(key)
+        self._items[key] = item
+        for index_name, partitions in self._partitions.items():
+            hash_value, entry = self._index_entry(index_name, item, key)
+            if hash_value is not None:
+                bisect.insort(partitions.setdefault(hash_value, []), entry)
+        self._segments.clear()
+
+    def _ordered_keys(self, segment=None, total_segments=None):
+        """Returns (keys, positions) for the whole table or one scan segment."""
+        with self._lock:
+            cache_key = total_segments or 1
+            if cache_key not in self._segments:
+                buckets = [[] for _ in range(cache_key)]
+                for key in self._items:
+                    buckets[zlib.crc32(repr(key).encode()) % cache_key].append(key)
+                self._segments[cache_key] = [
+                    (keys, {key: pos for pos, key in enumerate(keys)}) for keys in buckets
+                ]
+            return self._segments[cache_key][segment or 0]
+
+    def _page(self, keys, has_more, last_key_attrs):
+        response = {"Items": [dict(self._items[key]) for key in keys]}
+        if has_more and keys:
+            last = self._items[keys[-1]]
+            response["LastEvaluatedKey"] = {attr: last[attr] for attr in last_key_attrs}
+        return response
+
+    def _page_size(self, limit):
+        return min(limit or self.MAX_PAGE_ITEMS, self.MAX_PAGE_ITEMS)
+
+    def put_item(self, Item, ConditionExpression=None, **kwargs):
+        """Supports attribute_not_exists(...) conditions on the item's key."""
+        self._wait("PutItem")
+        with self._lock:
+            if ConditionExpression and 'attribute_not_exists' in ConditionExpression \
+                    and self._key(Item) in self._items:
+                raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "PutItem")
+            self._store(Item)
+        return {}
+
+    def get_item(self, Key, **kwargs):
+        self._wait("GetItem")
+        with self._lock:
+            item = self._items.get(self._key(Key))
+        return {'Item': dict(item)} if item is not None else {}
+
+    def delete_item(self, Key, **kwargs):
+        self._wait("DeleteItem")
+        with self._lock:
+            self._delete(Key)
+        return {}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, **kwargs):
+        """Supports the SET and ADD clauses of an update expression."""
+        self._wait("UpdateItem")
+        names = ExpressionAttributeNames or {}
+        values = _to_decimal(ExpressionAttributeValues or {})
+        with self._lock:
+            item = dict(self._items.get(self._key(Key), Key))
+            for action, clause in re.findall(r"(SET|ADD)\s+(.*?)(?=\s+(?:SET|ADD)\s|$)", UpdateExpression):
+                for assignment in clause.split(","):
+                    if action == 'SET':
+                        attr, value = (part.strip() for part in assignment.split("="))
+                        item[names.get(attr, attr)] = values[value]
+                    else:
+                        attr, value = assignment.split()
+                        attr = names.get(attr, attr)
+                        item[attr] = item.get(attr, 0) + values[value]
+            self._store(item)
+        return {}
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        return LocalBatchWriter(self)
+
+    def scan(self, Limit=None, ExclusiveStartKey=None, Segment=None, TotalSegments=None, **kwargs):
+        self._wait("Scan")
+        keys, positions = self._ordered_keys(Segment, TotalSegments)
+        start = positions[self._key(ExclusiveStartKey)] + 1 if ExclusiveStartKey else 0
+        end = start + self._page_size(Limit)
+        with self._lock:
+            return self._page(keys[start:end], end < len(keys), self.key_schema)
+
+    def query(self, KeyConditionExpression, IndexName=None, Limit=None, ExclusiveStartKey=None,
+              ScanIndexForward=True, **kwargs):
+        self._wait("Query")
+        hash_attr, hash_value, low, high = _key_condition(KeyConditionExpression)
+        index_attrs = self.indexes[IndexName]
+        if hash_attr != index_attrs[0]:
+            raise ValueError(f"Query key {hash_attr} does not match index {IndexName or self.name}")
+
+        with self._lock:
+            entries = self._partitions[IndexName].get(hash_value, [])
+            lo = bisect.bisect_left(entries, low) if low else 0
+            hi = bisect.bisect_left(entries, high) if high else len(entries)
+            if ExclusiveStartKey:
+                start_key = self._key(ExclusiveStartKey)
+                start_range = ExclusiveStartKey.get(index_attrs[1]) if len(index_attrs) > 1 else None
+                if ScanIndexForward:
+                    lo = max(lo, bisect.bisect_right(entries, (start_range, start_key)))
+                else:
+                    hi = min(hi, bisect.bisect_left(entries, (start_range, start_key)))
+            page_size = self._page_size(Limit)
+            if ScanIndexForward:
+                selected = entries[lo:min(hi, lo + page_size)]
+            else:
+                selected = entries[max(lo, hi - page_size):hi][::-1]
+            has_more = hi - lo > page_size
+            keys = [key for _, key in selected]
+            return self._page(keys, has_more, dict.fromkeys(self.key_schema + index_attrs))
+
+
+class LocalBatchWriter:
+    # batch_writer flushes BatchWriteItem calls of up to 25 items
+    BATCH_SIZE = 25
+
+    def __init__(self, table: LocalTable):
+        self.table = table
+        self.pending = []
+
+    def put_item(self, Item):
+        self._add(('put', Item))
+
+    def delete_item(self, Key):
+        self._add(('delete', Key))
+
+    def _add(self, request):
+        self.pending.append(request)
+        if len(self.pending) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.table._wait("BatchWriteItem")
+            with self.table._lock:
+                for action, item in self.pending:
+                    if action == 'put':
+                        self.table._store(item)
+                    else:
+                        self.table._delete(item)
+            self.pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+
+class LocalDynamoDBClient:
+    """The low-level client calls DynamoDBService makes through resource.meta.client."""
+
+    def __init__(self, resource: "LocalDynamoDBResource"):
+        self.resource = resource
+        # table name -> TTL attribute
+        self.ttl = {}
+
+    def describe_time_to_live(self, TableName):
+        if TableName not in self.ttl:
+            return {'TimeToLiveDescription': {'TimeToLiveStatus': 'DISABLED'}}
+        return {'TimeToLiveDescription': {'TimeToLiveStatus': 'ENABLED', 'AttributeName': self.ttl[TableName]}}
+
+    def update_time_to_live(self, TableName, TimeToLiveSpecification):
+        if TableName not in self.resource.tables:
+            raise ClientError({"Error": {"Code": "ResourceNotFoundException"}}, "UpdateTimeToLive")
+        if TableName in self.ttl:
+            # Like DynamoDB, enabling it twice is an error
+            raise ClientError({"Error": {"Code": "ValidationException",
+                                         "Message": "TimeToLive is already enabled"}}, "UpdateTimeToLive")
+        if TimeToLiveSpecification['Enabled']:
+            self.ttl[TableName] = TimeToLiveSpecification['AttributeName']
+        return {'TimeToLiveSpecification': TimeToLiveSpecification}
+
+
+class LocalDynamoDBResource:
+    def __init__(self, latency: float = 0.0, **faults):
+        self.latency = latency
+        self.faults = faults
+        self.tables = {}
+        self.meta = SimpleNamespace(client=LocalDynamoDBClient(self))
+
+    def configure(self, **settings):
+        """Changes latency/jitter/throttle_rate/backoff_scale on this resource and every table."""
+        self.latency = settings.pop('latency', self.latency)
+        self.faults.update(settings)
+        for table in self.tables.values():
+            table.latency = self.latency
+            for name, value in self.faults.items():
+                setattr(table, name, value)
+
+    def create_table(self, TableName, KeySchema, GlobalSecondaryIndexes=(), **kwargs):
+        if TableName in self.tables:
+            raise ClientError({"Error": {"Code": "ResourceInUseException"}}, "CreateTable")
+        indexes = {
+            index['IndexName']: tuple(k['AttributeName'] for k in index['KeySchema'])
+            for index in GlobalSecondaryIndexes
+        }
+        key_schema = tuple(k['AttributeName'] for k in KeySchema)
+        table = LocalTable(TableName, key_schema, indexes, self.latency, **self.faults)
+        table.wait_until_exists = lambda: None
+        self.tables[TableName] = table
+        return table
+
+    def batch_get_item(self, RequestItems):
+        responses = {}
+        for name, request in RequestItems.items():
+            table = self.Table(name)
+            table._wait("BatchGetItem")
+            with table._lock:
+                items = [table._items.get(table._key(key)) for key in request['Keys']]
+            responses[name] = [dict(item) for item in items if item is not None]
+        return {'Responses': responses, 'UnprocessedKeys': {}}
+
+    def Table(self, name: str) -> LocalTable:
+        if name not in self.tables:
+            # Tables that were never provisioned behave like the legacy id-keyed table
+            self.tables[name] = LocalTable(name, latency=self.latency, **self.faults)
+        return self.tables[name]
+
+
+def install_dynamodb(latency: float = 0.0, **faults) -> LocalDynamoDBResource:
+    """
+    Points DynamoDBService (including scan worker threads) at an in-process
+    resource and provisions its tables there. `faults` are SimulatedCalls
+    settings (jitter, throttle_rate, backoff_scale, seed).
+    """
+    resource = LocalDynamoDBResource(latency, **faults)
+    DynamoDBService._new_resource = classmethod(lambda cls: resource)
+    DynamoDBService._resource = None
+    DynamoDBService._table = None
+    DynamoDBService._local = threading.local()
+    DynamoDBService.init_table()
+    use_store(DynamoDBService)
+    return resource
+
+
+def install_sqlite(path: str = None):
+    """Points the services at SQLiteService on a new database file, in a temporary directory by default."""
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="fintwin-"), "transactions.sqlite3")
+    SQLiteService.configure(path)
+    SQLiteService.init_table()
+    return use_store(SQLiteService)
+
+
+class LocalBedrockRuntime(SimulatedCalls):
+    """Answers invoke_model with a deterministic echo of the prompt."""
+
+    def __init__(self, latency: float = 0.0, **faults):
+        self._init_calls(latency, **faults)
+
+    @staticmethod
+    def answer(prompt: str) -> str:
+        return f"Local answer ({zlib.crc32(prompt.encode()):08x}): {prompt[:80]}"
+
+    @staticmethod
+    def tokens(text: str) -> int:
+        # Roughly one token per word
+        return len(text.split())
+
+    def invoke_model(self, body, modelId, **kwargs):
+        self._wait("InvokeModel")
+        request = json.loads(body)
+        if "messages" in request:
+            prompt = request["messages"][0]["content"][0]["text"]
+            text = self.answer(prompt)
+            response = {"output": {"message": {"content": [{"text": text}]}},
+                        "usage": {"inputTokens": self.tokens(prompt), "outputTokens": self.tokens(text)}}
+        else:
+            text = self.answer(request["inputText"])
+            response = {"inputTextTokenCount": self.tokens(request["inputText"]),
+                        "results": [{"outputText": text, "tokenCount": self.tokens(text)}]}
+        return {"body": io.BytesIO(json.dumps(response).encode())}
+
+    def invoke_model_with_response_stream(self, body, modelId, **kwargs):
+        """Streams the same answer word by word in Nova or Titan event format."""
+        # The latency before the first event; each word adds a tenth of it
+        self._wait("InvokeModelWithResponseStream")
+        request = json.loads(body)
+        nova = "messages" in request
+        prompt = request["messages"][0]["content"][0]["text"] if nova else request["inputText"]
+        text = self.answer(prompt)
+        metrics = {"amazon-bedrock-invocationMetrics": {"inputTokenCount": self.tokens(prompt),
+                                                         "outputTokenCount": self.tokens(text)}}
+
+        def events():
+            if nova:
+                yield {"chunk": {"bytes": json.dumps({"messageStart": {"role": "assistant"}}).encode()}}
+            for word in re.findall(r"\S+\s*", text):
+                if self.latency:
+                    time.sleep(self.latency / 10)
+                payload = {"contentBlockDelta": {"delta": {"text": word}, "contentBlockIndex": 0}} if nova \
+                    else {"outputText": word, "index": 0}
+                yield {"chunk": {"bytes": json.dumps(payload).encode()}}
+            if nova:
+                yield {"chunk": {"bytes": json.dumps({"messageStop": {"stopReason": "end_turn"}}).encode()}}
+                final = {"metadata": {"usage": {"inputTokens": self.tokens(prompt),
+                                                "outputTokens": self.tokens(text)}}, **metrics}
+            else:
+                final = {"outputText": "", "index": 0, "completionReason": "FINISH", **metrics}
+            yield {"chunk": {"bytes": json.dumps(final).encode()}}
+
+        return {"body": events()}
+
+
+def install_bedrock(latency: float = 0.0, **faults) -> LocalBedrockRuntime:
+    """Points BedrockService at an in-process runtime client with an empty response cache."""
+    client = LocalBedrockRuntime(latency, **faults)
+    BedrockService._client = client
+    BedrockService.cache.clear()
+    return client
+
+
+def synthetic_transactions(count: int, start_id: int = 1, users: int = 1, user_prefix: str = "user"):
+    """Deterministic transaction rows spread over `users` users and twelve months."""
+    categories = ["Food", "Transport", "Shopping", "Groceries", "Utilities"]
+    merchants = ["Burger King #123", "UBER *TRIP", "AMZN Mktp US", "City Electric Co", "Whole Foods Market"]
+    for i in range(start_id, start_id + count):
+        yield {
+            "id": i,
+            "user_id": f"{user_prefix}-{i % users}",
+            "category": categories[i % len(categories)],
+            "amount": round(5 + (i * 7919) % 50000 / 100, 2),
+            "date": f"2023-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            "merchant": merchants[i % len(merchants)],
+        }
+
+
+def seed_transactions(count: int, start_id: int = 1, users: int = 1, user_prefix: str = "user",
+                      canonical: bool = True):
+    """
+    Writes synthetic transactions through DynamoDBService without simulated
+    latency. Rows are normalized as on ingest unless `canonical` is False,
+    which leaves them as pre-backfill raw rows.
+    """
+    table = DynamoDBService.get_table()
+    latency, table.latency = table.latency, 0.0
+    rows = synthetic_transactions(count, start_id, users, user_prefix)
+    if canonical:
+        rows = (DataPrepService.canonicalize(row) for row in rows)
+    DynamoDBService.batch_add_transactions(rows)
+    table.latency = latency
+
+
+def random_transactions(count: int, users: int = 100, seed: int = 0, days: int = 365, user_prefix: str = "user"):
+    """
+    Seeded synthetic history for load tests, normalized as on ingest:
+    log-normal amounts (median about $20), Zipf-like activity per user (a
+    few heavy users and a long tail) and dates over the `days` days up to
+    today, so current budget windows have spend in them.
+    """
+    categories = ["Food", "Transport", "Shopping", "Groceries", "Utilities", "Entertainment", "Health"]
+    merchants = ["Burger King #123", "UBER *TRIP", "AMZN Mktp US", "City Electric Co", "Whole Foods Market",
+                 "Starbucks Store 0042", "Netflix.com", "Shell Oil 5731", "CVS Pharmacy", "Local Bistro"]
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, users + 1) ** 0.8
+    user_ids = rng.choice(users, size=count, p=weights / weights.sum())
+    category_ids = rng.integers(0, len(categories), count)
+    merchant_ids = rng.integers(0, len(merchants), count)
+    amounts = np.round(rng.lognormal(3.0, 1.0, count), 2)
+    today = date.today()
+    day_strings = [(today - timedelta(days=int(d))).isoformat() for d in range(days)]
+    offsets = rng.integers(0, days, count)
+    for i, (u, c, m, amount, d) in enumerate(zip(user_ids.tolist(), category_ids.tolist(), merchant_ids.tolist(),
+                                                  amounts.tolist(), offsets.tolist()), 1):
+        yield DataPrepService.canonicalize({
+            "id": i, "user_id": f"{user_prefix}-{u}", "category": categories[c], "amount": amount,
+            "date": day_strings[d], "merchant": merchants[m],
+        })
+
+
+def seed_dataset(count: int, users: int = 100, seed: int = 0, user_prefix: str = "user",
+                 chunk_size: int = 10000) -> int:
+    """
+    Writes a random_transactions dataset with its rollups and budget
+    counters to the current storage backend, as the bulk importer would,
+    with the DynamoDB stand-in's simulated latency and throttling paused.
+    Returns the number of transactions written.
+    """
+    store = get_store()
+    resource = DynamoDBService.get_resource() if store is DynamoDBService else None
+    if resource is not None:
+        settings = dict(resource.faults, latency=resource.latency)
+        resource.configure(latency=0.0, jitter=0.0, throttle_rate=0.0)
+    written = 0
+    rows = random_transactions(count, users, seed, user_prefix=user_prefix)
+    while True:
+        chunk = [row for _, row in zip(range(chunk_size), rows)]
+        if not chunk:
+            break
+        written += store.batch_add_transactions(chunk)
+        RollupService.record_many(chunk)
+        BudgetService.record_many(chunk)
+    for u in range(users):
+        TransactionCache.invalidate(f"{user_prefix}-{u}")
+    if resource is not None:
+        resource.configure(**settings)
+    return written
@@ -1,34 +1,56 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse, Response
-from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 import os
-from io import BytesIO
-from datetime import datetime
-from collections import defaultdict
-
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import LETTER
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-
-load_dotenv()
-from pydantic import BaseModel
-from typing import List, Optional
+import json
+import zlib
+import hashlib
+from datetime import date
+
+# Deployments (Vercel sets VERCEL=1) get their settings from the environment,
+# so only local runs pay for looking up a .env file
+if not os.getenv('VERCEL'):
+    from dotenv import load_dotenv
+    load_dotenv()
+try:
+    import orjson
+except ImportError:  # the stdlib encoder gives the same JSON, just slower
+    orjson = None
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 from services.rag_service import RAGService
-from services.data_prep_service import DataPrepService
 from services.agents.orchestrator import AgentOrchestrator
+from services.bedrock_service import BedrockService
 from services.smartspend_service import SmartSpendEngine
-from services.db_service import DynamoDBService
-
-app = FastAPI()
-
-# Initialize DB on startup
-# In a real prod app, use lifespan context manager
-try:
-    DynamoDBService.init_table()
-except Exception as e:
-    print(f"Warning: DB Init failed: {e}")
+from services.budget_service import BudgetService
+from services.storage import get_store
+from services.rollup_service import RollupService
+from services.report_service import ReportService
+from services.single_flight import SingleFlight
+from services.aws_clients import run_blocking
+from services.tracing import TracingMiddleware, registry, span
+from services.import_service import ImportOffsetError, ImportService
+from services.simulation_service import DEFAULT_PROFILE, MonteCarloEngine, SimulationParams, SimulationTooLargeError
+
+# Tables are provisioned at deploy time (python -m scripts.init_tables).
+# Local servers also check them at startup, but never at import, so a
+# serverless cold start does not wait on create_table.
+INIT_TABLES_ON_STARTUP = os.getenv('DYNAMODB_INIT_ON_STARTUP', '0' if os.getenv('VERCEL') else '1') == '1'
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if INIT_TABLES_ON_STARTUP:
+        try:
+            await run_blocking(get_store().init_table)
+        except Exception as e:
+            print(f"Warning: DB Init failed: {e}")
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS Setup
 origins = ["*"] 
@@ -39,18 +61,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Server-Timing"],
 )
+# Outermost, so request durations include the other middleware
+app.add_middleware(TracingMiddleware)
 
 # Models
 class ChatRequest(BaseModel):
     message: str
+    user_id: Optional[str] = None
+    # Skip the Bedrock response cache and generate a new answer
+    fresh: bool = False
+    # Stream the answer as Server-Sent Events (also selected by Accept: text/event-stream)
+    stream: bool = False
+    # Include the per-agent latency breakdown in the response
+    debug: bool = False
+
+class AgentTiming(BaseModel):
+    agent: str
+    status: str
+    latency_ms: float
 
 class ChatResponse(BaseModel):
     response: str
     context: List[str]
+    # Per-agent latency breakdown, only in debug mode
+    agents: Optional[List[AgentTiming]] = None
+    total_ms: Optional[float] = None
 
 class SpendingItem(BaseModel):
     id: int
+    user_id: str
     category: str
     amount: float
     date: str
@@ -59,77 +100,51 @@ class SpendingItem(BaseModel):
 class SmartSpendRequest(BaseModel):
     amount: float
     category: str
+    user_id: Optional[str] = None
+
+# Longest cart /api/smartspend/batch accepts; longer ones get a 422
+SMARTSPEND_MAX_BATCH = int(os.getenv('SMARTSPEND_MAX_BATCH', '10000'))
+
+class SmartSpendBatchRequest(BaseModel):
+    # Parallel columns, one entry per candidate purchase
+    amounts: List[float] = Field(max_length=SMARTSPEND_MAX_BATCH)
+    categories: List[str] = Field(max_length=SMARTSPEND_MAX_BATCH)
+    user_id: Optional[str] = None
+    # Check the items as one cart, accumulating spend per category in order
+    cumulative: bool = False
+
+class BudgetLimitsRequest(BaseModel):
+    # {category: {"day" | "week" | "month": limit}}
+    limits: Dict[str, Dict[str, float]]
+
+class SimulationGoal(BaseModel):
+    name: str
+    # In today's dollars, due `month` months from now
+    amount: float
+    month: int
+
+class SimulateRequest(BaseModel):
+    # Omitted amounts fall back to the profile (see DEFAULT_PROFILE)
+    savings: Optional[float] = None
+    income: Optional[float] = None
+    expenses: Optional[float] = None
+    debt: Optional[float] = None
+    debt_rate: float = 0.20
+    debt_payment: float = 100.0
+    return_mean: float = 0.06
+    return_vol: float = 0.15
+    return_distribution: str = "normal"
+    return_df: float = 5.0
+    inflation_mean: float = 0.03
+    inflation_vol: float = 0.01
+    months: int = 360
+    paths: int = 10000
+    seed: Optional[int] = None
+    percentiles: List[float] = [5, 25, 50, 75, 95]
+    band_step: int = 12
+    goals: List[SimulationGoal] = []
 
 
-def _aggregate_category_totals(transactions):
-    category_totals = defaultdict(float)
-    for item in transactions:
-        category_totals[item.get("category", "Other")] += float(item.get("amount", 0))
-    # return top 5
-    return sorted(category_totals.items(), key=lambda x: x[1], reverse=True)[:5]
-
-
-def _build_summary_pdf(spending_data):
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=LETTER)
-    width, height = LETTER
-
-    # Header
-    c.setFillColor(colors.HexColor('#0f172a'))
-    c.setFont("Helvetica-Bold", 18)
-    c.drawString(1 * inch, height - 1 * inch, "FinTwin Spending Summary")
-    c.setFont("Helvetica", 10)
-    c.setFillColor(colors.gray)
-    c.drawString(1 * inch, height - 1.25 * inch, f"Generated: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}")
-
-    # Basic stats
-    total_amount = sum(item.get("amount", 0) for item in spending_data)
-    num_tx = len(spending_data)
-    avg_tx = total_amount / num_tx if num_tx else 0
-
-    c.setFillColor(colors.HexColor('#111827'))
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(1 * inch, height - 1.75 * inch, "At-a-glance")
-    c.setFont("Helvetica", 11)
-    c.drawString(1 * inch, height - 2.05 * inch, f"Total spend: ${total_amount:,.2f}")
-    c.drawString(1 * inch, height - 2.3 * inch, f"Transactions: {num_tx}")
-    c.drawString(1 * inch, height - 2.55 * inch, f"Average ticket: ${avg_tx:,.2f}")
-
-    # Category chart (simple bar chart)
-    top_cats = _aggregate_category_totals(spending_data)
-    if top_cats:
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(1 * inch, height - 3.1 * inch, "Top categories")
-        chart_x = 1 * inch
-        chart_y = height - 6 * inch
-        chart_width = 5 * inch
-        bar_height = 0.4 * inch
-        gap = 0.15 * inch
-        max_val = max(val for _, val in top_cats) or 1
-        for idx, (cat, val) in enumerate(top_cats):
-            y = chart_y - idx * (bar_height + gap)
-            bar_len = (val / max_val) * chart_width
-            c.setFillColor(colors.HexColor('#0f172a'))
-            c.roundRect(chart_x, y, bar_len, bar_height, 4, stroke=0, fill=1)
-            c.setFillColor(colors.white)
-            c.setFont("Helvetica-Bold", 9)
-            c.drawString(chart_x + 6, y + bar_height / 2 - 3, f"{cat}")
-            c.setFillColor(colors.HexColor('#0f172a'))
-            c.setFont("Helvetica", 9)
-            c.drawRightString(chart_x + chart_width + 0.75 * inch, y + bar_height / 2 - 3, f"${val:,.0f}")
-
-    # Footer note
-    c.setStrokeColor(colors.HexColor('#e5e7eb'))
-    c.line(1 * inch, 0.9 * inch, width - 1 * inch, 0.9 * inch)
-    c.setFont("Helvetica", 9)
-    c.setFillColor(colors.gray)
-    c.drawString(1 * inch, 0.7 * inch, "FinTwin • AI spending insight snapshot")
-
-    c.showPage()
-    c.save()
-    buffer.seek(0)
-    return buffer
-
 # Mock Raw Data
 RAW_SPENDING = [
     {"id": 1, "category": "Uncategorized", "amount": 25.50, "date": "2023-10-25", "merchant": "Burger King #123"},
@@ -141,64 +156,310 @@ RAW_SPENDING = [
 
 # Endpoints
 
-from services.transaction_service import TransactionService
+from services.transaction_service import TransactionService, DEFAULT_USER_ID
+from services.transaction_cache import TransactionCache
+
+DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+MONTH_PATTERN = r"^\d{4}-\d{2}$"
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Financial Digital Twin API (Powered by IBM Watsonx & AWS)"}
 
+async def _aiter(iterable):
+    # In-memory iterables (cached columns, a single page) need no executor hop
+    for item in iterable:
+        yield item
+
+# Query page size used when streaming a spending range
+SPENDING_PAGE_SIZE = 500
+SPENDING_FIELDS = tuple(SpendingItem.model_fields)
+# Responses are gzipped when the client accepts it; 0 turns compression off.
+# Level 1 gets most of the size reduction of level 6 for half the CPU.
+SPENDING_GZIP_LEVEL = int(os.getenv('SPENDING_GZIP_LEVEL', '1'))
+
+
+def _encode_rows(rows) -> bytes:
+    """Comma-separated JSON objects for a page of rows, encoded in one call."""
+    if orjson is not None:
+        return orjson.dumps(rows)[1:-1]
+    return json.dumps(rows, separators=(",", ":"))[1:-1].encode()
+
+
+async def _stream_json_array(pages, project: bool = True):
+    """
+    Serializes pages of transactions (an iterable or async iterable) into one
+    JSON array, a page at a time. Stored rows are projected onto the API
+    fields; rows from cached columns already have exactly those fields.
+    """
+    if not hasattr(pages, '__aiter__'):
+        pages = _aiter(pages)
+    yield b"["
+    first = True
+    async for page in pages:
+        if not page:
+            continue
+        # Rows are stored already normalized, so there is no per-row validation
+        if project:
+            page = [{k: item[k] for k in SPENDING_FIELDS if k in item} for item in page]
+        chunk = _encode_rows(page)
+        yield chunk if first else b"," + chunk
+        first = False
+    yield b"]"
+
+
+async def _gzip(chunks):
+    compressor = zlib.compressobj(SPENDING_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # Weak comparison: W/"x" and "x" are the same validator
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def _json_stream_response(pages, headers: Dict[str, str], accept_encoding: Optional[str],
+                          project: bool = True) -> StreamingResponse:
+    body = _stream_json_array(pages, project)
+    headers["Vary"] = "Accept-Encoding"
+    if SPENDING_GZIP_LEVEL and "gzip" in (accept_encoding or "").lower():
+        body = _gzip(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type="application/json", headers=headers)
+
+
 @app.get("/api/spending", response_model=List[SpendingItem])
-def get_spending():
-    # Fetch from Service (cleaned in real-time or stored cleaned)
-    # Ideally DataPrepService would wrap this, but for now direct is fine as data is clean-ish
-    raw_data = TransactionService.get_all_transactions()
-    cleaned_data = DataPrepService.clean_data(raw_data)
-    return cleaned_data
+async def get_spending(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    user_id: str = DEFAULT_USER_ID,
+    date_from: Optional[str] = Query(None, alias="from", pattern=DATE_PATTERN),
+    date_to: Optional[str] = Query(None, alias="to", pattern=DATE_PATTERN),
+    category: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    # Reads Query the user's own partition (or the category index), so cost
+    # scales with the requested window rather than the table.
+    # Without limit/cursor the whole range is streamed page by page, so memory
+    # stays flat. With them, one page is returned and the next page's cursor
+    # is sent in the X-Next-Cursor header.
+    # The ETag is the user's data version plus the query, taken before any
+    # read; a client holding it gets a 304 without touching DynamoDB.
+    # The pattern only checks the shape; reject dates that don't exist before any read
+    for name, value in (("from", date_from), ("to", date_to)):
+        if value is not None:
+            try:
+                date.fromisoformat(value)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid '{name}' date: {value}")
+
+    query = json.dumps([user_id, date_from, date_to, category, limit, cursor])
+    etag = f'W/"{TransactionService.data_version(user_id)}.{hashlib.sha1(query.encode()).hexdigest()[:12]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    if limit is None and cursor is None:
+        # Served from the cached columns when the user fits
+        columns = await TransactionService.aget_user_columns(user_id)
+        if columns is not None:
+            mask = columns.mask(date_from, date_to, category)
+            pages = columns.iter_record_chunks(mask, SPENDING_PAGE_SIZE)
+            return _json_stream_response(pages, headers, accept_encoding, project=False)
+
+        pages = TransactionService.aiter_user_transaction_pages(
+            user_id, date_from, date_to, category, page_size=SPENDING_PAGE_SIZE
+        )
+        return _json_stream_response(pages, headers, accept_encoding)
+
+    try:
+        items, next_cursor = await TransactionService.aget_user_transactions_page(
+            limit or SPENDING_PAGE_SIZE, cursor, user_id, date_from, date_to, category
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return _json_stream_response([items], headers, accept_encoding)
+
+
+@app.get("/api/aggregates")
+async def get_aggregates(
+    user_id: str = DEFAULT_USER_ID,
+    month_from: Optional[str] = Query(None, alias="from", pattern=MONTH_PATTERN),
+    month_to: Optional[str] = Query(None, alias="to", pattern=MONTH_PATTERN),
+):
+    """Monthly and category spending totals, served from the rollup buckets."""
+    return await RollupService.aget_aggregates(user_id, month_from, month_to)
 
 
 @app.get("/api/export-summary")
-def export_summary():
+async def export_summary(user_id: str = DEFAULT_USER_ID):
     """Generate a simple one-page PDF of spending stats and top categories."""
-    raw_data = TransactionService.get_all_transactions()
-    cleaned_data = DataPrepService.clean_data(raw_data)
-    pdf_buffer = _build_summary_pdf(cleaned_data)
-    pdf_bytes = pdf_buffer.getvalue()
+    pdf_bytes = await ReportService.asummary_pdf(user_id)
     headers = {"Content-Disposition": "attachment; filename=finTwin-summary.pdf"}
     return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
 
-@app.post("/api/chat", response_model=ChatResponse)
-def chat_genai(request: ChatRequest):
+@app.get("/api/export-report")
+async def export_report(user_id: str = DEFAULT_USER_ID):
+    """Multi-page PDF with a transaction table per month, streamed page by page."""
+    headers = {"Content-Disposition": "attachment; filename=finTwin-report.pdf"}
+    return StreamingResponse(ReportService.amonthly_report(user_id), media_type="application/pdf", headers=headers)
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _stream_chat(context: list, tokens):
+    """
+    SSE body for /api/chat: a `context` event with the retrieved passages,
+    `token` events carrying text deltas as they are generated, then `done`
+    with the full response text.
+    """
+    if not hasattr(tokens, '__aiter__'):
+        tokens = _aiter(tokens)
+    yield _sse("context", context)
+    parts = []
+    async for text in tokens:
+        parts.append(text)
+        yield _sse("token", {"text": text})
+    yield _sse("done", {"response": "".join(parts)})
+
+@app.post("/api/chat", response_model=ChatResponse, response_model_exclude_none=True)
+async def chat_genai(request: ChatRequest, accept: Optional[str] = Header(None)):
+    stream = request.stream or "text/event-stream" in (accept or "")
+
     # 0. Transaction Extraction Layer
-    new_tx = TransactionService.extract_from_message(request.message)
+    with span("extract"):
+        new_tx = await TransactionService.aextract_from_message(request.message, request.user_id or DEFAULT_USER_ID)
     
     if new_tx:
         response_text = f"✅ Recorded transaction: ${new_tx['amount']} for {new_tx['category']} at {new_tx['merchant']}."
         context = [] # Clean response, no JSON dumping
+        if stream:
+            return StreamingResponse(_stream_chat(context, [response_text]), media_type="text/event-stream")
         return {"response": response_text, "context": context}
 
     # 1. RAG Retrieval Layer
 
-    context = RAGService.retrieve_context(request.message)
+    with span("retrieve"):
+        # BM25 and vector search are CPU-bound; keep them off the event loop
+        ranked = await run_in_threadpool(RAGService.retrieve_ranked, request.message)
+    context = [result['text'] for result in ranked] or [RAGService.FALLBACK]
     
     # 2. Agentic Module Execution
-    response_text = AgentOrchestrator.process_request(request.message, context)
+    if stream:
+        tokens = AgentOrchestrator.astream_request(request.message, ranked or context, use_cache=not request.fresh)
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        return StreamingResponse(_stream_chat(context, tokens), media_type="text/event-stream", headers=headers)
+
+    # Every agent the message needs runs concurrently under its own deadline
+    with span("agents"):
+        result = await AgentOrchestrator.afan_out(request.message, ranked or context, use_cache=not request.fresh,
+                                                  debug=request.debug)
     
-    return {"response": response_text, "context": context}
+    return {**result, "context": context}
+
+@app.post("/api/import")
+async def import_transactions(request: Request, format: str = "csv", user_id: str = DEFAULT_USER_ID,
+                              job_id: Optional[str] = None, offset: int = 0, debits_positive: bool = False):
+    """
+    Imports a CSV or OFX bank export sent as the raw request body, parsed as
+    it streams in. Pick a job_id up front to be able to resume: after an
+    interruption, GET the job and POST the rest of the file from its offset.
+    """
+    try:
+        job = ImportService.get_job(job_id) if job_id else None
+        if job is None:
+            if offset:
+                raise HTTPException(status_code=404, detail=f"Import {job_id} not found")
+            job = ImportService.create_job(user_id, format, job_id, debits_positive)
+        length = request.headers.get("content-length")
+        return await ImportService.aimport_stream(job.job_id, request.stream(), offset,
+                                                  int(length) if length else None)
+    except ImportOffsetError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "expected_offset": e.expected_offset})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/import/{job_id}")
+async def get_import(job_id: str):
+    job = ImportService.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Import {job_id} not found")
+    return job.to_dict()
+
+@app.get("/api/cache-stats")
+async def get_cache_stats():
+    return {"bedrock": BedrockService.cache.stats(), "reports": ReportService.cache.stats(),
+            "single_flight": SingleFlight.all_stats()}
+
+@registry.collector
+def _cache_metrics():
+    caches = {"bedrock": BedrockService.cache.stats(), "reports": ReportService.cache.stats(),
+              "transactions": {"hits": TransactionCache.hits, "misses": TransactionCache.misses}}
+    yield ("fintwin_cache_hits_total", "counter", "Cache lookups answered from the cache.",
+           [({"cache": name}, stats["hits"] + stats.get("disk_hits", 0)) for name, stats in caches.items()])
+    yield ("fintwin_cache_misses_total", "counter", "Cache lookups that missed.",
+           [({"cache": name}, stats["misses"]) for name, stats in caches.items()])
+    flights = SingleFlight.all_stats()
+    yield ("fintwin_single_flight_coalesced_total", "counter", "Calls that shared an in-flight execution.",
+           [({"flight": name}, stats["coalesced"]) for name, stats in flights.items()])
+
+@app.get("/metrics")
+@app.get("/api/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text format; /api/metrics is the same under the deployment's /api rewrite."""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.post("/api/smartspend")
-def check_smartspend(request: SmartSpendRequest):
-    # SmartSpend Real-Time Engine
-    return SmartSpendEngine.check_spending(request.amount, request.category)
+async def check_smartspend(request: SmartSpendRequest):
+    # SmartSpend Real-Time Engine: checks against what the user has already spent
+    return await SmartSpendEngine.acheck_spending(request.amount, request.category,
+                                                  request.user_id or DEFAULT_USER_ID)
+
+@app.post("/api/smartspend/batch")
+async def check_smartspend_batch(request: SmartSpendBatchRequest):
+    try:
+        return await SmartSpendEngine.acheck_spending_batch(request.amounts, request.categories,
+                                                            request.user_id or DEFAULT_USER_ID, request.cumulative)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/budgets")
+async def get_budgets(user_id: str = DEFAULT_USER_ID):
+    return await run_blocking(BudgetService.status, user_id)
+
+@app.put("/api/budgets/limits")
+async def set_budget_limits(request: BudgetLimitsRequest, user_id: str = DEFAULT_USER_ID):
+    try:
+        return {"limits": await run_blocking(BudgetService.set_limits, user_id, request.limits)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/api/profile")
-def get_profile():
-    return {
-        "name": "Jane Doe",
-        "income": 5000,
-        "savings": 12000,
-        "debt": 500,
-        "goals": ["Buy a Car", "Europe Trip"]
-    }
+async def get_profile():
+    return DEFAULT_PROFILE
+
+@app.post("/api/simulate")
+async def simulate(request: SimulateRequest):
+    """Monte Carlo projection of savings, debt and goals, as percentile bands per reported month."""
+    try:
+        params = SimulationParams(**request.model_dump(exclude_none=True))
+    except SimulationTooLargeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # CPU-bound NumPy work; keep it off the event loop
+    return await run_in_threadpool(MonteCarloEngine.run, params)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,116 @@
+"""
+Re-normalizes stored transactions whose rules_version differs from the
+current merchant rules (data/merchant_rules.json), then rebuilds the rollups
+and budget counters of every user whose rows changed.
+
+The table is scanned as parallel segments. After each page, every segment's
+scan cursor is checkpointed to a state file, so an interrupted run resumes
+where it stopped. Changing the rules version starts a fresh pass.
+
+Usage (from backend/):
+    python -m scripts.backfill_normalization --state backfill_state.json
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.db_service import DynamoDBService
+from services.data_prep_service import DataPrepService
+from services.rollup_service import RollupService
+from services.budget_service import BudgetService
+
+
+class BackfillState:
+    """Per-segment scan cursors and counters, persisted after every page."""
+
+    def __init__(self, path: str, rules_version: str, total_segments: int):
+        self.path = path
+        self.lock = threading.Lock()
+        state = None
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+        if (not state or state.get('rules_version') != rules_version
+                or state.get('total_segments') != total_segments):
+            state = {
+                'rules_version': rules_version,
+                'total_segments': total_segments,
+                'segments': {str(s): {'cursor': None, 'done': False, 'scanned': 0, 'updated': 0}
+                             for s in range(total_segments)},
+                'users': [],
+            }
+        self.state = state
+
+    def segment(self, segment: int) -> dict:
+        return self.state['segments'][str(segment)]
+
+    def checkpoint(self, segment: int, cursor, scanned: int, updated: int, users):
+        with self.lock:
+            progress = self.segment(segment)
+            progress['cursor'] = DynamoDBService.encode_cursor(cursor) if cursor else None
+            progress['done'] = cursor is None
+            progress['scanned'] += scanned
+            progress['updated'] += updated
+            self.state['users'] = sorted(set(self.state['users']) | set(users))
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.state, f)
+            os.replace(tmp_path, self.path)
+
+
+def backfill_segment(state: BackfillState, segment: int):
+    progress = state.segment(segment)
+    if progress['done']:
+        return
+    start_key = DynamoDBService.decode_cursor(progress['cursor']) if progress['cursor'] else None
+    table = DynamoDBService.get_thread_table()
+    pages = DynamoDBService.iter_transaction_pages(start_key=start_key, segment=segment,
+                                                   total_segments=state.state['total_segments'], table=table)
+    for items, last_key in pages:
+        stale = [DataPrepService.canonicalize(item) for item in items if DataPrepService.is_stale(item)]
+        if stale:
+            DynamoDBService.batch_add_transactions(stale, table=table)
+        state.checkpoint(segment, last_key, len(items), len(stale), {item['user_id'] for item in stale})
+
+
+def backfill(state_path: str, total_segments: int, rebuild_rollups: bool = True) -> dict:
+    state = BackfillState(state_path, DataPrepService.rules().version, total_segments)
+    with ThreadPoolExecutor(max_workers=min(total_segments, DynamoDBService.SCAN_MAX_WORKERS)) as executor:
+        list(executor.map(lambda segment: backfill_segment(state, segment), range(total_segments)))
+
+    if rebuild_rollups:
+        # Canonical categories may have moved rows between rollup buckets and budget counters
+        for user_id in state.state['users']:
+            RollupService.rebuild(user_id)
+            BudgetService.rebuild(user_id)
+    segments = state.state['segments'].values()
+    summary = {
+        'rules_version': state.state['rules_version'],
+        'scanned': sum(s['scanned'] for s in segments),
+        'updated': sum(s['updated'] for s in segments),
+        'users': len(state.state['users']),
+    }
+    print(f"Backfill complete: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--state", default="backfill_state.json", help="checkpoint file for resuming")
+    parser.add_argument("--segments", type=int, default=DynamoDBService.SCAN_SEGMENTS)
+    parser.add_argument("--skip-rollups", action="store_true", help="do not rebuild affected users' rollups and budget counters")
+    args = parser.parse_args()
+    backfill(args.state, args.segments, rebuild_rollups=not args.skip_rollups)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Builds the BM25 retrieval index and the dense-vector store from the knowledge
+corpus (data/knowledge/*.txt) and writes them to data/knowledge_index/ so the
+API can memory-map them on cold start. Run it at deploy time or after editing
+the corpus.
+
+Usage (from backend/):
+    python -m scripts.build_rag_index
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.rag_service import RAGService
+
+
+def main():
+    start = time.perf_counter()
+    index = RAGService.build_index()
+    elapsed = time.perf_counter() - start
+    print(f"Indexed {len(index)} passages ({len(index.vocab)} terms, {RAGService.embedder.dim}-dim vectors) "
+          f"into {RAGService.INDEX_DIR} in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Imports a CSV or OFX bank export from a local file, in batches, with the
+same pipeline as POST /api/import. Re-running with the same --job resumes
+after the last committed batch.
+
+Usage (from backend/):
+    python -m scripts.import_transactions export.csv --user demo-user --job march-2024
+    python -m scripts.import_transactions statement.ofx --format ofx
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.import_service import ImportService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--user", default=os.getenv('DEFAULT_USER_ID', 'demo-user'))
+    parser.add_argument("--format", choices=ImportService.FORMATS,
+                        help="defaults to the file extension")
+    parser.add_argument("--job", help="job id; reuse it to resume an interrupted import")
+    parser.add_argument("--debits-positive", action="store_true",
+                        help="the export lists purchases as positive amounts (typical of card statements)")
+    args = parser.parse_args()
+
+    fmt = args.format or os.path.splitext(args.path)[1].lstrip(".").lower()
+    job = ImportService.get_job(args.job) if args.job else None
+    if job is None:
+        job = ImportService.create_job(args.user, fmt, args.job, args.debits_positive)
+    elif job.offset:
+        print(f"Resuming {job.job_id} at byte {job.offset}")
+
+    start = time.perf_counter()
+    result = ImportService.import_file(args.path, job.job_id)
+    print(f"Job {result['job_id']}: {result['rows_read']} rows, {result['written']} written, "
+          f"{result['duplicates']} duplicates, {result['skipped']} skipped, {result['errors']} errors "
+          f"in {time.perf_counter() - start:.1f}s")
+    for sample in result["error_samples"]:
+        print(f"  byte {sample['offset']}: {sample['error']}")
+
+
+if __name__ == "__main__":
+    main()
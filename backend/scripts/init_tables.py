@@ -0,0 +1,30 @@
+"""
+Creates the tables and indexes the API uses in the configured storage
+backend (STORAGE_BACKEND), if they do not exist, and waits until they are
+active. Run it once per deploy (or environment)
+instead of at server startup, so serverless cold starts never provision
+tables.
+
+Usage (from backend/):
+    python -m scripts.init_tables
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.storage import get_store
+
+
+def main():
+    store = get_store()
+    store.init_table()
+    print(f"Tables ready ({store.describe()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Copies transactions from the legacy id-keyed FinancialTransactions table into
+the per-user UserTransactions table (user_id + date_id keys, category index).
+
+The legacy table is read with a parallel scan and written with batch_writer.
+Rows keep their id, so re-running the script overwrites rather than
+duplicates, which makes an interrupted migration safe to restart.
+
+Usage (from backend/):
+    python -m scripts.migrate_user_partition --user-id demo-user
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.db_service import DynamoDBService
+from services.transaction_service import DEFAULT_USER_ID
+
+REQUIRED_FIELDS = ("id", "date", "category")
+
+
+def migrate(user_id: str, segments: int, dry_run: bool = False):
+    DynamoDBService.init_table()
+    copied = skipped = 0
+    pages = DynamoDBService.iter_parallel_pages(segments, table_name=DynamoDBService.LEGACY_TABLE_NAME)
+    for page in pages:
+        batch = []
+        for item in page:
+            if any(field not in item for field in REQUIRED_FIELDS):
+                print(f"Skipping malformed row: {item}")
+                skipped += 1
+                continue
+            item.setdefault("user_id", user_id)
+            batch.append(item)
+        if not dry_run:
+            DynamoDBService.batch_add_transactions(batch)
+        copied += len(batch)
+        print(f"Copied {copied} rows ({skipped} skipped)...")
+    print(f"Done: {copied} rows {'would be ' if dry_run else ''}copied, {skipped} skipped.")
+    return copied, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", default=DEFAULT_USER_ID, help="owner for rows without a user_id")
+    parser.add_argument("--segments", type=int, default=DynamoDBService.SCAN_SEGMENTS)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    migrate(args.user_id, args.segments, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Recomputes the SpendingRollups buckets from raw transactions, replacing
+whatever the write path accumulated. Run it after bulk data fixes or whenever
+rollups are suspected to have drifted.
+
+Usage (from backend/):
+    python -m scripts.rebuild_rollups --user-id demo-user
+    python -m scripts.rebuild_rollups --all
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.db_service import DynamoDBService
+from services.rollup_service import RollupService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--user-id", help="rebuild one user's rollups from their partition")
+    target.add_argument("--all", action="store_true", help="rebuild every user's rollups via a parallel scan")
+    parser.add_argument("--segments", type=int, default=DynamoDBService.SCAN_SEGMENTS)
+    args = parser.parse_args()
+
+    written = RollupService.rebuild(args.user_id, args.segments)
+    for user_id, count in sorted(written.items()):
+        print(f"{user_id}: {count} buckets")
+    print(f"Rebuilt rollups for {len(written)} user(s).")
+
+
+if __name__ == "__main__":
+    main()
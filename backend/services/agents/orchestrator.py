@@ -1,45 +1,219 @@
+import os
+import re
+import time
+import asyncio
+import logging
+from functools import lru_cache
+
+from starlette.concurrency import run_in_threadpool
+
 from services.bedrock_service import BedrockService
 from services.rag_service import RAGService
+from services.simulation_service import MonteCarloEngine, SimulationParams
+from services.tracing import span
+
+logger = logging.getLogger(__name__)
 
 class AgentOrchestrator:
     """
     Coordinates the multiple intelligent agents (Scenario, Simulation, Risk, Advisor)
     as defined in the Agentic AI Architecture.
     """
-    
+    # Keywords that call in each agent, in precedence order for single-agent routing
+    INTENT_KEYWORDS = {
+        "risk_assessment": ("risk",),
+        "scenario_simulation": ("simulate", "what if"),
+        "general_advice": ("should", "advice", "recommend", "how can", "how do"),
+    }
+    SECTION_TITLES = {
+        "risk_assessment": "Risk Assessment",
+        "scenario_simulation": "Scenario Simulation",
+        "general_advice": "Advice",
+    }
+    # Seconds each agent may take in fan-out mode; DEADLINES overrides per intent
+    DEFAULT_DEADLINE_SECONDS = float(os.getenv('AGENT_DEADLINE_SECONDS', '20'))
+    DEADLINES = {}
+    TIMEOUT_MESSAGE = "Our advisors are taking longer than usual. Please try again in a moment."
+
     @staticmethod
-    def process_request(user_input: str, context: list = None):
+    def detect_intents(user_input: str) -> list:
         # 1. Intent Recognition (using Bedrock)
         # Simple heuristic for now, could be LLM based
-        intent = "general_advice"
-        if "risk" in user_input.lower():
-            intent = "risk_assessment"
-        elif "simulate" in user_input.lower() or "what if" in user_input.lower():
-            intent = "scenario_simulation"
-            
+        text = user_input.lower()
+        intents = [intent for intent, words in AgentOrchestrator.INTENT_KEYWORDS.items()
+                   if any(word in text for word in words)]
+        return intents or ["general_advice"]
+
+    @staticmethod
+    def detect_intent(user_input: str) -> str:
+        return AgentOrchestrator.detect_intents(user_input)[0]
+
+    @staticmethod
+    def build_prompt(user_input: str, context: list = None, intent: str = None) -> str:
         # 2. Routing to Agents
+        intent = intent or AgentOrchestrator.detect_intent(user_input)
         if intent == "risk_assessment":
-            return RiskAgent.analyze(user_input)
+            return RiskAgent.prompt(user_input)
         elif intent == "scenario_simulation":
-            return SimulationAgent.run_simulation(user_input)
+            return SimulationAgent.prompt(user_input)
         else:
-            return AdvisorAgent.provide_advice(user_input, context)
+            return AdvisorAgent.prompt(user_input, context)
+
+    @staticmethod
+    async def abuild_prompt(user_input: str, context: list = None, intent: str = None) -> str:
+        intent = intent or AgentOrchestrator.detect_intent(user_input)
+        if intent == "scenario_simulation":
+            # The Monte Carlo run is CPU-bound NumPy work; keep it off the event loop
+            return await run_in_threadpool(SimulationAgent.prompt, user_input)
+        return AgentOrchestrator.build_prompt(user_input, context, intent)
+
+    @staticmethod
+    async def _run_agent(intent: str, prompt: str, deadline: float, use_cache: bool) -> dict:
+        start = time.perf_counter()
+        result = {"agent": intent}
+        try:
+            with span(f"agent.{intent}"):
+                # A failed call raises, so its error text never reaches the merged answer
+                result["response"] = await asyncio.wait_for(
+                    BedrockService.agenerate_response(prompt, use_cache, raise_errors=True), deadline)
+            result["status"] = "ok"
+        except asyncio.TimeoutError:
+            # The shared Bedrock call keeps running and still fills the response cache
+            logger.warning(f"Agent {intent} missed its {deadline}s deadline")
+            result["status"] = "timeout"
+        except Exception as e:
+            logger.error(f"Agent {intent} failed: {e}")
+            result["status"] = "error"
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    @staticmethod
+    def merge_results(results: list) -> str:
+        """One answer from the agents that finished: a single agent's text as is, several as titled sections."""
+        answered = [r for r in results if r["status"] == "ok"]
+        if not answered:
+            return AgentOrchestrator.TIMEOUT_MESSAGE
+        if len(results) == 1:
+            return answered[0]["response"]
+        sections = [f"**{AgentOrchestrator.SECTION_TITLES[r['agent']]}**\n\n{r['response']}" for r in answered]
+        missing = [AgentOrchestrator.SECTION_TITLES[r["agent"]] for r in results if r["status"] != "ok"]
+        if missing:
+            sections.append(f"_{', '.join(missing)} unavailable right now._")
+        return "\n\n".join(sections)
+
+    @staticmethod
+    async def afan_out(user_input: str, context: list = None, use_cache: bool = True,
+                       debug: bool = False) -> dict:
+        """
+        Runs every agent the message calls for concurrently, each under its own
+        deadline, and merges whatever finished in time. Returns {"response"}
+        plus, in debug mode, {"agents": [{agent, status, latency_ms}]}.
+        """
+        start = time.perf_counter()
+        with span("route"):
+            intents = AgentOrchestrator.detect_intents(user_input)
+            prompts = await asyncio.gather(*(AgentOrchestrator.abuild_prompt(user_input, context, intent)
+                                             for intent in intents))
+        results = await asyncio.gather(*(
+            AgentOrchestrator._run_agent(
+                intent,
+                prompt,
+                AgentOrchestrator.DEADLINES.get(intent, AgentOrchestrator.DEFAULT_DEADLINE_SECONDS),
+                use_cache,
+            )
+            for intent, prompt in zip(intents, prompts)
+        ))
+        output = {"response": AgentOrchestrator.merge_results(results)}
+        if debug:
+            output["agents"] = [{k: r[k] for k in ("agent", "status", "latency_ms")} for r in results]
+            output["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return output
+
+    @staticmethod
+    def process_request(user_input: str, context: list = None, use_cache: bool = True):
+        return BedrockService.generate_response(AgentOrchestrator.build_prompt(user_input, context), use_cache)
+
+    @staticmethod
+    def stream_request(user_input: str, context: list = None, use_cache: bool = True):
+        """Same routing as process_request, yielding the answer as it is generated."""
+        return BedrockService.stream_response(AgentOrchestrator.build_prompt(user_input, context), use_cache)
+
+    @staticmethod
+    async def aprocess_request(user_input: str, context: list = None, use_cache: bool = True):
+        prompt = await AgentOrchestrator.abuild_prompt(user_input, context)
+        return await BedrockService.agenerate_response(prompt, use_cache)
+
+    @staticmethod
+    async def astream_request(user_input: str, context: list = None, use_cache: bool = True):
+        with span("route"):
+            prompt = await AgentOrchestrator.abuild_prompt(user_input, context)
+        tokens = BedrockService.astream_response(prompt, use_cache)
+        try:
+            async for token in tokens:
+                yield token
+        finally:
+            await tokens.aclose()
 
 class RiskAgent:
     @staticmethod
-    def analyze(query: str):
+    def prompt(query: str) -> str:
         # Specific logic for risk
-        return BedrockService.generate_response(f"Analyze risk for request: {query}")
+        return f"Analyze risk for request: {query}"
+
+    @staticmethod
+    def analyze(query: str, use_cache: bool = True):
+        return BedrockService.generate_response(RiskAgent.prompt(query), use_cache)
 
 class SimulationAgent:
+    # A fixed seed and path count keep the numbers, and so the prompt, stable
+    # across requests, which lets the Bedrock response cache serve repeats
+    PATHS = 5000
+    SEED = 42
+    DEFAULT_YEARS = 30
+
+    @staticmethod
+    def horizon_years(query: str) -> int:
+        match = re.search(r"(\d{1,3})\s*(?:years?|yrs?)", query, re.IGNORECASE)
+        years = int(match.group(1)) if match else SimulationAgent.DEFAULT_YEARS
+        return min(max(years, 1), SimulationParams.MAX_MONTHS // 12)
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def projection(years: int) -> str:
+        result = MonteCarloEngine.run(SimulationParams(months=years * 12, paths=SimulationAgent.PATHS,
+                                                       seed=SimulationAgent.SEED))
+        return MonteCarloEngine.summarize(result)
+
+    @staticmethod
+    def prompt(query: str) -> str:
+        # The engine produces the numbers; the model only explains them
+        summary = SimulationAgent.projection(SimulationAgent.horizon_years(query))
+        return (f"Monte Carlo projection for the user's current profile:\n{summary}\n"
+                f"User Query: {query}. Explain what these results mean for the user in a concise outcome. "
+                f"Use only the numbers above; do not invent figures.")
+
     @staticmethod
-    def run_simulation(query: str):
-        # Specific logic for simulation (Monte Carlo mock)
-        return BedrockService.generate_response(f"Simulate scenario: {query}. Provide a concise outcome.")
+    def run_simulation(query: str, use_cache: bool = True):
+        return BedrockService.generate_response(SimulationAgent.prompt(query), use_cache)
 
 class AdvisorAgent:
     @staticmethod
-    def provide_advice(query: str, context: list):
-        # General advice combining RAG context
-        context_str = " ".join(context) if context else ""
-        return BedrockService.generate_response(f"Context: {context_str}. User Query: {query}. Provide helpful financial advice. Structure your response with bold headings and subheadings to organize the information effectively.")
+    def format_context(context: list) -> str:
+        """Numbers ranked RAG results (dicts from RAGService.retrieve_ranked) or plain passages, best first."""
+        lines = []
+        for rank, item in enumerate(context or [], 1):
+            if isinstance(item, dict):
+                lines.append(f"[{rank}] {item['text']}")
+            else:
+                lines.append(f"[{rank}] {item}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def prompt(query: str, context: list) -> str:
+        # General advice grounded in the ranked RAG passages, most relevant first
+        context_str = AdvisorAgent.format_context(context)
+        return f"Context (most relevant first):\n{context_str}\nUser Query: {query}. Provide helpful financial advice. Structure your response with bold headings and subheadings to organize the information effectively."
+
+    @staticmethod
+    def provide_advice(query: str, context: list, use_cache: bool = True):
+        return BedrockService.generate_response(AdvisorAgent.prompt(query, context), use_cache)
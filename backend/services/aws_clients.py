@@ -0,0 +1,95 @@
+"""
+Shared connection settings for the boto3 clients, and the thread pool that
+async handlers use to run blocking AWS calls.
+
+botocore has no native asyncio support, so async service methods hand the
+blocking call to AWS_EXECUTOR. The executor has one thread per pooled HTTP
+connection: more threads would only queue for a connection, fewer would
+leave connections idle. Sizing both from AWS_MAX_POOL_CONNECTIONS makes the
+number of in-flight AWS calls explicit instead of being capped by the web
+server's generic threadpool.
+
+botocore itself is imported on first use: it accounts for a large share of
+a cold start, and many requests never reach AWS.
+"""
+import os
+import asyncio
+import functools
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterable
+
+MAX_POOL_CONNECTIONS = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '64'))
+CONNECT_TIMEOUT = float(os.getenv('AWS_CONNECT_TIMEOUT', '5'))
+# Model generations take far longer than key-value reads
+READ_TIMEOUTS = {
+    'dynamodb': float(os.getenv('DYNAMODB_READ_TIMEOUT', '10')),
+    'bedrock-runtime': float(os.getenv('BEDROCK_READ_TIMEOUT', '120')),
+}
+MAX_ATTEMPTS = int(os.getenv('AWS_MAX_ATTEMPTS', '4'))
+RETRY_MODE = os.getenv('AWS_RETRY_MODE', 'adaptive')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def client_config(service: str):
+    """botocore Config with the shared pool size, per-service timeouts and retry policy."""
+    from botocore.config import Config
+    return Config(
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUTS.get(service, 60),
+        retries={'max_attempts': MAX_ATTEMPTS, 'mode': RETRY_MODE},
+    )
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_POOL_CONNECTIONS, thread_name_prefix='aws')
+    return _executor
+
+
+async def run_blocking(fn: Callable, *args, **kwargs):
+    """
+    Runs a blocking AWS call on the AWS executor without blocking the event
+    loop. The call sees the caller's context variables (the request trace).
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(context.run, fn, *args, **kwargs))
+
+
+_DONE = object()
+
+
+async def iterate_blocking(iterable: Iterable) -> AsyncIterator:
+    """
+    Async iterator over a blocking iterator (a paginated query, a response
+    stream), fetching each item on the AWS executor.
+    """
+    iterator = iter(iterable)
+    in_flight = None
+    try:
+        while True:
+            context = contextvars.copy_context()
+            in_flight = get_executor().submit(context.run, next, iterator, _DONE)
+            item = await asyncio.wrap_future(in_flight)
+            in_flight = None
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        # Release the underlying stream if the consumer stops early
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            if in_flight is not None:
+                # Cancelled while next() runs on the executor: closing now would
+                # raise "generator already executing", so close once it returns
+                in_flight.add_done_callback(lambda _: close())
+            else:
+                close()
@@ -1,22 +1,46 @@
-import boto3
 import json
 import os
 import logging
+from typing import AsyncIterator, Iterator
+
+from services.aws_clients import client_config, iterate_blocking, run_blocking
+from services.response_cache import ResponseCache, cache_key
+from services.single_flight import SingleFlight
+from services import tracing
 
 logger = logging.getLogger(__name__)
 
+
+class BedrockError(Exception):
+    """A model invocation failed (AWS error, timeout or malformed response)."""
+
+
 class BedrockService:
     _client = None
 
+    CACHE_ENABLED = os.getenv('BEDROCK_CACHE_ENABLED', '1') == '1'
+    # BEDROCK_CACHE_PATH (a SQLite file) keeps cached responses across restarts
+    cache = ResponseCache(
+        ttl_seconds=float(os.getenv('BEDROCK_CACHE_TTL_SECONDS', '3600')),
+        max_entries=int(os.getenv('BEDROCK_CACHE_MAX_ENTRIES', '1024')),
+        max_bytes=int(os.getenv('BEDROCK_CACHE_MAX_BYTES', str(8 * 1024 * 1024))),
+        path=os.getenv('BEDROCK_CACHE_PATH') or None,
+    )
+    # Identical prompts in flight at the same time share one invocation
+    flight = SingleFlight("bedrock")
+
     @classmethod
     def get_client(cls):
         if cls._client is None:
+            import boto3
             cls._client = boto3.client(
                 'bedrock-runtime',
                 region_name=os.getenv('AWS_DEFAULT_REGION', 'us-east-1'),
                 aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-                aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
+                aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+                config=client_config('bedrock-runtime')
             )
+            tracing.instrument_client(cls._client)
             
             # Check if credentials are loaded
             if not os.getenv('AWS_ACCESS_KEY_ID') or not os.getenv('AWS_SECRET_ACCESS_KEY'):
@@ -32,70 +56,194 @@ class BedrockService:
         return cls._client
 
     @staticmethod
-    def generate_response(prompt: str) -> str:
-        """
-        Generates a response from AWS Bedrock using Amazon Titan or Nova models.
-        """
-        model_id = os.getenv('BEDROCK_MODEL_ID', 'amazon.nova-pro-v1:0')
-        
-        # Construct the payload based on the model family
-        # Valid models: amazon.nova-pro-v1:0, amazon.titan-tg1-large, etc.
+    def inference_config(model_id: str) -> dict:
+        if "nova" in model_id:
+            return {"max_new_tokens": 1000}
+        return {"maxTokenCount": 512, "temperature": 0.7, "topP": 0.9}
+
+    @staticmethod
+    def request_body(model_id: str, prompt: str, config: dict) -> dict:
+        if "nova" in model_id:
+            # Amazon Nova format
+            # https://docs.aws.amazon.com/bedrock/latest/userguide/model-parameters-nova.html
+            return {
+                "inferenceConfig": config,
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": [
+                            {"text": prompt}
+                        ]
+                    }
+                ]
+            }
+        # Amazon Titan Text format 
+        # https://docs.aws.amazon.com/bedrock/latest/userguide/model-parameters-titan-text.html
+        return {
+            "inputText": prompt,
+            "textGenerationConfig": config
+        }
+
+    @staticmethod
+    def token_usage(payload: dict) -> tuple:
+        """(input, output) token counts from a Nova or Titan response body or stream event, None if absent."""
+        metrics = payload.get("amazon-bedrock-invocationMetrics")
+        if metrics:
+            return metrics.get("inputTokenCount"), metrics.get("outputTokenCount")
+        # Nova: "usage" on the response, or on the stream's final metadata event
+        usage = payload.get("usage") or payload.get("metadata", {}).get("usage")
+        if usage:
+            return usage.get("inputTokens"), usage.get("outputTokens")
+        if "inputTextTokenCount" in payload:
+            return payload["inputTextTokenCount"], sum(r.get("tokenCount", 0) for r in payload.get("results", []))
+        return None, None
+
+    @staticmethod
+    def _invoke(model_id: str, prompt: str, config: dict) -> str:
+        response = BedrockService.get_client().invoke_model(
+            body=json.dumps(BedrockService.request_body(model_id, prompt, config)),
+            modelId=model_id,
+            accept="application/json",
+            contentType="application/json"
+        )
         
-        try:
-            client = BedrockService.get_client()
+        response_body = json.loads(response.get("body").read())
+        tracing.record_tokens(model_id, *BedrockService.token_usage(response_body))
+        if "nova" in model_id:
+            return response_body.get("output", {}).get("message", {}).get("content", [])[0].get("text")
+        return response_body.get("results")[0].get("outputText")
+
+    @staticmethod
+    def _invoke_stream(model_id: str, prompt: str, config: dict) -> Iterator[str]:
+        """Yields text deltas from invoke_model_with_response_stream as they arrive."""
+        response = BedrockService.get_client().invoke_model_with_response_stream(
+            body=json.dumps(BedrockService.request_body(model_id, prompt, config)),
+            modelId=model_id,
+            accept="application/json",
+            contentType="application/json"
+        )
+        for event in response.get("body"):
+            chunk = event.get("chunk")
+            if not chunk:
+                continue
+            payload = json.loads(chunk.get("bytes"))
+            # The last event carries the token counts for the whole stream
+            if "amazon-bedrock-invocationMetrics" in payload or "metadata" in payload:
+                tracing.record_tokens(model_id, *BedrockService.token_usage(payload))
             if "nova" in model_id:
-                # Amazon Nova format
-                # https://docs.aws.amazon.com/bedrock/latest/userguide/model-parameters-nova.html
-                body = {
-                    "inferenceConfig": {
-                        "max_new_tokens": 1000
-                    },
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": [
-                                {"text": prompt}
-                            ]
-                        }
-                    ]
-                }
-                
-                response = client.invoke_model(
-                    body=json.dumps(body),
-                    modelId=model_id,
-                    accept="application/json",
-                    contentType="application/json"
-                )
-                
-                response_body = json.loads(response.get("body").read())
-                output_text = response_body.get("output", {}).get("message", {}).get("content", [])[0].get("text")
-                return output_text
-                
+                # Nova streams messageStart, contentBlockDelta..., messageStop and metadata events
+                text = payload.get("contentBlockDelta", {}).get("delta", {}).get("text")
             else:
-                # Amazon Titan Text format 
-                # https://docs.aws.amazon.com/bedrock/latest/userguide/model-parameters-titan-text.html
-                body = {
-                    "inputText": prompt,
-                    "textGenerationConfig": {
-                        "maxTokenCount": 512,
-                        "temperature": 0.7,
-                        "topP": 0.9
-                    }
-                }
-                
-                response = client.invoke_model(
-                    body=json.dumps(body),
-                    modelId=model_id,
-                    accept="application/json",
-                    contentType="application/json"
-                )
-                
-                response_body = json.loads(response.get("body").read())
-                return response_body.get("results")[0].get("outputText")
-                
+                text = payload.get("outputText")
+            if text:
+                yield text
+
+    @staticmethod
+    def _request(prompt: str):
+        """(model_id, inference config, cache/coalescing key) for a prompt."""
+        model_id = os.getenv('BEDROCK_MODEL_ID', 'amazon.nova-pro-v1:0')
+        # Valid models: amazon.nova-pro-v1:0, amazon.titan-tg1-large, etc.
+        config = BedrockService.inference_config(model_id)
+        return model_id, config, cache_key(model_id, prompt, config)
+
+    @staticmethod
+    def _cached(key: str, use_cache: bool):
+        if use_cache and BedrockService.CACHE_ENABLED:
+            return BedrockService.cache.get(key)
+        return None
+
+    @staticmethod
+    async def _acached(key: str, use_cache: bool):
+        if use_cache and BedrockService.CACHE_ENABLED:
+            return await BedrockService.cache.aget(key)
+        return None
+
+    @staticmethod
+    def _generate(model_id: str, prompt: str, config: dict, key: str) -> str:
+        """Invokes the model and caches the answer. Raises BedrockError."""
+        try:
+            output_text = BedrockService._invoke(model_id, prompt, config)
         except Exception as e:
             logger.error(f"Error invoking Bedrock: {e}")
-            return f"Error connecting to AWS Bedrock: {str(e)}"
+            raise BedrockError(str(e)) from e
+
+        # Errors are never cached, so a transient failure is retried next time
+        if output_text is not None and BedrockService.CACHE_ENABLED:
+            BedrockService.cache.put(key, output_text)
+        return output_text
+
+    @staticmethod
+    def error_message(error: Exception) -> str:
+        return f"Error connecting to AWS Bedrock: {str(error)}"
+
+    @staticmethod
+    def generate_response(prompt: str, use_cache: bool = True, raise_errors: bool = False) -> str:
+        """
+        Generates a response from AWS Bedrock using Amazon Titan or Nova models.
+        Identical requests (model, normalized prompt, inference config) are
+        answered from the response cache; pass use_cache=False for a fresh
+        answer, which also refreshes the cached one. Identical requests made
+        while one is in flight share its invocation.
+        A failed invocation is returned as an error message, or raised as
+        BedrockError with raise_errors=True.
+        """
+        model_id, config, key = BedrockService._request(prompt)
+        cached = BedrockService._cached(key, use_cache)
+        if cached is not None:
+            return cached
+        try:
+            return BedrockService.flight.do(key, BedrockService._generate, model_id, prompt, config, key)
+        except BedrockError as e:
+            if raise_errors:
+                raise
+            return BedrockService.error_message(e)
+
+    @staticmethod
+    def stream_response(prompt: str, use_cache: bool = True) -> Iterator[str]:
+        """
+        Streaming counterpart of generate_response: yields the completion in
+        pieces as Bedrock produces them. A cached answer is yielded whole, and
+        a completed stream is stored in the cache.
+        """
+        model_id, config, key = BedrockService._request(prompt)
+        cached = BedrockService._cached(key, use_cache)
+        if cached is not None:
+            yield cached
+            return
+
+        parts = []
+        try:
+            for text in BedrockService._invoke_stream(model_id, prompt, config):
+                parts.append(text)
+                yield text
+        except Exception as e:
+            logger.error(f"Error streaming from Bedrock: {e}")
+            yield BedrockService.error_message(e)
+            return
+
+        if parts and BedrockService.CACHE_ENABLED:
+            BedrockService.cache.put(key, "".join(parts))
+
+    @staticmethod
+    async def agenerate_response(prompt: str, use_cache: bool = True, raise_errors: bool = False) -> str:
+        """generate_response for async handlers: coalesced on the event loop, invoked on the AWS executor."""
+        model_id, config, key = BedrockService._request(prompt)
+        cached = await BedrockService._acached(key, use_cache)
+        if cached is not None:
+            return cached
+        try:
+            return await BedrockService.flight.ado(
+                key, run_blocking, BedrockService._generate, model_id, prompt, config, key
+            )
+        except BedrockError as e:
+            if raise_errors:
+                raise
+            return BedrockService.error_message(e)
+
+    @staticmethod
+    def astream_response(prompt: str, use_cache: bool = True) -> AsyncIterator[str]:
+        """stream_response as an async iterator; each chunk is read on the AWS executor."""
+        return iterate_blocking(BedrockService.stream_response(prompt, use_cache))
 
     @staticmethod
     def analyze_spending_risk(spending_data: list) -> dict:
@@ -0,0 +1,319 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from datetime import date as Date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from services.storage import get_store
+from services.data_prep_service import DataPrepService
+from services.aws_clients import run_blocking
+
+
+class _HotBudget:
+    __slots__ = ('periods', 'totals', 'limits', 'loaded_at')
+
+    def __init__(self, periods: Dict[str, str], totals: Dict[str, float], limits: Dict, loaded_at: float):
+        self.periods = periods
+        self.totals = totals
+        self.limits = limits
+        self.loaded_at = loaded_at
+
+
+class BudgetService:
+    """
+    Per-user spend counters for the current day, ISO week and calendar month,
+    by category, checked against per-user limits.
+
+    Every recorded transaction atomically ADDs its amount to the three
+    DynamoDB counters its date falls in ("day#2024-05-03#Food",
+    "week#2024-W18#Food", "month#2024-05#Food"), so counters stay correct
+    across processes. Each process also keeps a hot copy of a user's current
+    counters and limits, loaded with three small queries and updated in place
+    on local writes; checks are then dict lookups. Hot copies are reloaded
+    after HOT_TTL_SECONDS to pick up other processes' writes, and whenever a
+    window rolls over. The SQLite backend sums the windows from the
+    transactions instead of keeping counters.
+    """
+    WINDOWS = ("day", "week", "month")
+    ADJECTIVES = {"day": "daily", "week": "weekly", "month": "monthly"}
+    # Alert codes of batch checks
+    ALERT_LABELS = ["ok", "over_daily_limit", "over_weekly_limit", "over_monthly_limit"]
+    # Limits for categories the user has not configured: the former fixed thresholds, now monthly budgets
+    DEFAULT_LIMITS = {
+        "Food": {"month": 500},
+        "Shopping": {"month": 300},
+        "Transport": {"month": 200},
+    }
+    FALLBACK_LIMITS = {"month": 1000}
+
+    HOT_TTL_SECONDS = float(os.getenv('BUDGET_HOT_TTL_SECONDS', '60'))
+    MAX_HOT_USERS = int(os.getenv('BUDGET_MAX_HOT_USERS', '10000'))
+    # Counters outlive their window by this much before DynamoDB TTL removes them
+    RETENTION_DAYS = 40
+
+    _hot = OrderedDict()
+    # Local writes per user, so a load that raced a write is not cached
+    _writes = {}
+    _lock = threading.RLock()
+
+    @staticmethod
+    def periods(day: Date) -> Dict[str, str]:
+        """Counter key prefix of each window containing `day`."""
+        year, week, _ = day.isocalendar()
+        return {
+            "day": f"day#{day.isoformat()}",
+            "week": f"week#{year}-W{week:02d}",
+            "month": f"month#{day.strftime('%Y-%m')}",
+        }
+
+    @staticmethod
+    def _day(date: Optional[str]) -> Date:
+        return datetime.strptime(date, "%Y-%m-%d").date() if date else datetime.now().date()
+
+    @classmethod
+    def _expires_at(cls, day: Date) -> int:
+        return int(time.mktime((day + timedelta(days=cls.RETENTION_DAYS)).timetuple()))
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._hot.clear()
+
+    @classmethod
+    def record(cls, transaction: Dict) -> bool:
+        """Adds a stored (canonical) transaction to its day, week and month counters."""
+        user_id, category = transaction['user_id'], transaction.get('category', 'Other')
+        day = cls._day(transaction['date'])
+        amount = float(transaction['amount'])
+        counters = [f"{period}#{category}" for period in cls.periods(day).values()]
+        with cls._lock:
+            cls._writes[user_id] = cls._writes.get(user_id, 0) + 1
+        success = get_store().increment_budget_counters(user_id, counters, amount, cls._expires_at(day))
+        if success:
+            with cls._lock:
+                entry = cls._hot.get(user_id)
+                # Only windows the hot copy holds; back-dated rows land in DynamoDB alone
+                if entry is not None:
+                    for counter in counters:
+                        if counter.rsplit("#", 1)[0] in entry.periods.values():
+                            entry.totals[counter] = entry.totals.get(counter, 0.0) + amount
+        return success
+
+    @classmethod
+    def record_many(cls, transactions: List[Dict]) -> int:
+        """
+        Adds a batch of stored transactions with one ADD per touched counter.
+        Only windows that are current today are updated: older windows are
+        never checked again. Returns the number of counters updated.
+        """
+        current = set(cls.periods(cls._day(None)).values())
+        sums = {}
+        for tx in transactions:
+            for period in cls.periods(cls._day(tx['date'])).values():
+                if period in current:
+                    key = (tx['user_id'], f"{period}#{tx.get('category', 'Other')}")
+                    sums[key] = sums.get(key, 0.0) + float(tx['amount'])
+        expires_at = cls._expires_at(cls._day(None))
+        users = {user_id for user_id, _ in sums}
+        with cls._lock:
+            for user_id in users:
+                cls._writes[user_id] = cls._writes.get(user_id, 0) + 1
+        for (user_id, counter), amount in sums.items():
+            get_store().increment_budget_counters(user_id, [counter], round(amount, 2), expires_at)
+        # Hot copies reload from the updated counters
+        with cls._lock:
+            for user_id in users:
+                cls._hot.pop(user_id, None)
+        return len(sums)
+
+    @classmethod
+    def _peek(cls, user_id: str, day: Date) -> Optional[_HotBudget]:
+        with cls._lock:
+            entry = cls._hot.get(user_id)
+            if entry is None:
+                return None
+            if entry.periods != cls.periods(day) or time.monotonic() - entry.loaded_at > cls.HOT_TTL_SECONDS:
+                del cls._hot[user_id]
+                return None
+            cls._hot.move_to_end(user_id)
+            return entry
+
+    @classmethod
+    def _load(cls, user_id: str, day: Date) -> _HotBudget:
+        entry = cls._peek(user_id, day)
+        if entry is not None:
+            return entry
+        with cls._lock:
+            writes = cls._writes.get(user_id, 0)
+        periods = cls.periods(day)
+        totals = get_store().get_budget_counters(user_id, [f"{period}#" for period in periods.values()])
+        entry = _HotBudget(periods, totals, get_store().get_budget_limits(user_id), time.monotonic())
+        with cls._lock:
+            if cls._writes.get(user_id, 0) == writes:
+                cls._hot[user_id] = entry
+                while len(cls._hot) > cls.MAX_HOT_USERS:
+                    cls._hot.popitem(last=False)
+        return entry
+
+    @classmethod
+    def limits_for(cls, limits: Dict, category: str) -> Dict[str, float]:
+        return limits.get(category) or cls.DEFAULT_LIMITS.get(category) or cls.FALLBACK_LIMITS
+
+    @classmethod
+    def _evaluate(cls, entry: _HotBudget, amount: float, category: str) -> Dict:
+        limits = cls.limits_for(entry.limits, category)
+        windows = {}
+        exceeded = None
+        for window in cls.WINDOWS:
+            spent = entry.totals.get(f"{entry.periods[window]}#{category}", 0.0)
+            limit = limits.get(window)
+            windows[window] = {
+                "spent": round(spent, 2),
+                "limit": limit,
+                "remaining": None if limit is None else round(limit - spent, 2),
+            }
+            if exceeded is None and limit is not None and spent + amount > limit:
+                exceeded = window
+
+        if exceeded:
+            spent = windows[exceeded]["spent"]
+            limit = windows[exceeded]["limit"]
+            return {
+                "allowed": False,
+                "alert": f"Alert: This purchase would bring your {category} spending to ${spent + amount:,.2f}, "
+                         f"over your {cls.ADJECTIVES[exceeded]} limit of ${limit:,.2f}.",
+                "suggestion": "Consider deferring this purchase or finding a cheaper alternative.",
+                "category": category,
+                "windows": windows,
+            }
+        return {"allowed": True, "alert": None, "category": category, "windows": windows}
+
+    @classmethod
+    def check(cls, user_id: str, amount: float, category: str, date: str = None) -> Dict:
+        """
+        Whether a purchase fits the user's day, week and month limits for the
+        category given what they have already spent, with per-window spend,
+        limit and remaining amounts.
+        """
+        return cls._evaluate(cls._load(user_id, cls._day(date)), amount, category)
+
+    @classmethod
+    async def acheck(cls, user_id: str, amount: float, category: str, date: str = None) -> Dict:
+        # Hot users are checked on the event loop; cold ones load on the AWS executor
+        day = cls._day(date)
+        entry = cls._peek(user_id, day) or await run_blocking(cls._load, user_id, day)
+        return cls._evaluate(entry, amount, category)
+
+    @classmethod
+    def _evaluate_batch(cls, entry: _HotBudget, amounts: List[float], categories: List[str],
+                        cumulative: bool) -> Dict:
+        import numpy as np
+        amounts = np.asarray(amounts, dtype=np.float64)
+        if len(amounts) != len(categories):
+            raise ValueError("amounts and categories must have the same length")
+        names, codes = np.unique(np.asarray(categories, dtype=str), return_inverse=True)
+        codes = codes.reshape(-1)
+
+        charge = amounts
+        if cumulative and len(amounts):
+            # Each item also carries the cart items of its category listed before it
+            order = np.argsort(codes, kind='stable')
+            running = np.cumsum(amounts[order])
+            starts = np.r_[0, np.flatnonzero(np.diff(codes[order])) + 1]
+            before = running[starts] - amounts[order][starts]
+            charge = np.empty_like(amounts)
+            charge[order] = running - np.repeat(before, np.diff(np.r_[starts, len(order)]))
+
+        # One lookup per distinct category, then gathered per item
+        alert_codes = np.zeros(len(amounts), dtype=np.int8)
+        for code, window in reversed(list(enumerate(cls.WINDOWS, 1))):
+            spent = np.array([entry.totals.get(f"{entry.periods[window]}#{name}", 0.0) for name in names])
+            limit = np.array([cls.limits_for(entry.limits, name).get(window, np.inf) for name in names])
+            # Walking month -> day leaves the shortest exceeded window, as in single checks
+            alert_codes[spent[codes] + charge > limit[codes]] = code
+        return {
+            "allowed": (alert_codes == 0).tolist(),
+            "alert_codes": alert_codes.tolist(),
+            "alert_labels": cls.ALERT_LABELS,
+        }
+
+    @classmethod
+    def check_batch(cls, user_id: str, amounts: List[float], categories: List[str], date: str = None,
+                    cumulative: bool = False) -> Dict:
+        """
+        Screens many candidate purchases in one vectorized pass. Returns
+        columns {"allowed", "alert_codes"} in input order; alert codes index
+        ALERT_LABELS (0 allowed, else the shortest window whose limit the item
+        would exceed). With `cumulative`, items are treated as one cart, so
+        each is checked together with the earlier items in its category.
+        """
+        return cls._evaluate_batch(cls._load(user_id, cls._day(date)), amounts, categories, cumulative)
+
+    @classmethod
+    async def acheck_batch(cls, user_id: str, amounts: List[float], categories: List[str], date: str = None,
+                           cumulative: bool = False) -> Dict:
+        day = cls._day(date)
+        entry = cls._peek(user_id, day) or await run_blocking(cls._load, user_id, day)
+        return cls._evaluate_batch(entry, amounts, categories, cumulative)
+
+    @classmethod
+    def status(cls, user_id: str, date: str = None) -> Dict:
+        """Current spend against limits for every category with spend or a configured limit."""
+        entry = cls._load(user_id, cls._day(date))
+        categories = {counter.rsplit("#", 1)[1] for counter in entry.totals} | set(entry.limits)
+        return {
+            "periods": {window: period.split("#", 1)[1] for window, period in entry.periods.items()},
+            "categories": {category: cls._evaluate(entry, 0.0, category)["windows"]
+                           for category in sorted(categories)},
+        }
+
+    @classmethod
+    def set_limits(cls, user_id: str, limits: Dict[str, Dict[str, float]]) -> Dict:
+        """
+        Replaces the user's limits ({category: {window: amount}}). Raises
+        ValueError for unknown windows or negative amounts.
+        """
+        for category, windows in limits.items():
+            for window, amount in windows.items():
+                if window not in cls.WINDOWS:
+                    raise ValueError(f"Unknown budget window '{window}' for {category}; use one of {cls.WINDOWS}")
+                if amount < 0:
+                    raise ValueError(f"Budget limit for {category} must not be negative")
+        if not get_store().put_budget_limits(user_id, limits):
+            raise RuntimeError("Could not save budget limits")
+        with cls._lock:
+            entry = cls._hot.get(user_id)
+            if entry is not None:
+                entry.limits = limits
+        return limits
+
+    @classmethod
+    def rebuild(cls, user_id: str, date: str = None) -> int:
+        """
+        Recomputes the user's current day, week and month counters from raw
+        transactions, for data written before counters existed or to repair
+        drift. Returns the number of counters written.
+        """
+        day = cls._day(date)
+        periods = cls.periods(day)
+        week_start = day - timedelta(days=day.weekday())
+        start = min(week_start, day.replace(day=1)).isoformat()
+
+        totals = {counter: 0.0 for counter in get_store().get_budget_counters(
+            user_id, [f"{period}#" for period in periods.values()])}
+        for page, _ in get_store().iter_user_pages(user_id, date_from=start, date_to=day.isoformat()):
+            for tx in page:
+                if DataPrepService.is_stale(tx):
+                    tx = DataPrepService.canonicalize(dict(tx))
+                tx_periods = cls.periods(cls._day(tx['date']))
+                category = tx.get('category', 'Other')
+                for window, period in periods.items():
+                    if tx_periods[window] == period:
+                        counter = f"{period}#{category}"
+                        totals[counter] = totals.get(counter, 0.0) + float(tx['amount'])
+
+        written = get_store().replace_budget_counters(user_id, totals, cls._expires_at(day))
+        with cls._lock:
+            cls._hot.pop(user_id, None)
+        return written
@@ -1,23 +1,136 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'merchant_rules.json')
+
+
+class MerchantRuleSet:
+    """
+    Merchant normalization rules compiled into a single case-insensitive
+    regex. Each rule matches on a literal substring ("contains") or a regex
+    ("pattern") and may set a canonical "merchant" and/or "category". When
+    several rules match, the earliest rule in the file wins.
+    """
+
+    def __init__(self, rules: List[Dict], version: str = "0", memo_size: int = 65536):
+        self.rules = rules
+        self.version = str(version)
+        alternatives = []
+        for i, rule in enumerate(rules):
+            pattern = rule['pattern'] if 'pattern' in rule else re.escape(rule['contains'])
+            # Zero-width lookaheads, so a rule can match text that overlaps another rule's match
+            alternatives.append(f"(?=(?P<r{i}>{pattern}))")
+        self._matcher = re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+        # Bounded memo from raw merchant to its (merchant, category) overrides
+        self.normalize = lru_cache(maxsize=memo_size)(self._normalize)
+
+    @classmethod
+    def load(cls, path: str, memo_size: int = 65536) -> "MerchantRuleSet":
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(config.get('rules', []), config.get('version', "0"), memo_size)
+
+    def _normalize(self, merchant: str) -> Tuple[Optional[str], Optional[str]]:
+        if not merchant or self._matcher is None:
+            return None, None
+        # Each position reports the earliest rule matching there; the earliest overall wins
+        best = None
+        for match in self._matcher.finditer(merchant):
+            index = int(match.lastgroup[1:])
+            if best is None or index < best:
+                best = index
+                if index == 0:
+                    break
+        if best is None:
+            return None, None
+        rule = self.rules[best]
+        return rule.get('merchant'), rule.get('category')
+
+
 class DataPrepService:
-    @staticmethod
-    def clean_data(raw_data: list) -> list:
+    RULES_PATH = os.getenv('MERCHANT_RULES_PATH', DEFAULT_RULES_PATH)
+    MEMO_SIZE = int(os.getenv('MERCHANT_MEMO_SIZE', '65536'))
+    # How often the rules file is checked for edits
+    RELOAD_INTERVAL_SECONDS = 1.0
+
+    _rules = None
+    _rules_mtime = None
+    _checked_at = 0.0
+    _lock = threading.Lock()
+
+    @classmethod
+    def rules(cls) -> MerchantRuleSet:
+        """The compiled rule set, recompiled when the rules file changes on disk."""
+        now = time.monotonic()
+        if cls._rules is not None and now - cls._checked_at < cls.RELOAD_INTERVAL_SECONDS:
+            return cls._rules
+        with cls._lock:
+            cls._checked_at = now
+            try:
+                mtime = os.path.getmtime(cls.RULES_PATH)
+            except OSError as e:
+                logger.error(f"Merchant rules not found at {cls.RULES_PATH}: {e}")
+                mtime = None
+            if cls._rules is None or mtime != cls._rules_mtime:
+                try:
+                    cls._rules = MerchantRuleSet.load(cls.RULES_PATH, cls.MEMO_SIZE)
+                except (OSError, ValueError, re.error) as e:
+                    logger.error(f"Could not load merchant rules: {e}")
+                    if cls._rules is None:
+                        cls._rules = MerchantRuleSet([])
+                cls._rules_mtime = mtime
+        return cls._rules
+
+    @classmethod
+    def canonicalize(cls, item: dict) -> dict:
+        """
+        Sets the canonical merchant/category on a transaction, in place. The
+        original values are kept as raw_merchant/raw_category (and are what
+        the rules run on, so re-running is idempotent), and the row is tagged
+        with the rules version that produced it.
+        """
+        rules = cls.rules()
+        raw_merchant = item.setdefault('raw_merchant', item.get('merchant', ''))
+        raw_category = item.setdefault('raw_category', item.get('category', 'Other'))
+        merchant, category = rules.normalize(raw_merchant)
+        item['merchant'] = merchant or raw_merchant
+        item['category'] = category or raw_category
+        item['rules_version'] = rules.version
+        return item
+
+    @classmethod
+    def is_stale(cls, item: dict) -> bool:
+        """True if the row was not normalized with the current rules."""
+        return item.get('rules_version') != cls.rules().version
+
+    @classmethod
+    def clean_page(cls, items: list) -> list:
+        """
+        Normalizes a page of freshly fetched transactions in place, in one
+        pass with a single rule lookup per row. Returns the same list.
+        """
+        normalize = cls.rules().normalize
+        for item in items:
+            merchant, category = normalize(item.get('merchant', ''))
+            if merchant:
+                item['merchant'] = merchant
+            if category:
+                item['category'] = category
+        return items
+
+    @classmethod
+    def clean_data(cls, raw_data: list) -> list:
         """
         Simulates data cleaning using IBM Watsonx Data Prep Kit.
-        Normalizes merchant names (e.g., 'UBER *TRIP' -> 'Uber').
+        Normalizes merchant names (e.g., 'UBER *TRIP' -> 'Uber') using the
+        rules in data/merchant_rules.json. Returns cleaned copies.
         """
-        cleaned_data = []
-        for item in raw_data:
-            new_item = item.copy()
-            # Mock normalization logic
-            merchant = item.get('merchant', '').lower()
-            if 'uber' in merchant:
-                new_item['merchant'] = 'Uber'
-                new_item['category'] = 'Transport'
-            elif 'whole foods' in merchant or 'burger' in merchant:
-                new_item['category'] = 'Food'
-            elif 'amazon' in merchant:
-                new_item['category'] = 'Shopping'
-                
-            cleaned_data.append(new_item)
-            
-        return cleaned_data
+        return cls.clean_page([item.copy() for item in raw_data])
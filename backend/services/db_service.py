@@ -1,89 +1,568 @@
-import boto3
 import os
 import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
 from decimal import Decimal
 
+from services.aws_clients import client_config
+from services.storage import KeyCollisionError, TransactionStore
+from services.tracing import instrument_client
+
 logger = logging.getLogger(__name__)
 
-class DynamoDBService:
+
+def _key(name: str):
+    # boto3 is slow to import, so it is loaded with the first query rather than at startup
+    from boto3.dynamodb.conditions import Key
+    return Key(name)
+
+
+class DynamoDBService(TransactionStore):
+    NAME = "dynamodb"
     _resource = None
     _table = None
-    TABLE_NAME = "FinancialTransactions"
+    _local = threading.local()
+    # Transactions are partitioned per user and sorted by date:
+    #   user_id (HASH) + date_id = "<date>#<id>" (RANGE)
+    # CategoryDateIndex serves per-user category filters:
+    #   user_category = "<user_id>#<category>" (HASH) + date_id (RANGE)
+    TABLE_NAME = "UserTransactions"
+    CATEGORY_INDEX = "CategoryDateIndex"
+    # Pre-partitioning table keyed only on a numeric id; read by the migration script
+    LEGACY_TABLE_NAME = "FinancialTransactions"
+    # Spending totals per user, month and category, maintained at write time
+    ROLLUP_TABLE_NAME = "SpendingRollups"
+    # Budget spend counters per user, window and category, plus each user's limits item
+    BUDGET_TABLE_NAME = "BudgetCounters"
+    BUDGET_LIMITS_KEY = "limits"
+    # Key attributes derived from the transaction fields, never returned to callers
+    DERIVED_ATTRIBUTES = ('date_id', 'user_category')
+
+    # Parallel scan settings: number of Segment/TotalSegments slices and the
+    # size of the thread pool that scans them
+    SCAN_SEGMENTS = int(os.getenv('DYNAMODB_SCAN_SEGMENTS', '4'))
+    SCAN_MAX_WORKERS = int(os.getenv('DYNAMODB_SCAN_MAX_WORKERS', '8'))
+    # BatchGetItem accepts at most 100 keys per request
+    BATCH_GET_KEYS = 100
+
+    @classmethod
+    def _new_resource(cls):
+        import boto3
+        resource = boto3.session.Session().resource(
+            'dynamodb',
+            region_name=os.getenv('AWS_DEFAULT_REGION', 'us-east-1'),
+            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+            endpoint_url=os.getenv('DYNAMODB_ENDPOINT_URL'),
+            config=client_config('dynamodb')
+        )
+        instrument_client(resource.meta.client)
+        return resource
 
     @classmethod
     def get_resource(cls):
         if cls._resource is None:
-            cls._resource = boto3.resource(
-                'dynamodb',
-                region_name=os.getenv('AWS_DEFAULT_REGION', 'us-east-1'),
-                aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-                aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-            )
+            cls._resource = cls._new_resource()
         return cls._resource
 
     @classmethod
-    def get_table(cls):
+    def get_table(cls, table_name: str = None):
+        if table_name and table_name != cls.TABLE_NAME:
+            return cls.get_resource().Table(table_name)
         if cls._table is None:
             cls._table = cls.get_resource().Table(cls.TABLE_NAME)
         return cls._table
 
     @classmethod
-    def init_table(cls):
+    def get_thread_table(cls, table_name: str = None):
+        """
+        boto3 resources are not thread-safe, so every scan worker thread gets
+        its own resource and table handles.
+        """
+        table_name = table_name or cls.TABLE_NAME
+        if not hasattr(cls._local, 'resource'):
+            cls._local.resource = cls._new_resource()
+            cls._local.tables = {}
+        if table_name not in cls._local.tables:
+            cls._local.tables[table_name] = cls._local.resource.Table(table_name)
+        return cls._local.tables[table_name]
+
+    @classmethod
+    def _create_table(cls, table_name: str, **definition):
         """
         Check if table exists, create if not.
         """
         dynamodb = cls.get_resource()
         try:
             table = dynamodb.create_table(
-                TableName=cls.TABLE_NAME,
-                KeySchema=[
-                    {'AttributeName': 'id', 'KeyType': 'HASH'}  # Partition key
-                ],
-                AttributeDefinitions=[
-                    {'AttributeName': 'id', 'AttributeType': 'N'}
-                ],
+                TableName=table_name,
                 ProvisionedThroughput={
                     'ReadCapacityUnits': 5,
                     'WriteCapacityUnits': 5
-                }
+                },
+                **definition
             )
-            print(f"Creating table {cls.TABLE_NAME}...")
+            print(f"Creating table {table_name}...")
             table.wait_until_exists()
-            print(f"Table {cls.TABLE_NAME} created successfully.")
+            print(f"Table {table_name} created successfully.")
         except ClientError as e:
             if e.response['Error']['Code'] == 'ResourceInUseException':
-                print(f"Table {cls.TABLE_NAME} already exists.")
+                print(f"Table {table_name} already exists.")
             else:
                 logger.error(f"Error creating table: {e}")
                 raise
 
     @classmethod
-    def add_transaction(cls, transaction: dict):
-        table = cls.get_table()
-        # DynamoDB requires Decimal for floats
+    def init_table(cls):
+        cls._create_table(
+            cls.TABLE_NAME,
+            KeySchema=[
+                {'AttributeName': 'user_id', 'KeyType': 'HASH'},  # Partition key
+                {'AttributeName': 'date_id', 'KeyType': 'RANGE'}  # Sort key
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'user_id', 'AttributeType': 'S'},
+                {'AttributeName': 'date_id', 'AttributeType': 'S'},
+                {'AttributeName': 'user_category', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    'IndexName': cls.CATEGORY_INDEX,
+                    'KeySchema': [
+                        {'AttributeName': 'user_category', 'KeyType': 'HASH'},
+                        {'AttributeName': 'date_id', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'},
+                    'ProvisionedThroughput': {
+                        'ReadCapacityUnits': 5,
+                        'WriteCapacityUnits': 5
+                    }
+                }
+            ]
+        )
+        cls._create_table(
+            cls.ROLLUP_TABLE_NAME,
+            KeySchema=[
+                {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+                {'AttributeName': 'bucket', 'KeyType': 'RANGE'}  # "<YYYY-MM>#<category>"
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'user_id', 'AttributeType': 'S'},
+                {'AttributeName': 'bucket', 'AttributeType': 'S'}
+            ]
+        )
+        cls._create_table(
+            cls.BUDGET_TABLE_NAME,
+            KeySchema=[
+                {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+                {'AttributeName': 'counter', 'KeyType': 'RANGE'}  # "<window>#<period>#<category>" or "limits"
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'user_id', 'AttributeType': 'S'},
+                {'AttributeName': 'counter', 'AttributeType': 'S'}
+            ]
+        )
+        # Counter rows carry expires_at; the limits row has none and is kept
+        cls._enable_ttl(cls.BUDGET_TABLE_NAME, 'expires_at')
+
+    @classmethod
+    def _enable_ttl(cls, table_name: str, attribute: str):
+        """Turns on DynamoDB TTL for the attribute, unless it is already on."""
+        client = cls.get_resource().meta.client
+        try:
+            status = client.describe_time_to_live(TableName=table_name)['TimeToLiveDescription']
+            if status.get('TimeToLiveStatus') in ('ENABLED', 'ENABLING'):
+                return
+            client.update_time_to_live(
+                TableName=table_name,
+                TimeToLiveSpecification={'Enabled': True, 'AttributeName': attribute}
+            )
+            print(f"Enabled TTL on {table_name}.{attribute}.")
+        except ClientError as e:
+            logger.error(f"Error enabling TTL on {table_name}: {e}")
+            raise
+
+    @classmethod
+    def describe(cls) -> str:
+        return f"{cls.NAME}: " + ", ".join((cls.TABLE_NAME, cls.ROLLUP_TABLE_NAME, cls.BUDGET_TABLE_NAME))
+
+    @classmethod
+    def _to_dynamo(cls, transaction: dict) -> dict:
         item = transaction.copy()
+        # DynamoDB requires Decimal for floats
         if isinstance(item.get('amount'), float):
             item['amount'] = Decimal(str(item['amount']))
-            
+        item['date_id'] = cls.date_key(item['date'], item['id'])
+        item['user_category'] = cls.category_key(item['user_id'], item['category'])
+        return item
+
+    @classmethod
+    def _from_dynamo(cls, item: dict) -> dict:
+        for attr in cls.DERIVED_ATTRIBUTES:
+            item.pop(attr, None)
+        # Convert Decimal back to int/float for JSON serialization
+        for key, value in item.items():
+            if isinstance(value, Decimal):
+                item[key] = int(value) if value == value.to_integral_value() and key != 'amount' else float(value)
+        return item
+
+    @classmethod
+    def add_transaction(cls, transaction: dict, if_absent: bool = False):
+        """
+        Stores one transaction. With `if_absent`, the put is conditional and
+        raises KeyCollisionError instead of overwriting an existing row.
+        """
+        table = cls.get_table()
+        kwargs = {'ConditionExpression': 'attribute_not_exists(date_id)'} if if_absent else {}
         try:
-            table.put_item(Item=item)
+            table.put_item(Item=cls._to_dynamo(transaction), **kwargs)
             return True
         except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                raise KeyCollisionError(cls.date_key(transaction['date'], transaction['id'])) from e
             logger.error(f"Error adding transaction: {e}")
             return False
 
     @classmethod
-    def get_all_transactions(cls):
+    def batch_add_transactions(cls, transactions, table_name: str = None, table=None) -> int:
+        """Writes transactions through batch_writer; returns how many were written."""
+        table = table or cls.get_table(table_name)
+        written = 0
+        try:
+            with table.batch_writer(overwrite_by_pkeys=['user_id', 'date_id']) as batch:
+                for transaction in transactions:
+                    batch.put_item(Item=cls._to_dynamo(transaction))
+                    written += 1
+        except ClientError as e:
+            logger.error(f"Error batch writing transactions: {e}")
+        return written
+
+    @classmethod
+    def existing_date_ids(cls, user_id: str, date_ids) -> set:
+        """
+        Which of the user's transaction keys (date_id values) are already
+        stored, via BatchGetItem. Errors propagate, so callers never mistake a
+        failed lookup for new rows.
+        """
+        resource = cls.get_resource()
+        keys = [{'user_id': user_id, 'date_id': date_id} for date_id in dict.fromkeys(date_ids)]
+        found = set()
+        for start in range(0, len(keys), cls.BATCH_GET_KEYS):
+            request = {cls.TABLE_NAME: {'Keys': keys[start:start + cls.BATCH_GET_KEYS],
+                                        'ProjectionExpression': 'date_id'}}
+            while request:
+                response = resource.batch_get_item(RequestItems=request)
+                found.update(item['date_id'] for item in response.get('Responses', {}).get(cls.TABLE_NAME, []))
+                request = response.get('UnprocessedKeys')
+        return found
+
+    @classmethod
+    def increment_rollup(cls, user_id: str, month: str, category: str, amount: float, count: int = 1):
+        """Atomically adds to one (user, month, category) bucket, creating it if needed."""
+        table = cls.get_table(cls.ROLLUP_TABLE_NAME)
+        try:
+            table.update_item(
+                Key={'user_id': user_id, 'bucket': f"{month}#{category}"},
+                UpdateExpression="ADD #total :amount, #count :count SET #month = :month, #category = :category",
+                ExpressionAttributeNames={
+                    '#total': 'total', '#count': 'count', '#month': 'month', '#category': 'category'
+                },
+                ExpressionAttributeValues={
+                    ':amount': Decimal(str(amount)), ':count': count, ':month': month, ':category': category
+                }
+            )
+            return True
+        except ClientError as e:
+            logger.error(f"Error updating rollup: {e}")
+            return False
+
+    @classmethod
+    def get_rollups(cls, user_id: str, month_from: str = None, month_to: str = None) -> list:
+        """Returns the user's rollup buckets, optionally bounded to [month_from, month_to] (YYYY-MM)."""
+        table = cls.get_table(cls.ROLLUP_TABLE_NAME)
+        condition = _key('user_id').eq(user_id)
+        # bucket is "<YYYY-MM>#<category>", so "~" sorts after every category
+        if month_from and month_to:
+            condition &= _key('bucket').between(month_from, f"{month_to}#~")
+        elif month_from:
+            condition &= _key('bucket').gte(month_from)
+        elif month_to:
+            condition &= _key('bucket').lte(f"{month_to}#~")
+
+        query_kwargs = {'KeyConditionExpression': condition}
+        buckets = []
+        try:
+            while True:
+                response = table.query(**query_kwargs)
+                buckets.extend(cls._from_dynamo(item) for item in response.get('Items', []))
+                if 'LastEvaluatedKey' not in response:
+                    break
+                query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        except ClientError as e:
+            logger.error(f"Error fetching rollups: {e}")
+        for bucket in buckets:
+            bucket['total'] = float(bucket['total'])
+        return buckets
+
+    @classmethod
+    def replace_rollups(cls, user_id: str, buckets: list) -> int:
+        """
+        Overwrites all of the user's rollup buckets with `buckets` (dicts with
+        month, category, total and count) and deletes any bucket not in it.
+        """
+        table = cls.get_table(cls.ROLLUP_TABLE_NAME)
+        new_keys = {f"{b['month']}#{b['category']}" for b in buckets}
+        stale = [b for b in cls.get_rollups(user_id) if b['bucket'] not in new_keys]
+        try:
+            with table.batch_writer(overwrite_by_pkeys=['user_id', 'bucket']) as batch:
+                for bucket in stale:
+                    batch.delete_item(Key={'user_id': user_id, 'bucket': bucket['bucket']})
+                for bucket in buckets:
+                    batch.put_item(Item={
+                        'user_id': user_id,
+                        'bucket': f"{bucket['month']}#{bucket['category']}",
+                        'month': bucket['month'],
+                        'category': bucket['category'],
+                        'total': Decimal(str(round(bucket['total'], 2))),
+                        'count': bucket['count']
+                    })
+        except ClientError as e:
+            logger.error(f"Error replacing rollups: {e}")
+            return 0
+        return len(buckets)
+
+    @classmethod
+    def increment_budget_counters(cls, user_id: str, counters: list, amount: float, expires_at: int) -> bool:
+        """
+        Atomically adds `amount` to each of the user's budget counters, creating
+        them if needed. `expires_at` (epoch seconds) is for the table's TTL.
+        """
+        table = cls.get_table(cls.BUDGET_TABLE_NAME)
+        try:
+            for counter in counters:
+                table.update_item(
+                    Key={'user_id': user_id, 'counter': counter},
+                    UpdateExpression="ADD #total :amount SET #expires_at = :expires_at",
+                    ExpressionAttributeNames={'#total': 'total', '#expires_at': 'expires_at'},
+                    ExpressionAttributeValues={':amount': Decimal(str(amount)), ':expires_at': expires_at}
+                )
+            return True
+        except ClientError as e:
+            logger.error(f"Error updating budget counters: {e}")
+            return False
+
+    @classmethod
+    def get_budget_counters(cls, user_id: str, prefixes: list) -> dict:
+        """Totals of the user's counters whose keys start with any of `prefixes`, by counter key."""
+        table = cls.get_table(cls.BUDGET_TABLE_NAME)
+        totals = {}
+        try:
+            for prefix in prefixes:
+                query_kwargs = {'KeyConditionExpression': _key('user_id').eq(user_id) & _key('counter').begins_with(prefix)}
+                while True:
+                    response = table.query(**query_kwargs)
+                    for item in response.get('Items', []):
+                        totals[item['counter']] = float(item['total'])
+                    if 'LastEvaluatedKey' not in response:
+                        break
+                    query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        except ClientError as e:
+            logger.error(f"Error fetching budget counters: {e}")
+        return totals
+
+    @classmethod
+    def replace_budget_counters(cls, user_id: str, totals: dict, expires_at: int) -> int:
+        """Overwrites the given counters (counter key -> total) with absolute values."""
+        table = cls.get_table(cls.BUDGET_TABLE_NAME)
+        try:
+            with table.batch_writer(overwrite_by_pkeys=['user_id', 'counter']) as batch:
+                for counter, total in totals.items():
+                    batch.put_item(Item={
+                        'user_id': user_id,
+                        'counter': counter,
+                        'total': Decimal(str(round(total, 2))),
+                        'expires_at': expires_at
+                    })
+        except ClientError as e:
+            logger.error(f"Error replacing budget counters: {e}")
+            return 0
+        return len(totals)
+
+    @classmethod
+    def get_budget_limits(cls, user_id: str) -> dict:
+        """The user's budget limits as {category: {window: amount}}, empty if none are set."""
+        table = cls.get_table(cls.BUDGET_TABLE_NAME)
+        try:
+            item = table.get_item(Key={'user_id': user_id, 'counter': cls.BUDGET_LIMITS_KEY}).get('Item')
+        except ClientError as e:
+            logger.error(f"Error fetching budget limits: {e}")
+            return {}
+        if not item:
+            return {}
+        return {
+            category: {window: float(amount) for window, amount in windows.items()}
+            for category, windows in item.get('limits', {}).items()
+        }
+
+    @classmethod
+    def put_budget_limits(cls, user_id: str, limits: dict) -> bool:
+        table = cls.get_table(cls.BUDGET_TABLE_NAME)
+        try:
+            table.put_item(Item={
+                'user_id': user_id,
+                'counter': cls.BUDGET_LIMITS_KEY,
+                'limits': {
+                    category: {window: Decimal(str(amount)) for window, amount in windows.items()}
+                    for category, windows in limits.items()
+                }
+            })
+            return True
+        except ClientError as e:
+            logger.error(f"Error saving budget limits: {e}")
+            return False
+
+    @classmethod
+    def iter_user_pages(cls, user_id: str, date_from: str = None, date_to: str = None,
+                        category: str = None, page_size: int = None, start_key: dict = None):
+        """
+        Yields (items, last_evaluated_key) for each Query page over one user's
+        transactions in date order, optionally bounded to [date_from, date_to]
+        (inclusive, YYYY-MM-DD) and narrowed to one category through the
+        category index.
+        """
         table = cls.get_table()
+        if category:
+            condition = _key('user_category').eq(cls.category_key(user_id, category))
+        else:
+            condition = _key('user_id').eq(user_id)
+
+        # date_id is "<date>#<id>", so "~" sorts after every id on the last day
+        if date_from and date_to:
+            condition &= _key('date_id').between(date_from, f"{date_to}#~")
+        elif date_from:
+            condition &= _key('date_id').gte(date_from)
+        elif date_to:
+            condition &= _key('date_id').lte(f"{date_to}#~")
+
+        query_kwargs = {'KeyConditionExpression': condition}
+        if category:
+            query_kwargs['IndexName'] = cls.CATEGORY_INDEX
+        if page_size:
+            query_kwargs['Limit'] = page_size
+        if start_key:
+            query_kwargs['ExclusiveStartKey'] = start_key
+
+        while True:
+            try:
+                response = table.query(**query_kwargs)
+            except ClientError as e:
+                # Stopping here would pass a truncated read off as complete
+                logger.error(f"Error querying transactions: {e}")
+                raise
+            items = [cls._from_dynamo(item) for item in response.get('Items', [])]
+            last_key = response.get('LastEvaluatedKey')
+            yield items, last_key
+            if not last_key:
+                break
+            query_kwargs['ExclusiveStartKey'] = last_key
+
+    @classmethod
+    def iter_transaction_pages(cls, page_size: int = None, start_key: dict = None,
+                               segment: int = None, total_segments: int = None, table=None):
+        """
+        Yields (items, last_evaluated_key) for each scan page, following
+        LastEvaluatedKey until the table (or the given scan segment) is
+        exhausted. Only one page is held in memory at a time.
+        """
+        table = table or cls.get_table()
+        scan_kwargs = {}
+        if page_size:
+            scan_kwargs['Limit'] = page_size
+        if start_key:
+            scan_kwargs['ExclusiveStartKey'] = start_key
+        if total_segments:
+            scan_kwargs['Segment'] = segment
+            scan_kwargs['TotalSegments'] = total_segments
+
+        while True:
+            try:
+                response = table.scan(**scan_kwargs)
+            except ClientError as e:
+                # Stopping here would pass a truncated read off as complete
+                logger.error(f"Error fetching transactions: {e}")
+                raise
+            items = [cls._from_dynamo(item) for item in response.get('Items', [])]
+            last_key = response.get('LastEvaluatedKey')
+            yield items, last_key
+            if not last_key:
+                break
+            scan_kwargs['ExclusiveStartKey'] = last_key
+
+    @classmethod
+    def iter_parallel_pages(cls, total_segments: int = None, max_workers: int = None,
+                            page_size: int = None, table_name: str = None):
+        """
+        Scans the table as `total_segments` parallel segments on a bounded
+        thread pool and yields pages in whatever order they arrive.
+        """
+        total_segments = total_segments or cls.SCAN_SEGMENTS
+        max_workers = min(max_workers or cls.SCAN_MAX_WORKERS, total_segments)
+        pages = queue.Queue(maxsize=max_workers * 2)
+        stop = threading.Event()
+        done = object()
+
+        def put(entry):
+            # Give up if the consumer stopped iterating, otherwise a full
+            # queue would block the worker forever
+            while not stop.is_set():
+                try:
+                    pages.put(entry, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def scan_segment(segment):
+            try:
+                table = cls.get_thread_table(table_name)
+                for items, _ in cls.iter_transaction_pages(page_size, segment=segment,
+                                                           total_segments=total_segments, table=table):
+                    if not put(items):
+                        return
+                put(done)
+            except Exception as e:
+                put(e)
+
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dynamodb-scan")
         try:
-            response = table.scan()
-            items = response.get('Items', [])
-            # Convert Decimal back to float for JSON serialization
-            for item in items:
-                if isinstance(item.get('amount'), Decimal):
-                    item['amount'] = float(item['amount'])
+            for segment in range(total_segments):
+                executor.submit(scan_segment, segment)
+            remaining = total_segments
+            while remaining:
+                entry = pages.get()
+                if entry is done:
+                    remaining -= 1
+                elif isinstance(entry, Exception):
+                    raise entry
+                else:
+                    yield entry
+        finally:
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def get_all_transactions(cls, parallel: bool = False, total_segments: int = None):
+        """
+        Reads every transaction. With `parallel`, the table is read through a
+        segmented parallel scan; falls back to a sequential scan when only one
+        segment is configured.
+        """
+        total_segments = total_segments or cls.SCAN_SEGMENTS
+        if parallel and total_segments > 1:
+            items = []
+            for page in cls.iter_parallel_pages(total_segments):
+                items.extend(page)
             return items
-        except ClientError as e:
-            logger.error(f"Error fetching transactions: {e}")
-            return []
+        return list(cls.iter_transactions())
@@ -0,0 +1,88 @@
+import os
+import time
+import threading
+from datetime import datetime, timezone
+
+
+class SnowflakeGenerator:
+    """
+    Snowflake-style 53-bit ids: milliseconds since EPOCH (40 bits, good
+    until 2058), a worker id (6 bits) and a per-millisecond sequence
+    (7 bits). 53 bits keeps ids exact as JavaScript numbers, and they exceed
+    the old millisecond-timestamp ids, so ordering by id still follows time.
+
+    Ids are strictly increasing per generator. If the clock steps back, the
+    generator keeps counting from its last timestamp instead of waiting; if
+    a millisecond's 128 sequence numbers run out, it borrows the next
+    millisecond. Either way, it never blocks.
+
+    Processes must not share a worker id. Set ID_WORKER_ID (0-63) per
+    instance where that can be arranged. Otherwise each process, including
+    forked children, picks a random one. Writers should then use
+    conditional puts to catch the rare id that two processes do share.
+    """
+    EPOCH_MS = int(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    TIMESTAMP_BITS = 40
+    WORKER_BITS = 6
+    SEQUENCE_BITS = 7
+    MAX_WORKER = (1 << WORKER_BITS) - 1
+    MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+    def __init__(self, worker_id: int = None):
+        if worker_id is None and os.getenv('ID_WORKER_ID'):
+            worker_id = int(os.getenv('ID_WORKER_ID'))
+        if worker_id is not None and not 0 <= worker_id <= self.MAX_WORKER:
+            raise ValueError(f"worker_id must be between 0 and {self.MAX_WORKER}")
+        self._fixed_worker = worker_id is not None
+        self.worker_id = worker_id if worker_id is not None else self._random_worker()
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+        self.clock_regressions = 0
+        self.sequence_overflows = 0
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    @classmethod
+    def _random_worker(cls) -> int:
+        return int.from_bytes(os.urandom(1), 'big') & cls.MAX_WORKER
+
+    def _after_fork(self):
+        # A forked child would otherwise replay the parent's ids
+        self._lock = threading.Lock()
+        if not self._fixed_worker:
+            self.worker_id = self._random_worker()
+
+    def _now_ms(self) -> int:
+        return int(time.time() * 1000) - self.EPOCH_MS
+
+    def next_id(self) -> int:
+        with self._lock:
+            now = self._now_ms()
+            if now > self._last_ms:
+                self._last_ms, self._sequence = now, 0
+            else:
+                if now < self._last_ms:
+                    self.clock_regressions += 1
+                self._sequence += 1
+                if self._sequence > self.MAX_SEQUENCE:
+                    self.sequence_overflows += 1
+                    self._last_ms, self._sequence = self._last_ms + 1, 0
+            timestamp, sequence = self._last_ms, self._sequence
+        return (timestamp << (self.WORKER_BITS + self.SEQUENCE_BITS)) | (self.worker_id << self.SEQUENCE_BITS) | sequence
+
+    @classmethod
+    def parse(cls, snowflake: int) -> dict:
+        """Splits an id into its unix timestamp (ms), worker id and sequence."""
+        return {
+            "timestamp_ms": (snowflake >> (cls.WORKER_BITS + cls.SEQUENCE_BITS)) + cls.EPOCH_MS,
+            "worker_id": (snowflake >> cls.SEQUENCE_BITS) & cls.MAX_WORKER,
+            "sequence": snowflake & cls.MAX_SEQUENCE,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "clock_regressions": self.clock_regressions,
+            "sequence_overflows": self.sequence_overflows,
+        }
@@ -0,0 +1,426 @@
+import os
+import re
+import csv
+import json
+import time
+import uuid
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from services.storage import get_store
+from services.data_prep_service import DataPrepService
+from services.rollup_service import RollupService
+from services.budget_service import BudgetService
+from services.transaction_cache import TransactionCache
+from services.aws_clients import run_blocking
+
+logger = logging.getLogger(__name__)
+
+
+class ImportOffsetError(ValueError):
+    """A resumed upload does not start where the job's committed data ends."""
+
+    def __init__(self, message: str, expected_offset: int):
+        super().__init__(message)
+        self.expected_offset = expected_offset
+
+
+class RecordSplitter:
+    """
+    Cuts a byte stream into complete records without holding more than one
+    partial record: CSV rows (newlines inside quoted fields included) or OFX
+    <STMTTRN> blocks. Each record comes with the stream offset where it ends,
+    so an import can resume right after the last committed record.
+    """
+    OFX_BLOCK = re.compile(rb"<STMTTRN>(.*?)</STMTTRN>", re.S | re.I)
+
+    def __init__(self, fmt: str, offset: int = 0):
+        self.format = fmt
+        self.offset = offset  # stream offset of the buffer's first byte
+        self._buffer = b""
+
+    def feed(self, data: bytes) -> List[Tuple[bytes, int]]:
+        self._buffer += data
+        return self._split(final=False)
+
+    def finish(self) -> List[Tuple[bytes, int]]:
+        return self._split(final=True)
+
+    def _split(self, final: bool) -> List[Tuple[bytes, int]]:
+        buf, records, start = self._buffer, [], 0
+        if self.format == "ofx":
+            for match in self.OFX_BLOCK.finditer(buf):
+                records.append((match.group(1), self.offset + match.end()))
+                start = match.end()
+            if final:
+                start = len(buf)
+        else:
+            pos, quotes = 0, 0
+            while True:
+                newline = buf.find(b"\n", pos)
+                if newline < 0:
+                    break
+                quotes += buf.count(b'"', pos, newline)
+                pos = newline + 1
+                if quotes % 2 == 0:
+                    records.append((buf[start:pos], self.offset + pos))
+                    start, quotes = pos, 0
+            if final and buf[start:].strip():
+                records.append((buf[start:], self.offset + len(buf)))
+                start = len(buf)
+        self._buffer = buf[start:]
+        self.offset += start
+        return records
+
+
+class StatementParser:
+    """Turns CSV rows and OFX blocks into (date, signed amount, description, category, reference)."""
+    CSV_ALIASES = {
+        "date": ("date", "transaction date", "posted date", "posting date", "trans. date"),
+        "amount": ("amount", "transaction amount"),
+        "debit": ("debit", "debit amount", "withdrawal", "withdrawals"),
+        "credit": ("credit", "credit amount", "deposit", "deposits"),
+        "description": ("description", "merchant", "payee", "name", "details", "memo"),
+        "category": ("category",),
+        # Columns that tell apart otherwise identical rows
+        "reference": ("reference", "transaction id", "id", "fitid", "ref", "check number"),
+        "balance": ("balance", "running balance"),
+    }
+    DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%Y/%m/%d", "%d-%b-%Y", "%d %b %Y")
+    OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+    @classmethod
+    def csv_columns(cls, header: List[str]) -> Dict[str, int]:
+        """Column index per field from a CSV header row. Raises ValueError if required columns are missing."""
+        names = [name.strip().lower() for name in header]
+        columns = {}
+        for field, aliases in cls.CSV_ALIASES.items():
+            for alias in aliases:
+                if alias in names:
+                    columns[field] = names.index(alias)
+                    break
+        if "date" not in columns or "description" not in columns or \
+                ("amount" not in columns and "debit" not in columns):
+            raise ValueError(f"CSV header needs date, description and amount (or debit) columns, got {header}")
+        return columns
+
+    @classmethod
+    def parse_date(cls, value: str) -> str:
+        value = value.strip()
+        if re.fullmatch(r"\d{8}.*", value):  # OFX: YYYYMMDD[HHMMSS[.XXX]][TZ]
+            return f"{value[:4]}-{value[4:6]}-{value[6:8]}"
+        for fmt in cls.DATE_FORMATS:
+            try:
+                return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+            except ValueError:
+                continue
+        raise ValueError(f"Unrecognized date '{value}'")
+
+    @staticmethod
+    def parse_amount(value: str) -> float:
+        value = value.strip().replace("$", "").replace(",", "")
+        if value.startswith("(") and value.endswith(")"):
+            value = "-" + value[1:-1]
+        return float(value)
+
+    @classmethod
+    def parse_csv(cls, record: bytes, columns: Dict[str, int]) -> Tuple:
+        row = next(csv.reader([record.decode("utf-8-sig", errors="replace")]))
+
+        def field(name):
+            return row[columns[name]].strip() if name in columns and columns[name] < len(row) else ""
+
+        if field("amount"):
+            amount = cls.parse_amount(field("amount"))
+        elif field("debit"):
+            amount = -abs(cls.parse_amount(field("debit")))
+        elif field("credit"):
+            amount = abs(cls.parse_amount(field("credit")))
+        else:
+            raise ValueError("Row has no amount")
+        reference = "|".join(part for part in (field("reference"), field("balance")) if part)
+        return cls.parse_date(field("date")), amount, field("description"), field("category"), reference
+
+    @classmethod
+    def parse_ofx(cls, record: bytes) -> Tuple:
+        fields = {tag.upper(): value.strip()
+                  for tag, value in cls.OFX_FIELD.findall(record.decode("utf-8", errors="replace"))}
+        if "DTPOSTED" not in fields or "TRNAMT" not in fields:
+            raise ValueError("STMTTRN without DTPOSTED/TRNAMT")
+        description = fields.get("NAME") or fields.get("PAYEE") or fields.get("MEMO", "")
+        return (cls.parse_date(fields["DTPOSTED"]), cls.parse_amount(fields["TRNAMT"]), description, "",
+                fields.get("FITID", ""))
+
+
+class ImportJob:
+    """Progress and resume state of one import, persisted as JSON after every committed batch."""
+    FIELDS = ("job_id", "user_id", "format", "debits_positive", "status", "offset", "total_bytes", "columns",
+              "rows_read", "written", "duplicates", "skipped", "errors", "error_samples", "occurrences",
+              "message", "created_at", "updated_at")
+
+    def __init__(self, **state):
+        defaults = {"status": "pending", "offset": 0, "total_bytes": None, "columns": None, "rows_read": 0,
+                    "written": 0, "duplicates": 0, "skipped": 0, "errors": 0, "error_samples": [],
+                    "occurrences": {}, "message": None, "debits_positive": False}
+        for field in self.FIELDS:
+            setattr(self, field, state.get(field, defaults.get(field)))
+
+    def to_dict(self) -> Dict:
+        state = {field: getattr(self, field) for field in self.FIELDS}
+        state["progress"] = round(self.offset / self.total_bytes, 4) if self.total_bytes else None
+        return state
+
+
+class _ImportRun:
+    """Feeds one upload of a job through parsing, dedupe and batched writes."""
+
+    def __init__(self, job: ImportJob, batch_size: int):
+        self.job = job
+        self.batch_size = batch_size
+        self.splitter = RecordSplitter(job.format, job.offset)
+        self.pending = []
+        # Offset after the last record consumed, and counts since the last commit,
+        # so records re-sent after an interruption are not counted twice
+        self.consumed = job.offset
+        self.counts = {"rows_read": 0, "errors": 0, "skipped": 0}
+        self.error_samples = []
+        # How often each row's content has appeared in the file so far, so
+        # repeated identical rows get distinct ids
+        self.occurrences = dict(job.occurrences or {})
+        self.last_date = None
+
+    def feed(self, data: bytes):
+        self._consume(self.splitter.feed(data))
+
+    def finish(self):
+        self._consume(self.splitter.finish())
+        # Trailing bytes outside any record (OFX footers) are consumed too
+        self.consumed = self.splitter.offset
+        self.flush()
+        self.job.status = "complete"
+        ImportService.save(self.job)
+
+    def _consume(self, records: List[Tuple[bytes, int]]):
+        job = self.job
+        for record, end in records:
+            self.consumed = end
+            if job.format == "csv" and job.columns is None:
+                job.columns = StatementParser.csv_columns(next(csv.reader([record.decode("utf-8-sig")])))
+                # The header is committed at once, so a resumed upload never re-reads it
+                job.offset = end
+                continue
+            if not record.strip():
+                continue
+            self.counts["rows_read"] += 1
+            try:
+                if job.format == "csv":
+                    date, amount, description, category, reference = StatementParser.parse_csv(record, job.columns)
+                else:
+                    date, amount, description, category, reference = StatementParser.parse_ofx(record)
+            except (ValueError, StopIteration, IndexError) as e:
+                self.counts["errors"] += 1
+                self.error_samples.append({"offset": end, "error": str(e)})
+                continue
+            spent = amount if job.debits_positive else -amount
+            if spent <= 0:
+                # Deposits, refunds and card payments are not spending
+                self.counts["skipped"] += 1
+                continue
+            spent = round(spent, 2)
+            key = f"{date}|{ImportService.content_digest(job.user_id, date, spent, description, reference)[:16]}"
+            occurrence = self.occurrences.get(key, 0)
+            self.occurrences[key] = occurrence + 1
+            self.last_date = date
+            self.pending.append(ImportService.transaction(job.user_id, date, spent, description, category,
+                                                          reference, occurrence))
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        job = self.job
+        batch, self.pending = self.pending, []
+        if batch:
+            unique = {get_store().date_key(tx['date'], tx['id']): tx for tx in batch}
+            existing = get_store().existing_date_ids(job.user_id, unique)
+            new = [tx for key, tx in unique.items() if key not in existing]
+            written = get_store().batch_add_transactions(new)
+            if written != len(new):
+                raise RuntimeError(f"Wrote {written} of {len(new)} transactions")
+            RollupService.record_many(new)
+            BudgetService.record_many(new)
+            TransactionCache.invalidate(job.user_id)
+            job.written += written
+            job.duplicates += len(batch) - len(new)
+        for name, count in self.counts.items():
+            setattr(job, name, getattr(job, name) + count)
+            self.counts[name] = 0
+        job.error_samples = (job.error_samples + self.error_samples)[:ImportService.MAX_ERROR_SAMPLES]
+        self.error_samples = []
+        job.offset = self.consumed
+        # Identical rows share a date, and exports are sorted by date, so the
+        # counts of the current date are enough to resume
+        if self.last_date is not None:
+            prefix = f"{self.last_date}|"
+            job.occurrences = {key: n for key, n in self.occurrences.items() if key.startswith(prefix)}
+        ImportService.save(job)
+
+
+class ImportService:
+    """
+    Streaming bulk import of bank exports (CSV or OFX).
+
+    Uploads are parsed record by record as bytes arrive, canonicalized with
+    DataPrepService and written BATCH_SIZE rows at a time through
+    batch_writer. A transaction's id is a hash of its content (date,
+    amount, description and, when the export has them, its reference or
+    running balance), so re-importing an overlapping export skips rows that
+    already exist; they are found with one BatchGetItem per 100 rows. The
+    second and later copies of an identical row in one file also hash their
+    occurrence number, so they are kept as separate purchases.
+
+    Each job records the byte offset up to which rows are committed. An
+    interrupted upload resumes by sending the rest of the file from that
+    offset. If a batch fails part-way, resuming skips its written rows
+    without re-adding them to the rollups and budget counters; run
+    RollupService.rebuild to repair totals.
+    """
+    FORMATS = ("csv", "ofx")
+    BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '500'))
+    STATE_DIR = os.getenv('IMPORT_STATE_DIR', os.path.join(tempfile.gettempdir(), 'fintwin-imports'))
+    MAX_ERROR_SAMPLES = 20
+
+    _jobs: Dict[str, ImportJob] = {}
+    _running = set()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def content_digest(user_id: str, date: str, amount: float, description: str, reference: str,
+                       occurrence: int = 0) -> str:
+        content = f"{user_id}|{date}|{amount:.2f}|{description}|{reference}"
+        if occurrence:
+            # First copies keep the ids of earlier imports
+            content += f"|{occurrence}"
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    @classmethod
+    def transaction(cls, user_id: str, date: str, amount: float, description: str, category: str,
+                    reference: str, occurrence: int = 0) -> Dict:
+        digest = cls.content_digest(user_id, date, amount, description, reference, occurrence)
+        tx = {
+            # 53 bits, so ids stay exact in JavaScript clients
+            "id": int(digest[:14], 16) & (2 ** 53 - 1),
+            "user_id": user_id,
+            "category": category or "Other",
+            "amount": amount,
+            "date": date,
+            "merchant": description,
+        }
+        return DataPrepService.canonicalize(tx)
+
+    @classmethod
+    def _path(cls, job_id: str) -> str:
+        return os.path.join(cls.STATE_DIR, f"{job_id}.json")
+
+    @classmethod
+    def save(cls, job: ImportJob):
+        job.updated_at = time.time()
+        os.makedirs(cls.STATE_DIR, exist_ok=True)
+        tmp = cls._path(job.job_id) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(job.to_dict(), f)
+        os.replace(tmp, cls._path(job.job_id))
+
+    @classmethod
+    def get_job(cls, job_id: str) -> Optional[ImportJob]:
+        with cls._lock:
+            job = cls._jobs.get(job_id)
+            if job is None and re.fullmatch(r"[\w-]+", job_id) and os.path.exists(cls._path(job_id)):
+                with open(cls._path(job_id)) as f:
+                    state = json.load(f)
+                state.pop("progress", None)
+                job = cls._jobs[job_id] = ImportJob(**state)
+            return job
+
+    @classmethod
+    def create_job(cls, user_id: str, fmt: str, job_id: str = None, debits_positive: bool = False) -> ImportJob:
+        if fmt not in cls.FORMATS:
+            raise ValueError(f"format must be one of {cls.FORMATS}")
+        if job_id is not None and not re.fullmatch(r"[\w-]{1,64}", job_id):
+            raise ValueError("job_id may only contain letters, digits, '_' and '-'")
+        job = ImportJob(job_id=job_id or uuid.uuid4().hex, user_id=user_id, format=fmt,
+                        debits_positive=debits_positive, created_at=time.time())
+        with cls._lock:
+            cls._jobs[job.job_id] = job
+        cls.save(job)
+        return job
+
+    @classmethod
+    def _start(cls, job_id: str, offset: int, total_bytes: Optional[int]) -> _ImportRun:
+        job = cls.get_job(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        with cls._lock:
+            if job_id in cls._running:
+                raise ImportOffsetError(f"Import {job_id} is already receiving data", job.offset)
+            if job.status == "complete":
+                raise ImportOffsetError(f"Import {job_id} is already complete", job.offset)
+            if offset != job.offset:
+                raise ImportOffsetError(f"Import {job_id} resumes at byte {job.offset}, not {offset}", job.offset)
+            cls._running.add(job_id)
+        job.status, job.message = "running", None
+        if total_bytes is not None:
+            job.total_bytes = offset + total_bytes
+        return _ImportRun(job, cls.BATCH_SIZE)
+
+    @classmethod
+    def _stop(cls, run: _ImportRun, error: BaseException = None):
+        if error is not None:
+            # Rows after the last committed batch are sent again on resume
+            run.job.status = "failed" if isinstance(error, ValueError) else "interrupted"
+            run.job.message = str(error) or type(error).__name__
+            cls.save(run.job)
+        with cls._lock:
+            cls._running.discard(run.job.job_id)
+
+    @classmethod
+    async def aimport_stream(cls, job_id: str, chunks: AsyncIterator[bytes], offset: int = 0,
+                             total_bytes: int = None) -> Dict:
+        """
+        Imports an upload body for the job, starting at byte `offset` of the
+        file. Parsing and writes run on the AWS executor, one received chunk
+        at a time.
+        """
+        run = cls._start(job_id, offset, total_bytes)
+        try:
+            async for chunk in chunks:
+                await run_blocking(run.feed, chunk)
+            await run_blocking(run.finish)
+        except BaseException as e:
+            cls._stop(run, e)
+            raise
+        cls._stop(run)
+        return run.job.to_dict()
+
+    @classmethod
+    def import_file(cls, path: str, job_id: str, chunk_size: int = 1 << 20) -> Dict:
+        """Imports (or resumes importing) a local file for the job."""
+        job = cls.get_job(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        size = os.path.getsize(path)
+        run = cls._start(job_id, job.offset, size - job.offset)
+        try:
+            with open(path, "rb") as f:
+                f.seek(job.offset)
+                for chunk in iter(lambda: f.read(chunk_size), b""):
+                    run.feed(chunk)
+            run.finish()
+        except BaseException as e:
+            cls._stop(run, e)
+            raise
+        cls._stop(run)
+        return run.job.to_dict()
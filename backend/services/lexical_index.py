@@ -0,0 +1,145 @@
+import os
+import re
+import json
+from collections import Counter, defaultdict
+from typing import TYPE_CHECKING, Iterable, List, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+STOP_WORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just me more most
+my myself no nor not now of off on once only or other our ours ourselves out over own same she should
+so some such than that the their theirs them themselves then there these they this those through to
+too under until up very was we were what when where which while who whom why will with would you
+your yours yourself yourselves
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens with stop words removed."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+class BM25Index:
+    """
+    Inverted index with Okapi BM25 scoring.
+
+    Postings are stored as flat arrays (document ids and precomputed BM25
+    term weights) sliced per term by an offsets array, so a query is a few
+    vectorized slice-and-sum operations over the matching documents only.
+    `save` writes the arrays as .npy files that `load` memory-maps, which
+    keeps cold starts cheap.
+    """
+    FILES = ('offsets', 'doc_ids', 'weights', 'passage_offsets')
+
+    def __init__(self, vocab: dict, offsets: "np.ndarray", doc_ids: "np.ndarray", weights: "np.ndarray",
+                 passage_offsets: "np.ndarray", passages_blob, meta: dict):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.passage_offsets = passage_offsets
+        self._passages_blob = passages_blob
+        self.meta = meta
+
+    def __len__(self):
+        return len(self.passage_offsets) - 1
+
+    @classmethod
+    def build(cls, passages: Iterable[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        import numpy as np
+        passages = list(passages)
+        term_docs = defaultdict(list)
+        doc_lengths = np.zeros(len(passages), dtype=np.float32)
+        for doc_id, passage in enumerate(passages):
+            counts = Counter(tokenize(passage))
+            doc_lengths[doc_id] = sum(counts.values())
+            for term, tf in counts.items():
+                term_docs[term].append((doc_id, tf))
+
+        n_docs = len(passages)
+        avg_len = float(doc_lengths.mean()) if n_docs else 0.0
+        vocab, offsets, doc_ids, weights = {}, [0], [], []
+        for term_id, term in enumerate(sorted(term_docs)):
+            postings = term_docs[term]
+            vocab[term] = term_id
+            docs = np.fromiter((d for d, _ in postings), dtype=np.int32, count=len(postings))
+            tfs = np.fromiter((tf for _, tf in postings), dtype=np.float32, count=len(postings))
+            df = len(postings)
+            idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            norm = k1 * (1 - b + b * doc_lengths[docs] / (avg_len or 1))
+            doc_ids.append(docs)
+            weights.append((idf * tfs * (k1 + 1) / (tfs + norm)).astype(np.float32))
+            offsets.append(offsets[-1] + df)
+
+        encoded = [p.encode('utf-8') for p in passages]
+        passage_offsets = np.zeros(n_docs + 1, dtype=np.int64)
+        passage_offsets[1:] = np.cumsum([len(p) for p in encoded])
+        return cls(
+            vocab,
+            np.array(offsets, dtype=np.int64),
+            np.concatenate(doc_ids) if doc_ids else np.zeros(0, dtype=np.int32),
+            np.concatenate(weights) if weights else np.zeros(0, dtype=np.float32),
+            passage_offsets,
+            b"".join(encoded),
+            {'k1': k1, 'b': b, 'n_docs': n_docs, 'avg_len': avg_len},
+        )
+
+    def save(self, directory: str):
+        import numpy as np
+        os.makedirs(directory, exist_ok=True)
+        for name in self.FILES:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, 'passages.bin'), 'wb') as f:
+            f.write(bytes(self._passages_blob))
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump({**self.meta, 'vocab': self.vocab}, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "BM25Index":
+        import numpy as np
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode) for name in cls.FILES}
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        vocab = meta.pop('vocab')
+        passages_path = os.path.join(directory, 'passages.bin')
+        if mmap and os.path.getsize(passages_path):
+            passages_blob = np.memmap(passages_path, dtype=np.uint8, mode='r')
+        else:
+            with open(passages_path, 'rb') as f:
+                passages_blob = f.read()
+        return cls(vocab, passages_blob=passages_blob, meta=meta, **arrays)
+
+    def passage(self, doc_id: int) -> str:
+        start, end = self.passage_offsets[doc_id], self.passage_offsets[doc_id + 1]
+        return bytes(self._passages_blob[start:end]).decode('utf-8')
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[int, float]]:
+        """Top-k (doc id, BM25 score) pairs, best first; empty if no term matches."""
+        import numpy as np
+        term_ids = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+        if not term_ids:
+            return []
+        ranges = [(self.offsets[t], self.offsets[t + 1]) for t in term_ids]
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            docs, weights = self.doc_ids[start:end], self.weights[start:end]
+        else:
+            docs = np.concatenate([self.doc_ids[start:end] for start, end in ranges])
+            weights = np.concatenate([self.weights[start:end] for start, end in ranges])
+        # Only documents containing a query term are scored
+        candidates, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights, minlength=len(candidates))
+
+        if len(candidates) > k:
+            top = np.argpartition(scores, -k)[-k:]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.lexsort((candidates[top], -scores[top]))]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
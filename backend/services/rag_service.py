@@ -1,22 +1,167 @@
+import os
+import glob
+import shutil
+import logging
+import tempfile
+import threading
+from typing import List, Optional
+
+from services.lexical_index import BM25Index
+from services.vector_store import HashingEmbedder, VectorStore
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+def load_corpus(corpus_dir: str) -> List[str]:
+    """Passages from every .txt file in the corpus directory, split on blank lines."""
+    passages = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, '*.txt'))):
+        with open(path, encoding='utf-8') as f:
+            passages.extend(" ".join(p.split()) for p in f.read().split("\n\n") if p.strip())
+    return passages
+
+
 class RAGService:
-    @staticmethod
-    def retrieve_context(query: str) -> list:
+    """
+    Hybrid retrieval over the local knowledge corpus: BM25 keyword matches
+    and dense-vector (semantic) matches, merged by reciprocal rank fusion.
+
+    Row i of the vector store is passage i of the BM25 index. Passages added
+    with `add_passages` are appended to the vector store, so they are found
+    semantically at once, and to ADDED_FILE in the corpus, so the next
+    rebuild (which the newer corpus file triggers) indexes them for BM25 too.
+    """
+    CORPUS_DIR = os.getenv('RAG_CORPUS_DIR', os.path.join(DATA_DIR, 'knowledge'))
+    INDEX_DIR = os.getenv('RAG_INDEX_DIR', os.path.join(DATA_DIR, 'knowledge_index'))
+    TOP_K = int(os.getenv('RAG_TOP_K', '4'))
+    # Hashed embeddings of unrelated text still overlap slightly; ignore matches below this
+    MIN_SIMILARITY = float(os.getenv('RAG_MIN_SIMILARITY', '0.2'))
+    # Corpora at least this large get a k-means (IVF) index probing VECTOR_NPROBE clusters
+    CLUSTER_MIN_PASSAGES = int(os.getenv('RAG_CLUSTER_MIN_PASSAGES', '50000'))
+    VECTOR_NPROBE = int(os.getenv('RAG_VECTOR_NPROBE', '16'))
+    RRF_K = 60
+    FALLBACK = "General Financial Principles: Spend less than you earn."
+    # Corpus file that add_passages writes to
+    ADDED_FILE = 'added.txt'
+
+    embedder = HashingEmbedder()
+
+    _index = None
+    _vectors = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _vector_dir(cls) -> str:
+        return os.path.join(cls.INDEX_DIR, 'vectors')
+
+    @classmethod
+    def _index_is_fresh(cls) -> bool:
+        meta_path = os.path.join(cls.INDEX_DIR, 'meta.json')
+        if not os.path.exists(meta_path) or not os.path.exists(os.path.join(cls._vector_dir(), 'meta.json')):
+            return False
+        corpus_files = glob.glob(os.path.join(cls.CORPUS_DIR, '*.txt'))
+        newest = max((os.path.getmtime(p) for p in corpus_files), default=0)
+        return os.path.getmtime(meta_path) >= newest
+
+    @classmethod
+    def build_vectors(cls, passages: List[str], directory: str) -> VectorStore:
+        """Writes a fresh vector store for the passages, clustered if the corpus is large."""
+        shutil.rmtree(directory, ignore_errors=True)
+        store = VectorStore(directory, cls.embedder)
+        store.append(passages)
+        if len(store) >= cls.CLUSTER_MIN_PASSAGES:
+            store.build_clusters()
+        return store
+
+    @classmethod
+    def build_index(cls) -> BM25Index:
+        """Builds the BM25 index and vector store from the corpus into INDEX_DIR when writable."""
+        passages = load_corpus(cls.CORPUS_DIR)
+        index = BM25Index.build(passages)
+        try:
+            cls._vectors = cls.build_vectors(passages, cls._vector_dir())
+            index.save(cls.INDEX_DIR)
+        except OSError as e:
+            # Read-only deployments keep the BM25 index in memory and vectors in a temp dir
+            logger.warning(f"Could not save RAG index to {cls.INDEX_DIR}: {e}")
+            cls._vectors = cls.build_vectors(passages, tempfile.mkdtemp(prefix='rag-vectors-'))
+        return index
+
+    @classmethod
+    def get_index(cls) -> BM25Index:
+        """The BM25 index, memory-mapped from disk if it is up to date, else built once."""
+        if cls._index is None:
+            with cls._lock:
+                if cls._index is None:
+                    if cls._index_is_fresh():
+                        cls._vectors = VectorStore(cls._vector_dir(), cls.embedder)
+                        cls._index = BM25Index.load(cls.INDEX_DIR)
+                    else:
+                        cls._index = cls.build_index()
+        return cls._index
+
+    @classmethod
+    def get_vector_store(cls) -> VectorStore:
+        cls.get_index()
+        return cls._vectors
+
+    @classmethod
+    def add_passages(cls, passages: List[str]) -> int:
         """
-        Simulates retrieval from AWS OpenSearch/S3.
-        Returns a list of relevant 'documents'.
+        Appends passages to the vector store without a rebuild and to the
+        corpus, so rebuilds keep them; returns the new size.
         """
-        # Mock knowledge base
-        knowledge_base = [
-            "Tax Rule 2024: Capital gains tax is 15% for long-term investments.",
-            "Economic Indicator: Inflation is currently at 3.2%.",
-            "Interest Rates: Average savings account APY is 4.5%.",
-            "Housing Market: Prices are trending up in your region."
+        # Blank lines separate corpus passages, so passages are kept on one line
+        passages = [" ".join(p.split()) for p in passages if p.strip()]
+        store = cls.get_vector_store()
+        with cls._lock:
+            try:
+                with open(os.path.join(cls.CORPUS_DIR, cls.ADDED_FILE), 'a', encoding='utf-8') as f:
+                    f.writelines(f"{passage}\n\n" for passage in passages)
+            except OSError as e:
+                logger.warning(f"Could not add passages to the corpus; a rebuild will drop them: {e}")
+            return store.append(passages)
+
+    @classmethod
+    def retrieve_ranked(cls, query: str, top_k: Optional[int] = None) -> List[dict]:
+        """
+        Passages ranked by reciprocal rank fusion of the BM25 and semantic
+        result lists, as dicts with `text`, fused `score` and the per-method
+        `lexical_score` / `semantic_score` (None where a method missed).
+        """
+        top_k = top_k or cls.TOP_K
+        index = cls.get_index()
+        store = cls._vectors
+        # Fetch deeper than top_k so a passage ranked moderately by both methods can surface
+        depth = top_k * 2
+        lexical = index.search(query, depth)
+        semantic = [(row, score) for row, score in store.search(query, depth, cls.VECTOR_NPROBE)
+                    if score >= cls.MIN_SIMILARITY]
+
+        fused = {}
+        for method, results in (('lexical', lexical), ('semantic', semantic)):
+            for rank, (row, score) in enumerate(results):
+                entry = fused.setdefault(row, {'score': 0.0, 'lexical_score': None, 'semantic_score': None})
+                entry['score'] += 1.0 / (cls.RRF_K + rank + 1)
+                entry[f'{method}_score'] = score
+
+        ranked = sorted(fused.items(), key=lambda item: (-item[1]['score'], item[0]))[:top_k]
+        return [
+            {'text': index.passage(row) if row < len(index) else store.texts[row], **entry}
+            for row, entry in ranked
         ]
-        
-        # Simple keyword matching mock
-        results = [doc for doc in knowledge_base if any(word in doc.lower() for word in query.lower().split())]
-        
+
+    @classmethod
+    def retrieve_context(cls, query: str, top_k: Optional[int] = None) -> list:
+        """
+        Retrieves the passages most relevant to the query from the local
+        knowledge corpus, ranked by keyword and semantic similarity.
+        """
+        results = [result['text'] for result in cls.retrieve_ranked(query, top_k)]
+
         if not results:
-            return ["General Financial Principles: Spend less than you earn."]
-            
+            return [cls.FALLBACK]
+
         return results
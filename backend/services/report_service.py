@@ -0,0 +1,358 @@
+import os
+import zlib
+import asyncio
+import logging
+from io import BytesIO
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Dict, Iterable, Iterator, List
+
+from services.response_cache import ResponseCache
+from services.rollup_service import RollupService
+from services.single_flight import SingleFlight
+from services.transaction_service import TransactionService
+from services.aws_clients import iterate_blocking
+
+logger = logging.getLogger(__name__)
+
+# ReportLab is imported inside the renderers: it is slow to import and most
+# requests never build a PDF
+LETTER = (612.0, 792.0)
+inch = 72.0
+
+
+def render_summary_pdf(aggregates: Dict) -> bytes:
+    """One-page PDF of spending stats and top categories. Module-level so process pool workers can run it."""
+    from reportlab.pdfgen import canvas
+    from reportlab.lib import colors
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=LETTER)
+    width, height = LETTER
+
+    # Header
+    c.setFillColor(colors.HexColor('#0f172a'))
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(1 * inch, height - 1 * inch, "FinTwin Spending Summary")
+    c.setFont("Helvetica", 10)
+    c.setFillColor(colors.gray)
+    c.drawString(1 * inch, height - 1.25 * inch, f"Generated: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}")
+
+    # Basic stats
+    total_amount = aggregates["total"]
+    num_tx = aggregates["count"]
+    avg_tx = total_amount / num_tx if num_tx else 0
+
+    c.setFillColor(colors.HexColor('#111827'))
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(1 * inch, height - 1.75 * inch, "At-a-glance")
+    c.setFont("Helvetica", 11)
+    c.drawString(1 * inch, height - 2.05 * inch, f"Total spend: ${total_amount:,.2f}")
+    c.drawString(1 * inch, height - 2.3 * inch, f"Transactions: {num_tx}")
+    c.drawString(1 * inch, height - 2.55 * inch, f"Average ticket: ${avg_tx:,.2f}")
+
+    # Category chart (simple bar chart)
+    top_cats = [(item["category"], item["total"]) for item in aggregates["categories"][:5]]
+    if top_cats:
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(1 * inch, height - 3.1 * inch, "Top categories")
+        chart_x = 1 * inch
+        chart_y = height - 6 * inch
+        chart_width = 5 * inch
+        bar_height = 0.4 * inch
+        gap = 0.15 * inch
+        max_val = max(val for _, val in top_cats) or 1
+        for idx, (cat, val) in enumerate(top_cats):
+            y = chart_y - idx * (bar_height + gap)
+            bar_len = (val / max_val) * chart_width
+            c.setFillColor(colors.HexColor('#0f172a'))
+            c.roundRect(chart_x, y, bar_len, bar_height, 4, stroke=0, fill=1)
+            c.setFillColor(colors.white)
+            c.setFont("Helvetica-Bold", 9)
+            c.drawString(chart_x + 6, y + bar_height / 2 - 3, f"{cat}")
+            c.setFillColor(colors.HexColor('#0f172a'))
+            c.setFont("Helvetica", 9)
+            c.drawRightString(chart_x + chart_width + 0.75 * inch, y + bar_height / 2 - 3, f"${val:,.0f}")
+
+    # Footer note
+    c.setStrokeColor(colors.HexColor('#e5e7eb'))
+    c.line(1 * inch, 0.9 * inch, width - 1 * inch, 0.9 * inch)
+    c.setFont("Helvetica", 9)
+    c.setFillColor(colors.gray)
+    c.drawString(1 * inch, 0.7 * inch, "FinTwin • AI spending insight snapshot")
+
+    c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+class StreamingPdfWriter:
+    """
+    Minimal PDF writer that emits each page as soon as it is complete, so a
+    report of any length is sent with one page in memory. ReportLab's canvas
+    only writes the file on save(). Pages use the built-in Helvetica fonts;
+    the page tree, catalog and cross-reference table follow the last page.
+    """
+    FONTS = {"F1": "Helvetica", "F2": "Helvetica-Bold"}
+    # 1: catalog, 2: page tree (both written last), 3-4: fonts
+    FIRST_FREE_OBJECT = 5
+
+    def __init__(self, page_size=LETTER):
+        self.width, self.height = page_size
+        self._offset = 0
+        self._offsets = {}
+        self._next_object = self.FIRST_FREE_OBJECT
+        self._pages = []
+
+    def _object(self, number: int, body: bytes) -> bytes:
+        self._offsets[number] = self._offset
+        data = b"%d 0 obj\n%s\nendobj\n" % (number, body)
+        self._offset += len(data)
+        return data
+
+    def _allocate(self) -> int:
+        self._next_object += 1
+        return self._next_object - 1
+
+    def start(self) -> bytes:
+        data = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        self._offset = len(data)
+        for number, (name, font) in enumerate(self.FONTS.items(), 3):
+            data += self._object(number, b"<< /Type /Font /Subtype /Type1 /BaseFont /%s "
+                                         b"/Encoding /WinAnsiEncoding >>" % font.encode())
+        return data
+
+    def page(self, content: bytes) -> bytes:
+        stream = zlib.compress(content)
+        content_number, page_number = self._allocate(), self._allocate()
+        self._pages.append(page_number)
+        fonts = b" ".join(b"/%s %d 0 R" % (name.encode(), number)
+                          for number, name in enumerate(self.FONTS, 3))
+        return (
+            self._object(content_number, b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream"
+                         % (len(stream), stream))
+            + self._object(page_number, b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %g %g] "
+                                        b"/Resources << /Font << %s >> >> /Contents %d 0 R >>"
+                           % (self.width, self.height, fonts, content_number))
+        )
+
+    def finish(self) -> bytes:
+        kids = b" ".join(b"%d 0 R" % number for number in self._pages)
+        data = self._object(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._pages)))
+        data += self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        size = self._next_object
+        xref = b"xref\n0 %d\n0000000000 65535 f \n" % size
+        xref += b"".join(b"%010d 00000 n \n" % self._offsets[number] for number in range(1, size))
+        return data + xref + b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, self._offset)
+
+
+class PageContent:
+    """Drawing operations for one StreamingPdfWriter page (points, origin bottom-left)."""
+
+    def __init__(self):
+        self._ops = []
+
+    @staticmethod
+    def _escape(text: str) -> bytes:
+        raw = text.encode("cp1252", errors="replace")
+        return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+    def text(self, x: float, y: float, text: str, size: float = 9, bold: bool = False,
+             color=(0.07, 0.09, 0.15), align: str = "left"):
+        if align == "right":
+            from reportlab.pdfbase.pdfmetrics import stringWidth
+            x -= stringWidth(text, "Helvetica-Bold" if bold else "Helvetica", size)
+        self._ops.append(b"%.3f %.3f %.3f rg BT /%s %g Tf %.2f %.2f Td (%s) Tj ET"
+                         % (*color, b"F2" if bold else b"F1", size, x, y, self._escape(text)))
+
+    def line(self, x1: float, y1: float, x2: float, y2: float, color=(0.9, 0.91, 0.92)):
+        self._ops.append(b"%.3f %.3f %.3f RG 0.5 w %.2f %.2f m %.2f %.2f l S" % (*color, x1, y1, x2, y2))
+
+    def bytes(self) -> bytes:
+        return b"\n".join(self._ops)
+
+
+def iter_monthly_report(aggregates: Dict, pages: Iterable[List[Dict]], page_size=LETTER) -> Iterator[bytes]:
+    """
+    Yields a multi-page PDF, one page at a time: an overview, then a table of
+    transactions per month with the month's total and count (from the
+    rollups) in its heading. `pages` are the user's transactions in date
+    order, consumed lazily.
+    """
+    writer = StreamingPdfWriter(page_size)
+    width, height = page_size
+    left, right, top, bottom = 0.75 * inch, width - 0.75 * inch, height - 0.75 * inch, 0.9 * inch
+    row_height = 13
+    months = {m["month"]: m for m in aggregates["monthly"]}
+    state = {"page": None, "y": top, "number": 0}
+
+    def new_page():
+        state["page"], state["y"] = PageContent(), top
+        state["number"] += 1
+
+    def finish_page() -> bytes:
+        page = state["page"]
+        page.line(left, bottom - 10, right, bottom - 10)
+        page.text(left, bottom - 24, "FinTwin • Monthly spending report", size=8, color=(0.5, 0.5, 0.5))
+        page.text(right, bottom - 24, f"Page {state['number']}", size=8, color=(0.5, 0.5, 0.5), align="right")
+        return writer.page(page.bytes())
+
+    def table_header():
+        page, y = state["page"], state["y"]
+        for x, label, align in ((left, "Date", "left"), (left + 70, "Merchant", "left"),
+                                (left + 300, "Category", "left"), (right, "Amount", "right")):
+            page.text(x, y, label, size=8, bold=True, color=(0.4, 0.4, 0.45), align=align)
+        page.line(left, y - 4, right, y - 4)
+        state["y"] = y - row_height - 2
+
+    yield writer.start()
+
+    # Overview page
+    new_page()
+    page = state["page"]
+    page.text(left, top, "FinTwin Monthly Spending Report", size=18, bold=True)
+    page.text(left, top - 20, f"Generated: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}", size=10,
+              color=(0.5, 0.5, 0.5))
+    page.text(left, top - 50, f"Total spend: ${aggregates['total']:,.2f} across {aggregates['count']} transactions",
+              size=11)
+    y = top - 80
+    page.text(left, y, "Month", size=10, bold=True)
+    page.text(right - 90, y, "Transactions", size=10, bold=True, align="right")
+    page.text(right, y, "Total", size=10, bold=True, align="right")
+    for month in aggregates["monthly"]:
+        y -= row_height
+        if y < bottom:
+            # Longer histories list the remaining months on their own pages
+            yield finish_page()
+            new_page()
+            page, y = state["page"], top
+        page.text(left, y, month["month"], size=9)
+        page.text(right - 90, y, str(month["count"]), size=9, align="right")
+        page.text(right, y, f"${month['total']:,.2f}", size=9, align="right")
+    yield finish_page()
+
+    # One table per month, flowing across as many pages as it needs
+    current = None
+    new_page()
+    for rows in pages:
+        for tx in rows:
+            month = tx["date"][:7]
+            if month != current:
+                if state["y"] - 4 * row_height < bottom and current is not None:
+                    yield finish_page()
+                    new_page()
+                elif current is not None:
+                    state["y"] -= row_height
+                current = month
+                summary = months.get(month, {})
+                heading = datetime.strptime(month, "%Y-%m").strftime("%B %Y")
+                state["page"].text(left, state["y"], heading, size=13, bold=True)
+                state["page"].text(right, state["y"], f"${summary.get('total', 0):,.2f} · "
+                                   f"{summary.get('count', 0)} transactions", size=9, align="right")
+                state["y"] -= row_height + 6
+                table_header()
+            if state["y"] < bottom:
+                yield finish_page()
+                new_page()
+                table_header()
+            page, y = state["page"], state["y"]
+            page.text(left, y, tx["date"])
+            page.text(left + 70, y, str(tx.get("merchant", ""))[:42])
+            page.text(left + 300, y, str(tx.get("category", ""))[:24])
+            page.text(right, y, f"${float(tx['amount']):,.2f}", align="right")
+            state["y"] = y - row_height
+    if current is None:
+        state["page"].text(left, state["y"], "No transactions yet.", size=11)
+    yield finish_page()
+    yield writer.finish()
+
+
+class ReportService:
+    """
+    PDF exports, cached per (report, template version, user, data version).
+
+    The data version is TransactionService.data_version, the per-user tag
+    that every write bumps (the one behind the /api/spending ETags). It is
+    read before the data, so a write during a render leaves the report
+    under the older version. Summaries render in a process
+    pool. The monthly report streams page by page from a worker thread as
+    transactions are read, and is cached once complete if it is small
+    enough.
+    """
+    # Bump when a layout changes so cached PDFs are not served in the old layout
+    TEMPLATE_VERSIONS = {"summary": "2", "monthly": "1"}
+    PROCESS_WORKERS = int(os.getenv('REPORT_PROCESS_WORKERS', '2'))
+    MAX_CACHED_REPORT_BYTES = int(os.getenv('REPORT_CACHE_MAX_REPORT_BYTES', str(8 * 1024 * 1024)))
+    PAGE_SIZE = 500
+
+    # Memory-only: keys embed the per-process data tag, which no other process or restart reproduces
+    cache = ResponseCache(
+        ttl_seconds=float(os.getenv('REPORT_CACHE_TTL_SECONDS', '86400')),
+        max_entries=int(os.getenv('REPORT_CACHE_MAX_ENTRIES', '256')),
+        max_bytes=int(os.getenv('REPORT_CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+    )
+    # Concurrent exports of the same data share one render
+    flight = SingleFlight("report_pdf")
+    _pool = None
+
+    @classmethod
+    def cache_key(cls, report: str, user_id: str, version: str) -> str:
+        return f"{report}:{cls.TEMPLATE_VERSIONS[report]}:{user_id}:{version}"
+
+    @classmethod
+    def get_pool(cls):
+        """The render process pool, or None where processes are unavailable (some serverless runtimes)."""
+        if cls._pool is None and cls.PROCESS_WORKERS > 0:
+            try:
+                cls._pool = ProcessPoolExecutor(max_workers=cls.PROCESS_WORKERS)
+            except (OSError, NotImplementedError) as e:
+                logger.warning(f"Report process pool unavailable, rendering in threads: {e}")
+                cls.PROCESS_WORKERS = 0
+        return cls._pool
+
+    @classmethod
+    async def _render(cls, fn, *args):
+        loop = asyncio.get_running_loop()
+        pool = cls.get_pool()
+        if pool is not None:
+            try:
+                return await loop.run_in_executor(pool, fn, *args)
+            except BrokenProcessPool:
+                logger.warning("Report process pool broke; rendering in a thread")
+                cls._pool = None
+        return await loop.run_in_executor(None, fn, *args)
+
+    @classmethod
+    async def asummary_pdf(cls, user_id: str) -> bytes:
+        key = cls.cache_key("summary", user_id, TransactionService.data_version(user_id))
+        pdf = cls.cache.get(key)
+        if pdf is None:
+            pdf = await cls.flight.ado(key, cls._render_summary, user_id)
+            cls.cache.put(key, pdf)
+        return pdf
+
+    @classmethod
+    async def _render_summary(cls, user_id: str) -> bytes:
+        aggregates = await RollupService.aget_aggregates(user_id)
+        return await cls._render(render_summary_pdf, aggregates)
+
+    @classmethod
+    async def amonthly_report(cls, user_id: str) -> AsyncIterator[bytes]:
+        """The monthly report as PDF byte chunks: the cached file at once, or page by page."""
+        key = cls.cache_key("monthly", user_id, TransactionService.data_version(user_id))
+        pdf = cls.cache.get(key)
+        if pdf is not None:
+            yield pdf
+            return
+
+        aggregates = await RollupService.aget_aggregates(user_id)
+        pages = TransactionService.iter_user_transaction_pages(user_id, page_size=cls.PAGE_SIZE)
+        chunks, size = [], 0
+        async for chunk in iterate_blocking(iter_monthly_report(aggregates, pages)):
+            size += len(chunk)
+            if size <= cls.MAX_CACHED_REPORT_BYTES:
+                chunks.append(chunk)
+            yield chunk
+        if size <= cls.MAX_CACHED_REPORT_BYTES:
+            cls.cache.put(key, b"".join(chunks))
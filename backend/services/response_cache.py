@@ -0,0 +1,195 @@
+import time
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from services.aws_clients import run_blocking
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapses whitespace so prompts that differ only in formatting share an entry."""
+    return " ".join(prompt.split())
+
+
+def cache_key(model_id: str, prompt: str, inference_config: dict) -> str:
+    payload = json.dumps([model_id, normalize_prompt(prompt), inference_config], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of model responses (or other str/bytes values) with
+    a TTL and limits on entry count and total size. With `path` set, entries are also written to a
+    SQLite file so they survive restarts; a memory miss falls back to disk
+    and promotes a fresh disk entry into memory. Async callers use `aget`,
+    which does the disk read on the AWS executor.
+    """
+
+    # A disk store over its limits is trimmed to this share of them, so the next writes don't trim again
+    TRIM_RATIO = 0.9
+
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 1024,
+                 max_bytes: int = 8 * 1024 * 1024, path: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = path
+        self._entries = OrderedDict()  # key -> (value, stored_at wall-clock seconds)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # SQLite work is serialized separately, so disk I/O never holds up memory lookups
+        self._db_lock = threading.Lock()
+        self._db = None
+        self._disk_rows = 0
+        self._disk_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, stored_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_stored_at ON responses (stored_at)")
+            self._disk_rows, self._disk_bytes = self._disk_totals(self._db)
+        return self._db
+
+    @staticmethod
+    def _disk_totals(db: sqlite3.Connection):
+        return db.execute("SELECT COUNT(*), COALESCE(SUM(length(value)), 0) FROM responses").fetchone()
+
+    def _expired(self, stored_at: float) -> bool:
+        return time.time() - stored_at > self.ttl_seconds
+
+    def _remember(self, key: str, value: str, stored_at: float):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old[0])
+        if len(value) > self.max_bytes:
+            return
+        self._entries[key] = (value, stored_at)
+        self._bytes += len(value)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        """The memory tier of a lookup. A miss counts here only when there is no disk tier."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[1]):
+                self._bytes -= len(self._entries.pop(key)[0])
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if not self.path:
+                self.misses += 1
+            return None
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        """The disk tier of a lookup; a fresh row is promoted into memory."""
+        row = None
+        with self._db_lock:
+            try:
+                row = self._connection().execute(
+                    "SELECT value, stored_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache read failed: {e}")
+        with self._lock:
+            if row is not None and not self._expired(row[1]):
+                self._remember(key, row[0], row[1])
+                self.disk_hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._memory_get(key)
+        if value is None and self.path:
+            value = self._disk_get(key)
+        return value
+
+    async def aget(self, key: str) -> Optional[str]:
+        """get for async callers: memory is checked inline, disk on the AWS executor."""
+        value = self._memory_get(key)
+        if value is None and self.path:
+            value = await run_blocking(self._disk_get, key)
+        return value
+
+    def put(self, key: str, value: str):
+        stored_at = time.time()
+        with self._lock:
+            self._remember(key, value, stored_at)
+        if not self.path or len(value) > self.max_bytes:
+            return
+        with self._db_lock:
+            try:
+                db = self._connection()
+                with db:
+                    old = db.execute("SELECT length(value) FROM responses WHERE key = ?", (key,)).fetchone()
+                    db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, value, stored_at))
+                    self._disk_rows += 0 if old else 1
+                    self._disk_bytes += len(value) - (old[0] if old else 0)
+                    if self._disk_rows > self.max_entries or self._disk_bytes > self.max_bytes:
+                        self._trim(db, key, stored_at)
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache write failed: {e}")
+
+    def _trim(self, db: sqlite3.Connection, kept_key: str, now: float):
+        """
+        Drops expired rows, then the oldest ones until the disk store is back
+        under TRIM_RATIO of its limits. Totals are recounted, which also picks
+        up rows written by other processes sharing the file.
+        """
+        db.execute("DELETE FROM responses WHERE stored_at < ?", (now - self.ttl_seconds,))
+        rows, size = self._disk_totals(db)
+        max_rows, max_bytes = int(self.max_entries * self.TRIM_RATIO), self.max_bytes * self.TRIM_RATIO
+        doomed = []
+        if rows > max_rows or size > max_bytes:
+            oldest = db.execute(
+                "SELECT key, length(value) FROM responses WHERE key != ? ORDER BY stored_at", (kept_key,)
+            )
+            for key, length in oldest:
+                if rows <= max_rows and size <= max_bytes:
+                    break
+                doomed.append((key,))
+                rows -= 1
+                size -= length
+        db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self._disk_rows, self._disk_bytes = rows, size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.path:
+            with self._db_lock, self._connection() as db:
+                db.execute("DELETE FROM responses")
+                self._disk_rows = self._disk_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,102 @@
+from typing import Dict, Iterable, List
+from collections import defaultdict
+from services.storage import get_store
+from services.data_prep_service import DataPrepService
+
+
+class RollupService:
+    """
+    Materialized spending totals per (user, month, category).
+
+    Buckets are updated atomically as transactions are written, so monthly
+    and category totals are served in O(buckets) instead of re-reading every
+    transaction. `rebuild` recomputes them from the raw rows to repair drift.
+    Backends that aggregate in the database (SQLiteService) compute the
+    buckets at read time and ignore the updates.
+    """
+
+    @staticmethod
+    def _bucket_of(transaction: Dict):
+        # Rows are stored with canonical categories; normalize any row the
+        # backfill has not reached yet
+        if DataPrepService.is_stale(transaction):
+            transaction = DataPrepService.canonicalize(dict(transaction))
+        return transaction['date'][:7], transaction.get('category', 'Other')
+
+    @classmethod
+    def record(cls, transaction: Dict) -> bool:
+        month, category = cls._bucket_of(transaction)
+        return get_store().increment_rollup(transaction['user_id'], month, category, transaction['amount'])
+
+    @classmethod
+    def record_many(cls, transactions: Iterable[Dict]) -> int:
+        """Adds a batch of stored transactions with one update per touched bucket; returns the bucket count."""
+        buckets = cls.compute_buckets(transactions)
+        for user_id, user_buckets in buckets.items():
+            for b in user_buckets:
+                get_store().increment_rollup(user_id, b['month'], b['category'], round(b['total'], 2), b['count'])
+        return sum(len(user_buckets) for user_buckets in buckets.values())
+
+    @staticmethod
+    def summarize(buckets: Iterable[Dict]) -> Dict:
+        monthly = defaultdict(lambda: {"total": 0.0, "count": 0})
+        categories = defaultdict(lambda: {"total": 0.0, "count": 0})
+        for bucket in buckets:
+            for group, key in ((monthly, bucket['month']), (categories, bucket['category'])):
+                group[key]["total"] += bucket['total']
+                group[key]["count"] += bucket['count']
+
+        total = sum(m["total"] for m in monthly.values())
+        count = sum(m["count"] for m in monthly.values())
+        return {
+            "total": round(total, 2),
+            "count": count,
+            "monthly": [
+                {"month": month, "total": round(v["total"], 2), "count": v["count"]}
+                for month, v in sorted(monthly.items())
+            ],
+            # largest categories first
+            "categories": [
+                {"category": category, "total": round(v["total"], 2), "count": v["count"]}
+                for category, v in sorted(categories.items(), key=lambda x: x[1]["total"], reverse=True)
+            ],
+        }
+
+    @classmethod
+    def get_aggregates(cls, user_id: str, month_from: str = None, month_to: str = None) -> Dict:
+        return cls.summarize(get_store().get_rollups(user_id, month_from, month_to))
+
+    @classmethod
+    async def aget_aggregates(cls, user_id: str, month_from: str = None, month_to: str = None) -> Dict:
+        return cls.summarize(await get_store().aget_rollups(user_id, month_from, month_to))
+
+    @classmethod
+    def compute_buckets(cls, transactions: Iterable[Dict]) -> Dict[str, List[Dict]]:
+        """Groups raw transactions into rollup buckets, per user."""
+        totals = defaultdict(lambda: {"total": 0.0, "count": 0})
+        for tx in transactions:
+            month, category = cls._bucket_of(tx)
+            bucket = totals[(tx['user_id'], month, category)]
+            bucket["total"] += float(tx.get('amount', 0))
+            bucket["count"] += 1
+
+        buckets = defaultdict(list)
+        for (user_id, month, category), v in totals.items():
+            buckets[user_id].append({"month": month, "category": category, **v})
+        return buckets
+
+    @classmethod
+    def rebuild(cls, user_id: str = None, segments: int = None) -> Dict[str, int]:
+        """
+        Recomputes rollups from raw transactions: one user's partition, or every
+        user through a parallel scan. Returns the bucket count per user.
+        """
+        if user_id:
+            transactions = (tx for page, _ in get_store().iter_user_pages(user_id) for tx in page)
+        else:
+            transactions = (tx for page in get_store().iter_parallel_pages(segments) for tx in page)
+
+        buckets = cls.compute_buckets(transactions)
+        if user_id and user_id not in buckets:
+            buckets[user_id] = []
+        return {uid: get_store().replace_rollups(uid, user_buckets) for uid, user_buckets in buckets.items()}
@@ -0,0 +1,280 @@
+import os
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Demo profile served by /api/profile and used as the simulation defaults
+DEFAULT_PROFILE = {
+    "name": "Jane Doe",
+    "income": 5000,
+    "savings": 12000,
+    "debt": 500,
+    "goals": ["Buy a Car", "Europe Trip"]
+}
+
+
+class SimulationTooLargeError(ValueError):
+    """The requested paths and reported months would not fit the result memory budget."""
+
+
+class SimulationParams:
+    """
+    Inputs for a Monte Carlo projection. Rates are annual; amounts are
+    monthly (income, expenses, debt_payment) or current balances (savings,
+    debt). Goal amounts are in today's dollars, due at a month offset.
+    """
+    DISTRIBUTIONS = ("normal", "student_t")
+    # Request limits. Results are held as two float32 matrices of paths *
+    # reported months, and computing percentiles copies one of them
+    MAX_PATHS = int(os.getenv('SIMULATION_MAX_PATHS', '200000'))
+    MAX_MONTHS = 1200
+    MAX_RESULT_BYTES = int(os.getenv('SIMULATION_MAX_RESULT_BYTES', str(256 * 1024 * 1024)))
+    RESULT_BYTES_PER_VALUE = 12
+
+    def __init__(self, savings: float = DEFAULT_PROFILE["savings"], income: float = DEFAULT_PROFILE["income"],
+                 expenses: Optional[float] = None, debt: float = DEFAULT_PROFILE["debt"],
+                 debt_rate: float = 0.20, debt_payment: float = 100.0,
+                 return_mean: float = 0.06, return_vol: float = 0.15, return_distribution: str = "normal",
+                 return_df: float = 5.0, inflation_mean: float = 0.03, inflation_vol: float = 0.01,
+                 months: int = 360, paths: int = 10000, seed: Optional[int] = None,
+                 percentiles=(5, 25, 50, 75, 95), band_step: int = 12, goals: List[Dict] = None,
+                 chunk_size: Optional[int] = None):
+        if return_distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"return_distribution must be one of {self.DISTRIBUTIONS}")
+        if months < 1 or paths < 1 or band_step < 1:
+            raise ValueError("months, paths and band_step must be positive")
+        if paths > self.MAX_PATHS or months > self.MAX_MONTHS:
+            raise ValueError(f"at most {self.MAX_PATHS} paths and {self.MAX_MONTHS} months")
+        if return_distribution == "student_t" and return_df <= 2:
+            raise ValueError("return_df must be above 2 for a finite variance")
+        if not all(0 <= p <= 100 for p in percentiles) or 50 not in percentiles:
+            raise ValueError("percentiles must lie in [0, 100] and include 50")
+        self.savings = savings
+        self.income = income
+        # Without an expense figure, assume the typical 70% of take-home pay is spent
+        self.expenses = income * 0.7 if expenses is None else expenses
+        self.debt = debt
+        self.debt_rate = debt_rate
+        self.debt_payment = debt_payment
+        self.return_mean = return_mean
+        self.return_vol = return_vol
+        self.return_distribution = return_distribution
+        self.return_df = return_df
+        self.inflation_mean = inflation_mean
+        self.inflation_vol = inflation_vol
+        self.months = months
+        self.paths = paths
+        self.seed = seed
+        self.percentiles = tuple(sorted(percentiles))
+        self.band_step = band_step
+        self.goals = [g for g in (goals or []) if 1 <= g["month"] <= months]
+        self.chunk_size = chunk_size
+        # Months with a band: every band_step-th, the last, and each goal's
+        self.report_months = sorted(set(range(band_step, months + 1, band_step)) | {months}
+                                    | {g["month"] for g in self.goals})
+        if self.result_bytes > self.MAX_RESULT_BYTES:
+            raise SimulationTooLargeError(
+                f"{paths} paths over {len(self.report_months)} reported months need about "
+                f"{self.result_bytes // 2 ** 20} MB, above the {self.MAX_RESULT_BYTES // 2 ** 20} MB limit; "
+                f"use fewer paths or a larger band_step")
+
+    @property
+    def result_bytes(self) -> int:
+        return self.paths * len(self.report_months) * self.RESULT_BYTES_PER_VALUE
+
+
+class MonteCarloEngine:
+    """
+    Projects savings, debt and goals over many random market paths at once.
+
+    Investment returns are lognormal (or fat-tailed Student-t in log space)
+    and drawn per path and month; inflation is drawn per path and year. The
+    debt balance is deterministic: fixed rate and payment, with the payment
+    redirected to savings once the debt is cleared. Savings follow
+        s_t = s_{t-1} * G_t / G_{t-1} + c_t,
+    evaluated without a per-month loop through the closed form
+        s_t = G_t * (s_0 + sum_{k<=t} c_k / G_k),
+    where log G is a cumulative sum of log-returns, so the whole path matrix
+    costs two cumsum passes and one exp.
+
+    Paths are generated in fixed blocks of PATH_BLOCK, each with its own
+    seed derived from the run seed, so results depend only on the seed and
+    path count, never on chunk_size. Chunks are processed one at a time and
+    only the months reported in the bands are kept, which bounds memory at
+    about chunk_size * months * 4 bytes plus paths * reported months * 12
+    (SimulationParams.MAX_RESULT_BYTES).
+    The default chunk of 8192 paths (12 MB at 360 months) stays cache
+    friendly; larger chunks are slower, not faster.
+    """
+    PATH_BLOCK = 4096
+    DEFAULT_CHUNK_PATHS = int(os.getenv('SIMULATION_CHUNK_PATHS', str(2 * 4096)))
+
+    @staticmethod
+    def debt_schedule(params: SimulationParams):
+        """(balance, payment) per month for the deterministic debt paydown, and the payoff month or None."""
+        import numpy as np
+        balance = np.zeros(params.months)
+        payment = np.zeros(params.months)
+        remaining, payoff = float(params.debt), None
+        monthly_rate = params.debt_rate / 12
+        for t in range(params.months):
+            if remaining <= 0:
+                break
+            remaining *= 1 + monthly_rate
+            paid = min(params.debt_payment, remaining)
+            remaining -= paid
+            payment[t], balance[t] = paid, remaining
+            if remaining <= 1e-9:
+                payoff = t + 1
+        return balance, payment, payoff
+
+    @staticmethod
+    def _draw_block(params: SimulationParams, seed: "np.random.SeedSequence", returns: "np.ndarray",
+                    inflation: "np.ndarray"):
+        """
+        Fills one block's standardized monthly return and yearly inflation
+        shocks in place. The second half of the block mirrors the first
+        (antithetic variates), which halves the draws and tightens the bands.
+        """
+        import numpy as np
+        # SFC64 generates normals about twice as fast as the default PCG64
+        rng = np.random.Generator(np.random.SFC64(seed))
+        half = -(-len(returns) // 2)
+        if params.return_distribution == "normal":
+            rng.standard_normal(out=returns[:half], dtype=np.float32)
+        else:
+            df = params.return_df
+            returns[:half] = rng.standard_t(df, returns[:half].shape) * np.sqrt((df - 2) / df)  # unit variance
+        rng.standard_normal(out=inflation[:half], dtype=np.float32)
+        np.negative(returns[:len(returns) - half], out=returns[half:])
+        np.negative(inflation[:len(inflation) - half], out=inflation[half:])
+
+    @classmethod
+    def _simulate_chunk(cls, params: SimulationParams, seeds: "List[np.random.SeedSequence]", rows: int,
+                        payment: "np.ndarray", report_idx: "np.ndarray"):
+        """Nominal and real savings at the report months for the chunk's paths."""
+        import numpy as np
+        years = -(-params.months // 12)
+        shocks = np.empty((rows, years * 12), dtype=np.float32)
+        inflation = np.empty((rows, years), dtype=np.float32)
+        for i, seed in enumerate(seeds):
+            lo = i * cls.PATH_BLOCK
+            hi = min(lo + cls.PATH_BLOCK, rows)
+            cls._draw_block(params, seed, shocks[lo:hi], inflation[lo:hi])
+
+        # log G_t = sigma * W_t + mu * t, with W the running sum of shocks and the
+        # drift set so the compounded annual mean return is return_mean
+        sigma = params.return_vol / np.sqrt(12)
+        mu = np.log1p(params.return_mean) / 12 - sigma ** 2 / 2
+        t = np.arange(1, years * 12 + 1, dtype=np.float32)
+        np.cumsum(shocks, axis=1, out=shocks)
+        log_growth = shocks[:, report_idx] * np.float32(sigma) + np.float32(mu) * t[report_idx]
+
+        # Log price level: one inflation rate per path and year, compounding monthly within the year
+        inflation *= np.float32(params.inflation_vol / 12)
+        inflation += np.float32(np.log1p(params.inflation_mean) / 12)
+        year_start = np.cumsum(inflation, axis=1) * 12
+        year_start -= inflation * 12
+        report_year, report_step = report_idx // 12, report_idx % 12 + 1
+        log_price = year_start[:, report_year] + inflation[:, report_year] * report_step
+
+        # The debt payment only comes out of savings until the debt is cleared,
+        # so its discounted sum is computed over those first months alone
+        paying = int(np.count_nonzero(payment))
+        debt_paid = np.zeros_like(log_growth)
+        if paying:
+            early = shocks[:, :paying] * np.float32(-sigma) - np.float32(mu) * t[:paying]
+            np.exp(early, out=early)
+            early *= payment[:paying].astype(np.float32)
+            np.cumsum(early, axis=1, out=early)
+            debt_paid = early[:, np.minimum(report_idx, paying - 1)]
+
+        # Surplus income rises with prices: sum_k surplus * P_k / G_k, built in
+        # place as exp(log|surplus| + log P - log G) so the full path matrix
+        # costs one cumsum, one scale, one fused add, one exp and one cumsum
+        surplus = params.income - params.expenses
+        if surplus:
+            shocks *= np.float32(-sigma)
+            by_month = shocks.reshape(rows, years, 12)
+            offset = np.float32(np.log(abs(surplus))) - np.float32(mu) * t.reshape(years, 12)
+            for step in range(12):
+                by_month[:, :, step] += year_start + inflation * np.float32(step + 1) + offset[:, step]
+            np.exp(shocks, out=shocks)
+            np.cumsum(shocks, axis=1, out=shocks)
+            income_saved = shocks[:, report_idx] * np.float32(np.sign(surplus))
+        else:
+            income_saved = np.zeros_like(log_growth)
+
+        savings = income_saved - debt_paid
+        savings += np.float32(params.savings)
+        savings *= np.exp(log_growth)
+        return savings.T, (savings * np.exp(-log_price)).T
+
+    @classmethod
+    def run(cls, params: SimulationParams) -> Dict:
+        import numpy as np
+        balance, payment, payoff = cls.debt_schedule(params)
+        report_months = params.report_months
+        report_idx = np.array(report_months) - 1
+
+        n_blocks = -(-params.paths // cls.PATH_BLOCK)
+        block_seeds = np.random.SeedSequence(params.seed).spawn(n_blocks)
+        chunk_blocks = max(1, (params.chunk_size or cls.DEFAULT_CHUNK_PATHS) // cls.PATH_BLOCK)
+
+        # Time-major, so the percentile partitions run over contiguous rows
+        nominal = np.empty((len(report_months), params.paths), dtype=np.float32)
+        real = np.empty_like(nominal)
+        for first in range(0, n_blocks, chunk_blocks):
+            seeds = block_seeds[first:first + chunk_blocks]
+            lo = first * cls.PATH_BLOCK
+            hi = min(lo + len(seeds) * cls.PATH_BLOCK, params.paths)
+            nominal[:, lo:hi], real[:, lo:hi] = cls._simulate_chunk(params, seeds, hi - lo, payment, report_idx)
+
+        nominal_bands = np.percentile(nominal, params.percentiles, axis=1)
+        real_bands = np.percentile(real, params.percentiles, axis=1)
+        debt_at = balance[report_idx]
+        column = {month: i for i, month in enumerate(report_months)}
+        final = real[-1]
+        return {
+            "paths": params.paths,
+            "months": params.months,
+            "seed": params.seed,
+            "percentiles": list(params.percentiles),
+            "bands": {
+                "month": report_months,
+                "savings": {f"{p:g}": np.round(row, 2).tolist() for p, row in zip(params.percentiles, nominal_bands)},
+                "real_savings": {f"{p:g}": np.round(row, 2).tolist() for p, row in zip(params.percentiles, real_bands)},
+                "debt": np.round(debt_at, 2).tolist(),
+            },
+            "debt_payoff_month": payoff if params.debt > 0 else 0,
+            "goals": [
+                {**goal, "probability": float(np.mean(real[column[goal["month"]]] >= goal["amount"]))}
+                for goal in params.goals
+            ],
+            "final": {
+                "median_real_savings": round(float(np.median(final)), 2),
+                "mean_real_savings": round(float(final.mean()), 2),
+                "probability_shortfall": float(np.mean(final < 0)),
+            },
+        }
+
+    @staticmethod
+    def summarize(result: Dict) -> str:
+        """Plain-text digest of a run, for the LLM to narrate."""
+        bands = result["bands"]["real_savings"]
+        low_p, high_p = result["percentiles"][0], result["percentiles"][-1]
+        low, mid, high = bands[f"{low_p:g}"], bands["50"], bands[f"{high_p:g}"]
+        years = result["months"] // 12
+        lines = [
+            f"{result['paths']} simulated market paths over {years} years (amounts in today's dollars).",
+            f"Savings after {years} years: median ${mid[-1]:,.0f}, "
+            f"range ${low[-1]:,.0f} to ${high[-1]:,.0f} ({low_p:g}th-{high_p:g}th percentile).",
+            f"Chance of ending with negative savings: {result['final']['probability_shortfall']:.0%}.",
+        ]
+        if result["debt_payoff_month"]:
+            lines.append(f"Debt is paid off in month {result['debt_payoff_month']}.")
+        for goal in result["goals"]:
+            lines.append(f"Goal '{goal['name']}' (${goal['amount']:,.0f} by month {goal['month']}): "
+                         f"{goal['probability']:.0%} chance.")
+        return "\n".join(lines)
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key (the leader) runs the computation; callers
+    that arrive while it is in flight wait for, and share, its result or
+    exception. Nothing is remembered once the call completes, so this
+    de-duplicates bursts without acting as a cache. Shared results must be
+    treated as read-only.
+
+    `do` serves threads and `ado` serves coroutines; both wait on the same
+    in-flight call, so a sync caller can share an async leader's result and
+    vice versa.
+    """
+    _registry: Dict[str, "SingleFlight"] = {}
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        SingleFlight._registry[name] = self
+
+    def _join(self, key: Hashable):
+        """Returns (future, is_leader) for the key's in-flight call."""
+        with self._lock:
+            self.calls += 1
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.executions += 1
+            return future, True
+
+    def _settle(self, key: Hashable, future: Future, result=None, error: BaseException = None):
+        # Forget the call before waking waiters, so later callers start a new one
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs):
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, result)
+        return result
+
+    async def ado(self, key: Hashable, fn: Callable[..., Awaitable], *args, **kwargs):
+        """
+        Async variant: `fn` is a coroutine function. The leader's computation
+        runs as its own task, so a caller that is cancelled (for example a
+        disconnected client) stops waiting without cancelling it for the rest.
+        """
+        future, leader = self._join(key)
+        if leader:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+
+            def on_done(task):
+                if task.cancelled():
+                    self._settle(key, future, error=asyncio.CancelledError())
+                else:
+                    self._settle(key, future, task.result() if task.exception() is None else None,
+                                 task.exception())
+            task.add_done_callback(on_done)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
+
+    @classmethod
+    def all_stats(cls) -> dict:
+        return {name: flight.stats() for name, flight in cls._registry.items()}
@@ -1,23 +1,24 @@
+from typing import List
+
+from services.budget_service import BudgetService
+from services.transaction_service import DEFAULT_USER_ID
+
+
 class SmartSpendEngine:
     @staticmethod
-    def check_spending(amount: float, category: str):
+    def check_spending(amount: float, category: str, user_id: str = DEFAULT_USER_ID):
         """
-        Real-time engine to check if a purchase violates budget rules.
+        Real-time engine to check if a purchase violates budget rules, given
+        what the user has already spent this day, week and month.
         """
-        # Mock thresholds
-        thresholds = {
-            "Food": 500,
-            "Shopping": 300,
-            "Transport": 200
-        }
-        
-        limit = thresholds.get(category, 1000)
-        
-        if amount > limit:
-            return {
-                "allowed": False, 
-                "alert": f"Alert: This purchase exceeds your {category} limit of ${limit}.",
-                "suggestion": "Consider deferring this purchase or finding a cheaper alternative."
-            }
-        
-        return {"allowed": True, "alert": None}
+        return BudgetService.check(user_id, amount, category)
+
+    @staticmethod
+    async def acheck_spending(amount: float, category: str, user_id: str = DEFAULT_USER_ID):
+        return await BudgetService.acheck(user_id, amount, category)
+
+    @staticmethod
+    async def acheck_spending_batch(amounts: List[float], categories: List[str], user_id: str = DEFAULT_USER_ID,
+                                    cumulative: bool = False):
+        """Vectorized check of many candidate purchases; see BudgetService.check_batch."""
+        return await BudgetService.acheck_batch(user_id, amounts, categories, cumulative=cumulative)
@@ -0,0 +1,297 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+from datetime import date as Date, timedelta
+
+from services.storage import KeyCollisionError, TransactionStore
+
+logger = logging.getLogger(__name__)
+
+# Sorts after any "<date>#<id>" date_id, as an open upper bound
+_MAX_KEY = "\uffff"
+
+
+class SQLiteService(TransactionStore):
+    """
+    Transactions in an embedded SQLite file (SQLITE_PATH), for local and
+    edge deployments without DynamoDB.
+
+    The table is clustered on (user_id, date_id), which serves user and
+    date range queries as index range scans, and (user_id, category,
+    date_id) serves category filters. The database runs in WAL mode, so
+    readers never wait for a writer, and every thread keeps its own
+    connection. Statement texts are constant and take their values as
+    parameters, so each connection prepares a statement once and reuses it
+    from its statement cache.
+
+    Monthly rollups and budget windows are not materialized: get_rollups and
+    get_budget_counters compute them with GROUP BY over the clustered index,
+    which keeps them exact, and the increment_/replace_ methods do nothing.
+    """
+    NAME = "sqlite"
+    PATH = os.getenv('SQLITE_PATH', 'fintwin.sqlite3')
+    # Rows per page when the caller does not set a page size
+    PAGE_ROWS = int(os.getenv('SQLITE_PAGE_ROWS', '1000'))
+    BUSY_TIMEOUT_SECONDS = float(os.getenv('SQLITE_BUSY_TIMEOUT_SECONDS', '5'))
+    # Placeholders per IN (...) list
+    BATCH_GET_KEYS = 100
+
+    # Stored columns; any other attributes of a transaction go to `extra` as JSON
+    COLUMNS = ('id', 'user_id', 'category', 'amount', 'date', 'merchant', 'raw_merchant', 'raw_category',
+               'rules_version')
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS transactions (
+            user_id TEXT NOT NULL,
+            date_id TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            amount REAL NOT NULL,
+            date TEXT NOT NULL,
+            merchant TEXT,
+            raw_merchant TEXT,
+            raw_category TEXT,
+            rules_version TEXT,
+            extra TEXT,
+            PRIMARY KEY (user_id, date_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS transactions_user_category ON transactions (user_id, category, date_id);
+        CREATE TABLE IF NOT EXISTS budget_limits (
+            user_id TEXT PRIMARY KEY,
+            limits TEXT NOT NULL
+        );
+    """
+
+    SELECT = f"SELECT {', '.join(COLUMNS)}, extra FROM transactions"
+    INSERT = (f"INSERT INTO transactions (date_id, {', '.join(COLUMNS)}, extra) "
+              f"VALUES ({', '.join('?' * (len(COLUMNS) + 2))})")
+    UPSERT = INSERT.replace("INSERT INTO", "INSERT OR REPLACE INTO", 1)
+    # date_id >= lower bound (date_from) AND > start key AND <= upper bound (date_to)
+    USER_PAGE = f"{SELECT} WHERE user_id = ? AND date_id >= ? AND date_id > ? AND date_id <= ? ORDER BY date_id LIMIT ?"
+    # Without ANALYZE statistics the planner would walk the user's whole partition instead
+    CATEGORY_PAGE = (f"{SELECT} INDEXED BY transactions_user_category WHERE user_id = ? AND category = ? "
+                     f"AND date_id >= ? AND date_id > ? AND date_id <= ? ORDER BY date_id LIMIT ?")
+    ALL_PAGE = f"{SELECT} WHERE (user_id, date_id) > (?, ?) ORDER BY user_id, date_id LIMIT ?"
+    ROLLUPS = ("SELECT substr(date_id, 1, 7) AS month, category, SUM(amount), COUNT(*) FROM transactions "
+               "WHERE user_id = ? AND date_id >= ? AND date_id <= ? GROUP BY month, category")
+    WINDOW_TOTALS = ("SELECT category, SUM(amount) FROM transactions "
+                     "WHERE user_id = ? AND date_id >= ? AND date_id <= ? GROUP BY category")
+
+    _local = threading.local()
+    # Bumped by configure(), so threads reopen their connections on the new path
+    _generation = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, path: str = None):
+        """Points the backend at another database file (or reopens the current one)."""
+        with cls._lock:
+            cls.PATH = path or cls.PATH
+            cls._generation += 1
+
+    @classmethod
+    def describe(cls) -> str:
+        return f"{cls.NAME}: {cls.PATH}"
+
+    @classmethod
+    def _connect(cls, path: str) -> sqlite3.Connection:
+        db = sqlite3.connect(path, timeout=cls.BUSY_TIMEOUT_SECONDS, isolation_level=None, cached_statements=256)
+        db.execute("PRAGMA journal_mode=WAL")
+        # Safe with WAL: a power loss can lose the latest commits, never corrupt the file
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(cls.SCHEMA)
+        return db
+
+    @classmethod
+    def connection(cls) -> sqlite3.Connection:
+        local = cls._local
+        if getattr(local, 'generation', None) != cls._generation:
+            if getattr(local, 'db', None) is not None:
+                local.db.close()
+            local.db = cls._connect(cls.PATH)
+            local.generation = cls._generation
+        return local.db
+
+    @classmethod
+    def init_table(cls):
+        cls.connection()
+
+    @classmethod
+    def _to_row(cls, transaction: dict) -> tuple:
+        extra = {k: v for k, v in transaction.items() if k not in cls.COLUMNS}
+        return ((cls.date_key(transaction['date'], transaction['id']),)
+                + tuple(transaction.get(column) for column in cls.COLUMNS)
+                + (json.dumps(extra, default=str) if extra else None,))
+
+    @classmethod
+    def _from_rows(cls, rows) -> list:
+        columns = cls.COLUMNS
+        items = []
+        for row in rows:
+            item = {column: value for column, value in zip(columns, row) if value is not None}
+            if row[-1] is not None:
+                item.update(json.loads(row[-1]))
+            items.append(item)
+        return items
+
+    @classmethod
+    def add_transaction(cls, transaction: dict, if_absent: bool = False):
+        """
+        Stores one transaction. With `if_absent`, raises KeyCollisionError
+        instead of overwriting an existing row.
+        """
+        try:
+            cls.connection().execute(cls.INSERT if if_absent else cls.UPSERT, cls._to_row(transaction))
+            return True
+        except sqlite3.IntegrityError as e:
+            raise KeyCollisionError(cls.date_key(transaction['date'], transaction['id'])) from e
+        except sqlite3.Error as e:
+            logger.error(f"Error adding transaction: {e}")
+            return False
+
+    @classmethod
+    def batch_add_transactions(cls, transactions, table_name: str = None, table=None) -> int:
+        """Writes transactions in one SQLite transaction; returns how many were written."""
+        rows = [cls._to_row(transaction) for transaction in transactions]
+        db = cls.connection()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            db.executemany(cls.UPSERT, rows)
+            db.execute("COMMIT")
+        except sqlite3.Error as e:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            logger.error(f"Error batch writing transactions: {e}")
+            return 0
+        return len(rows)
+
+    @classmethod
+    def existing_date_ids(cls, user_id: str, date_ids) -> set:
+        """Which of the user's transaction keys (date_id values) are already stored."""
+        date_ids = list(dict.fromkeys(date_ids))
+        db = cls.connection()
+        found = set()
+        for start in range(0, len(date_ids), cls.BATCH_GET_KEYS):
+            chunk = date_ids[start:start + cls.BATCH_GET_KEYS]
+            rows = db.execute(f"SELECT date_id FROM transactions WHERE user_id = ? AND date_id IN "
+                              f"({', '.join('?' * len(chunk))})", (user_id, *chunk))
+            found.update(row[0] for row in rows)
+        return found
+
+    @classmethod
+    def iter_user_pages(cls, user_id: str, date_from: str = None, date_to: str = None,
+                        category: str = None, page_size: int = None, start_key: dict = None):
+        """
+        Yields (items, last_key) for each page of one user's transactions in
+        date order, optionally bounded to [date_from, date_to] (inclusive,
+        YYYY-MM-DD) and narrowed to one category. last_key is None on the
+        last page.
+        """
+        limit = page_size or cls.PAGE_ROWS
+        lower, upper = date_from or "", f"{date_to}#~" if date_to else _MAX_KEY
+        after = start_key['date_id'] if start_key else ""
+        db = cls.connection()
+        while True:
+            try:
+                if category:
+                    rows = db.execute(cls.CATEGORY_PAGE, (user_id, category, lower, after, upper, limit)).fetchall()
+                else:
+                    rows = db.execute(cls.USER_PAGE, (user_id, lower, after, upper, limit)).fetchall()
+            except sqlite3.Error as e:
+                logger.error(f"Error querying transactions: {e}")
+                raise
+            items = cls._from_rows(rows)
+            last_key = cls.key_of(items[-1], category) if len(rows) == limit else None
+            yield items, last_key
+            if not last_key:
+                break
+            after = last_key['date_id']
+
+    @classmethod
+    def iter_transaction_pages(cls, page_size: int = None, start_key: dict = None, **kwargs):
+        """Yields (items, last_key) for each page of the whole table, in (user_id, date_id) order."""
+        limit = page_size or cls.PAGE_ROWS
+        after = (start_key['user_id'], start_key['date_id']) if start_key else ("", "")
+        db = cls.connection()
+        while True:
+            items = cls._from_rows(db.execute(cls.ALL_PAGE, (*after, limit)).fetchall())
+            last_key = cls.key_of(items[-1]) if len(items) == limit else None
+            yield items, last_key
+            if not last_key:
+                break
+            after = (last_key['user_id'], last_key['date_id'])
+
+    @classmethod
+    def iter_parallel_pages(cls, total_segments: int = None, max_workers: int = None,
+                            page_size: int = None, table_name: str = None):
+        # A local file read is not latency bound, so segments would only add threads
+        for items, _ in cls.iter_transaction_pages(page_size):
+            yield items
+
+    @classmethod
+    def get_all_transactions(cls, parallel: bool = False, total_segments: int = None):
+        return list(cls.iter_transactions())
+
+    @classmethod
+    def get_rollups(cls, user_id: str, month_from: str = None, month_to: str = None) -> list:
+        """The user's totals per (month, category), optionally bounded to [month_from, month_to] (YYYY-MM)."""
+        upper = f"{month_to}~" if month_to else _MAX_KEY
+        rows = cls.connection().execute(cls.ROLLUPS, (user_id, month_from or "", upper)).fetchall()
+        return [{"user_id": user_id, "bucket": f"{month}#{category}", "month": month, "category": category,
+                 "total": round(total, 2), "count": count} for month, category, total, count in rows]
+
+    @classmethod
+    def increment_rollup(cls, user_id: str, month: str, category: str, amount: float, count: int = 1):
+        return True
+
+    @classmethod
+    def replace_rollups(cls, user_id: str, buckets: list) -> int:
+        return len(buckets)
+
+    @staticmethod
+    def _period_range(period: str):
+        """First and last day of a budget counter period ("day#2024-05-03", "week#2024-W18", "month#2024-05")."""
+        window, value = period.split("#")[:2]
+        if window == "day":
+            return value, value
+        if window == "week":
+            year, week = value.split("-W")
+            start = Date.fromisocalendar(int(year), int(week), 1)
+            return start.isoformat(), (start + timedelta(days=6)).isoformat()
+        return f"{value}-01", f"{value}-31"
+
+    @classmethod
+    def get_budget_counters(cls, user_id: str, prefixes: list) -> dict:
+        """Spend per "<period>#<category>" for each period prefix, summed from the transactions."""
+        db = cls.connection()
+        totals = {}
+        for prefix in prefixes:
+            period = prefix.rstrip("#")
+            first, last = cls._period_range(period)
+            for category, total in db.execute(cls.WINDOW_TOTALS, (user_id, first, f"{last}#~")):
+                totals[f"{period}#{category}"] = total
+        return totals
+
+    @classmethod
+    def increment_budget_counters(cls, user_id: str, counters: list, amount: float, expires_at: int) -> bool:
+        return True
+
+    @classmethod
+    def replace_budget_counters(cls, user_id: str, totals: dict, expires_at: int) -> int:
+        return len(totals)
+
+    @classmethod
+    def get_budget_limits(cls, user_id: str) -> dict:
+        row = cls.connection().execute("SELECT limits FROM budget_limits WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    @classmethod
+    def put_budget_limits(cls, user_id: str, limits: dict) -> bool:
+        try:
+            cls.connection().execute("INSERT OR REPLACE INTO budget_limits VALUES (?, ?)",
+                                     (user_id, json.dumps(limits)))
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error saving budget limits: {e}")
+            return False
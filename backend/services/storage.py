@@ -0,0 +1,132 @@
+"""
+Transaction storage backends.
+
+Services reach storage through `get_store()`, which returns the backend
+named by STORAGE_BACKEND: "dynamodb" (DynamoDBService, the default) or
+"sqlite" (SQLiteService, an embedded database file for local and edge
+deployments). Backends are classes of classmethods implementing
+TransactionStore. They are imported on first use, so a process only loads
+the one it runs on.
+"""
+import os
+import json
+import base64
+import importlib
+import threading
+from decimal import Decimal
+
+from services.aws_clients import iterate_blocking, run_blocking
+
+BACKENDS = {
+    'dynamodb': ('services.db_service', 'DynamoDBService'),
+    'sqlite': ('services.sqlite_service', 'SQLiteService'),
+}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class KeyCollisionError(Exception):
+    """A conditional put found an item already stored under the same key."""
+
+
+class TransactionStore:
+    """
+    What the services need from a backend. Transactions are partitioned per
+    user and ordered by date_id = "<date>#<id>"; a page's key ({"user_id",
+    "date_id"}) is the exclusive start of the next one.
+
+    Transactions: init_table, add_transaction, batch_add_transactions,
+    existing_date_ids, iter_user_pages (range query by date and category),
+    iter_transaction_pages/iter_parallel_pages/get_all_transactions (full
+    reads).
+    Aggregates: get_rollups (totals per month and category), the budget
+    counters and limits. Backends that aggregate at read time treat the
+    increment_/replace_ methods as no-ops.
+    """
+    NAME = None
+
+    @staticmethod
+    def date_key(date: str, tx_id) -> str:
+        return f"{date}#{tx_id}"
+
+    @staticmethod
+    def category_key(user_id: str, category: str) -> str:
+        return f"{user_id}#{category}"
+
+    @classmethod
+    def key_of(cls, item: dict, category: str = None) -> dict:
+        """
+        Key attributes of a returned item, usable as the start key of a user
+        query (and of a category query when `category` is set).
+        """
+        key = {'user_id': item['user_id'], 'date_id': cls.date_key(item['date'], item['id'])}
+        if category:
+            key['user_category'] = cls.category_key(item['user_id'], category)
+        return key
+
+    @staticmethod
+    def encode_cursor(key: dict) -> str:
+        raw = json.dumps(key, default=lambda d: int(d) if d == d.to_integral_value() else float(d))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> dict:
+        """Raises ValueError if the cursor is malformed."""
+        padded = cursor + '=' * (-len(cursor) % 4)
+        try:
+            key = json.loads(base64.urlsafe_b64decode(padded.encode()), parse_float=Decimal)
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+        if not isinstance(key, dict):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        return key
+
+    @classmethod
+    def describe(cls) -> str:
+        return cls.NAME
+
+    @classmethod
+    def iter_transactions(cls, page_size: int = None, start_key: dict = None):
+        """Yields transactions one by one across all pages."""
+        for items, _ in cls.iter_transaction_pages(page_size, start_key):
+            yield from items
+
+    @classmethod
+    def aiter_user_pages(cls, user_id: str, date_from: str = None, date_to: str = None,
+                         category: str = None, page_size: int = None, start_key: dict = None):
+        """iter_user_pages as an async iterator; each page is read on the AWS executor."""
+        return iterate_blocking(cls.iter_user_pages(user_id, date_from, date_to, category, page_size, start_key))
+
+    @classmethod
+    async def aget_rollups(cls, user_id: str, month_from: str = None, month_to: str = None) -> list:
+        return await run_blocking(cls.get_rollups, user_id, month_from, month_to)
+
+    @classmethod
+    async def aadd_transaction(cls, transaction: dict, if_absent: bool = False):
+        return await run_blocking(cls.add_transaction, transaction, if_absent)
+
+
+def load_backend(name: str):
+    try:
+        module, attr = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown storage backend '{name}'; use one of {sorted(BACKENDS)}") from None
+    return getattr(importlib.import_module(module), attr)
+
+
+def get_store():
+    """The configured backend class (STORAGE_BACKEND, default dynamodb)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = load_backend(os.getenv('STORAGE_BACKEND', 'dynamodb'))
+    return _store
+
+
+def use_store(store):
+    """Switches every service to `store` (a backend class or name); for tests and benchmarks."""
+    global _store
+    _store = load_backend(store) if isinstance(store, str) else store
+    return _store
@@ -0,0 +1,337 @@
+"""
+Per-request tracing spans and Prometheus metrics.
+
+A sampled request (TRACE_SAMPLE_RATE) carries a Trace in a context
+variable. `span(name)` times a stage into it, and every DynamoDB and
+Bedrock call is added as `<service>.<Operation>`; the durations feed the
+fintwin_span_seconds histogram. Stage names and AWS latencies describe the
+internals, so TracingMiddleware only sends them back as a Server-Timing
+header when TRACE_SERVER_TIMING=1 (development) or when the request carries
+the TRACE_TOKEN secret in an X-Trace-Token header; such requests are always
+traced. Outside a sampled request `span` returns a shared no-op context
+manager, so an unsampled request pays for one context variable lookup per
+span.
+
+Request durations, AWS call latencies and Bedrock token counts are recorded
+for every request. `registry.render()` returns them, plus whatever the
+registered collectors report (cache hit and miss counters), in the
+Prometheus text format served at /metrics. The numbers are per process: on
+serverless platforms every instance reports its own.
+"""
+import os
+import hmac
+import time
+import random
+import threading
+import contextvars
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '1.0'))
+# Server-Timing is sent to every client only when this is set
+SERVER_TIMING = os.getenv('TRACE_SERVER_TIMING', '0') == '1'
+# Otherwise only to requests whose X-Trace-Token header matches this secret
+TRACE_TOKEN = os.getenv('TRACE_TOKEN') or None
+# Seconds; the upper bounds of the histogram buckets (+Inf is implied)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """A monotonically increasing count per label combination."""
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_labels(self.labels, key)} {_number(value)}' for key, value in values]
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label combination."""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def count(self, *label_values) -> int:
+        with self._lock:
+            series = self._series.get(label_values)
+            return sum(series[:-1]) if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        lines = []
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values[:-1]):
+                cumulative += count
+                le = 'le="{}"'.format('+Inf' if bound == float('inf') else _number(bound))
+                lines.append(f'{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, key)} {_number(values[-1])}')
+            lines.append(f'{self.name}_count{_labels(self.labels, key)} {cumulative}')
+        return lines
+
+
+class Registry:
+    """
+    Metrics owned by this process, plus collectors: callables returning
+    [(name, type, help, [(labels dict, value)])] for counts that other
+    services already keep (cache statistics), read at scrape time.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors: List[Callable[[], Iterable]] = []
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, fn: Callable[[], Iterable]) -> Callable[[], Iterable]:
+        self.collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines += [f'# HELP {metric.name} {metric.help}', f'# TYPE {metric.name} {metric.kind}']
+            lines += metric.samples()
+        for collect in self.collectors:
+            for name, kind, help, samples in collect():
+                lines += [f'# HELP {name} {help}', f'# TYPE {name} {kind}']
+                for labels, value in samples:
+                    lines.append(f'{name}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+REQUEST_SECONDS = registry.histogram('fintwin_request_duration_seconds', 'HTTP request latency, to the last body chunk.',
+                                     ('method', 'route', 'status'))
+SPAN_SECONDS = registry.histogram('fintwin_span_seconds', 'Duration of traced stages in sampled requests.',
+                                  ('span',))
+AWS_CALL_SECONDS = registry.histogram('fintwin_aws_call_seconds', 'AWS API call latency, retries included.',
+                                      ('service', 'operation'))
+AWS_ERRORS = registry.counter('fintwin_aws_errors_total', 'AWS API calls that raised.',
+                              ('service', 'operation', 'code'))
+TOKENS = registry.counter('fintwin_bedrock_tokens_total', 'Bedrock tokens by model and direction.',
+                          ('model', 'direction'))
+
+
+class Trace:
+    """The spans of one sampled request, in the order they finished."""
+    __slots__ = ('spans', 'start')
+
+    def __init__(self):
+        self.spans: List[Tuple[str, float]] = []
+        self.start = time.perf_counter()
+
+    def add(self, name: str, seconds: float):
+        # list.append is atomic, so executor threads can add spans too
+        self.spans.append((name, seconds))
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: spans of the same name summed, then the total so far."""
+        totals: Dict[str, list] = {}
+        for name, seconds in list(self.spans):
+            total = totals.setdefault(name, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+        entries = [f'{name};dur={seconds * 1000:.1f}' + (f';desc="{count}x"' if count > 1 else '')
+                   for name, (seconds, count) in totals.items()]
+        entries.append(f'total;dur={(time.perf_counter() - self.start) * 1000:.1f}')
+        return ', '.join(entries)
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar('trace', default=None)
+_NOOP = nullcontext()
+
+
+def current() -> Optional[Trace]:
+    return _current.get()
+
+
+class _Span:
+    __slots__ = ('name', 'trace', 'start')
+
+    def __init__(self, name: str, trace: Trace):
+        self.name = name
+        self.trace = trace
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        self.trace.add(self.name, seconds)
+        SPAN_SECONDS.observe(seconds, self.name)
+        return False
+
+
+def span(name: str):
+    """Context manager timing a stage of the current request; a no-op when it is not sampled."""
+    trace = _current.get()
+    return _NOOP if trace is None else _Span(name, trace)
+
+
+def record_aws_call(service: str, operation: str, seconds: float, error: Optional[str] = None):
+    """Records one AWS call (all attempts), and adds it as a span to a sampled request."""
+    AWS_CALL_SECONDS.observe(seconds, service, operation)
+    if error is not None:
+        AWS_ERRORS.inc(service, operation, error)
+    trace = _current.get()
+    if trace is not None:
+        name = f'{service}.{operation}'
+        trace.add(name, seconds)
+        SPAN_SECONDS.observe(seconds, name)
+
+
+def record_tokens(model_id: str, input_tokens: Optional[int], output_tokens: Optional[int]):
+    if input_tokens:
+        TOKENS.inc(model_id, 'input', amount=input_tokens)
+    if output_tokens:
+        TOKENS.inc(model_id, 'output', amount=output_tokens)
+
+
+def _before_call(model, context, **kwargs):
+    # after-call-error does not get the operation model, so remember the names
+    context['trace_service'] = model.service_model.endpoint_prefix
+    context['trace_operation'] = model.name
+    context['trace_start'] = time.perf_counter()
+
+
+def _after_call(model, parsed, context, **kwargs):
+    start = context.get('trace_start')
+    if start is not None:
+        # Error responses (throttling, failed conditions) also end here, before the ClientError is raised
+        error = (parsed or {}).get('Error', {}).get('Code')
+        record_aws_call(model.service_model.endpoint_prefix, model.name, time.perf_counter() - start, error)
+
+
+def _after_call_error(exception, context, **kwargs):
+    start = context.get('trace_start')
+    if start is not None:
+        # Connection errors and timeouts, raised before any response was parsed
+        record_aws_call(context['trace_service'], context['trace_operation'], time.perf_counter() - start,
+                        type(exception).__name__)
+
+
+def instrument_client(client):
+    """Times every API call a boto3 client makes, retries included, through its event hooks."""
+    events = client.meta.events
+    events.register_first('before-call.*.*', _before_call, unique_id='fintwin-trace-before')
+    events.register_last('after-call', _after_call, unique_id='fintwin-trace-after')
+    events.register_last('after-call-error', _after_call_error, unique_id='fintwin-trace-error')
+    return client
+
+
+def should_sample() -> bool:
+    return SAMPLE_RATE >= 1.0 or (SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE)
+
+
+def exposes_timing(scope) -> bool:
+    """Whether the response to this request may carry Server-Timing."""
+    if SERVER_TIMING:
+        return True
+    if TRACE_TOKEN is None:
+        return False
+    for name, value in scope.get('headers', ()):
+        if name == b'x-trace-token':
+            return hmac.compare_digest(value, TRACE_TOKEN.encode('latin-1'))
+    return False
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware: starts a trace for sampled requests, adds its
+    Server-Timing header to responses that may expose it (exposes_timing),
+    and records every request's duration by method, route template and
+    status.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        expose = exposes_timing(scope)
+        trace = Trace() if expose or should_sample() else None
+        token = _current.set(trace)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_traced(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if expose:
+                    headers = list(message.get('headers', []))
+                    headers.append((b'server-timing', trace.server_timing().encode('latin-1')))
+                    message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_traced)
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get('route'), 'path', None) or 'unmatched'
+            REQUEST_SECONDS.observe(time.perf_counter() - start, scope['method'], route, str(status))
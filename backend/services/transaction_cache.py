@@ -0,0 +1,333 @@
+import os
+import sys
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional
+
+# numpy is imported on first use, not at startup: it is a large share of a cold start
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class StringInterner:
+    """Maps repeated strings (categories, merchants) to small integer codes."""
+    # Approximate cost of one value's dict entry and list slot, beyond the string itself
+    SLOT_BYTES = 64
+
+    def __init__(self):
+        self._codes = {}
+        self.values = []
+        self.nbytes = 0
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+            self.nbytes += sys.getsizeof(value) + self.SLOT_BYTES
+        return code
+
+    def lookup(self, value: str) -> int:
+        """Code of an already interned value, or -1 so masks match nothing."""
+        return self._codes.get(value, -1)
+
+    def decode(self, codes: "np.ndarray") -> List[str]:
+        values = self.values
+        return [values[code] for code in codes.tolist()]
+
+
+class TransactionColumns:
+    """
+    One user's transactions as parallel NumPy columns:
+    ids (int64), amounts (float64), days since epoch (int32) and interned
+    category/merchant codes (int32) from the user's own StringInterner.
+    Arrays grow geometrically so write-through appends are amortized O(1).
+    """
+    COLUMNS = (('ids', 'int64'), ('amounts', 'float64'), ('days', 'int32'),
+               ('categories', 'int32'), ('merchants', 'int32'))
+    ROW_BYTES = 8 + 8 + 4 + 4 + 4  # itemsizes of COLUMNS
+
+    def __init__(self, user_id: str, interner: StringInterner = None, capacity: int = 16):
+        import numpy as np
+        self.user_id = user_id
+        self.interner = interner if interner is not None else StringInterner()
+        self.size = 0
+        for name, dtype in self.COLUMNS:
+            setattr(self, f"_{name}", np.empty(capacity, dtype=dtype))
+
+    @classmethod
+    def from_records(cls, user_id: str, records: List[Dict], interner: StringInterner = None) -> "TransactionColumns":
+        columns = cls(user_id, interner, capacity=max(len(records), 16))
+        columns.extend(records)
+        return columns
+
+    def __len__(self):
+        return self.size
+
+    def __getattr__(self, name):
+        # Public column views (ids, amounts, ...) trimmed to the used size
+        if name in dict(self.COLUMNS):
+            return self.__dict__[f"_{name}"][:self.size]
+        raise AttributeError(name)
+
+    @property
+    def nbytes(self) -> int:
+        """Allocated column memory plus the interned strings."""
+        return sum(self.__dict__[f"_{name}"].nbytes for name, _ in self.COLUMNS) + self.interner.nbytes
+
+    @property
+    def used_nbytes(self) -> int:
+        """Memory the rows would take in arrays trimmed to size."""
+        return self.size * self.ROW_BYTES + self.interner.nbytes
+
+    def _resize(self, capacity: int):
+        import numpy as np
+        for name, _ in self.COLUMNS:
+            old = self.__dict__[f"_{name}"]
+            resized = np.empty(capacity, dtype=old.dtype)
+            resized[:self.size] = old[:self.size]
+            self.__dict__[f"_{name}"] = resized
+
+    def trim(self):
+        """Releases the spare capacity left by growth."""
+        if len(self._ids) > max(self.size, 16):
+            self._resize(max(self.size, 16))
+
+    def extend(self, records: List[Dict]):
+        """Appends a page of records with one bulk assignment per column."""
+        import numpy as np
+        n = len(records)
+        if self.size + n > len(self._ids):
+            self._resize(max(len(self._ids) * 2, self.size + n))
+        interner, rows = self.interner, slice(self.size, self.size + n)
+        self._ids[rows] = [r['id'] for r in records]
+        self._amounts[rows] = [r['amount'] for r in records]
+        self._days[rows] = np.array([r['date'] for r in records], dtype='datetime64[D]').astype(np.int32)
+        self._categories[rows] = [interner.code(r.get('category', 'Other')) for r in records]
+        self._merchants[rows] = [interner.code(r.get('merchant', '')) for r in records]
+        self.size += n
+
+    def append(self, record: Dict):
+        import numpy as np
+        if self.size == len(self._ids):
+            self._resize(len(self._ids) * 2)
+        i = self.size
+        self._ids[i] = record['id']
+        self._amounts[i] = record['amount']
+        self._days[i] = np.datetime64(record['date'], 'D').astype(np.int32)
+        self._categories[i] = self.interner.code(record.get('category', 'Other'))
+        self._merchants[i] = self.interner.code(record.get('merchant', ''))
+        self.size += 1
+
+    def mask(self, date_from: str = None, date_to: str = None, category: str = None) -> "np.ndarray":
+        """Boolean row mask for an inclusive date range and/or a category."""
+        import numpy as np
+        mask = np.ones(self.size, dtype=bool)
+        if date_from:
+            mask &= self.days >= np.datetime64(date_from, 'D').astype(np.int32)
+        if date_to:
+            mask &= self.days <= np.datetime64(date_to, 'D').astype(np.int32)
+        if category:
+            mask &= self.categories == self.interner.lookup(category)
+        return mask
+
+    def total(self, mask: "np.ndarray" = None) -> float:
+        amounts = self.amounts if mask is None else self.amounts[mask]
+        return float(amounts.sum())
+
+    def category_totals(self, mask: "np.ndarray" = None) -> Dict[str, float]:
+        import numpy as np
+        codes = self.categories if mask is None else self.categories[mask]
+        amounts = self.amounts if mask is None else self.amounts[mask]
+        sums = np.bincount(codes, weights=amounts)
+        present = np.flatnonzero(np.bincount(codes))
+        return dict(zip(self.interner.decode(present), sums[present].tolist()))
+
+    def monthly_totals(self, mask: "np.ndarray" = None) -> Dict[str, float]:
+        import numpy as np
+        days = self.days if mask is None else self.days[mask]
+        amounts = self.amounts if mask is None else self.amounts[mask]
+        months = days.astype('datetime64[D]').astype('datetime64[M]')
+        unique, inverse = np.unique(months, return_inverse=True)
+        sums = np.bincount(inverse, weights=amounts, minlength=len(unique))
+        return dict(zip(np.datetime_as_string(unique).tolist(), sums.tolist()))
+
+    def iter_record_chunks(self, mask: "np.ndarray" = None, chunk_size: int = 500) -> Iterator[List[Dict]]:
+        """Yields matching rows as dicts in date order, `chunk_size` at a time."""
+        import numpy as np
+        rows = np.arange(self.size) if mask is None else np.flatnonzero(mask)
+        rows = rows[np.argsort(self.days[rows], kind='stable')]
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            dates = np.datetime_as_string(self.days[chunk].astype('datetime64[D]')).tolist()
+            yield [
+                {"id": tx_id, "user_id": self.user_id, "category": category,
+                 "amount": amount, "date": date, "merchant": merchant}
+                for tx_id, category, amount, date, merchant in zip(
+                    self.ids[chunk].tolist(),
+                    self.interner.decode(self.categories[chunk]),
+                    self.amounts[chunk].tolist(),
+                    dates,
+                    self.interner.decode(self.merchants[chunk]),
+                )
+            ]
+
+    def to_records(self, mask: "np.ndarray" = None) -> List[Dict]:
+        return [record for chunk in self.iter_record_chunks(mask) for record in chunk]
+
+
+class _CacheEntry:
+    __slots__ = ('columns', 'version', 'loaded_at')
+
+    def __init__(self, columns: TransactionColumns, version: int, loaded_at: float):
+        self.columns = columns
+        self.version = version
+        self.loaded_at = loaded_at
+
+
+class TransactionCache:
+    """
+    In-process, per-user columnar cache of cleaned transactions.
+
+    Entries expire after TTL_SECONDS and whenever the user's data version
+    moves past the version the entry was built from. Writes that go through
+    `append` keep the entry current (write-through); any other write path
+    must call `invalidate`. Least recently used users are evicted to stay
+    under MAX_BYTES, which counts each entry's arrays and interned strings.
+    A user whose data alone exceeds it is remembered until their data
+    changes or TTL_SECONDS pass, so later requests skip the load.
+    """
+    TTL_SECONDS = float(os.getenv('TRANSACTION_CACHE_TTL_SECONDS', '300'))
+    MAX_BYTES = int(os.getenv('TRANSACTION_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+    _entries = OrderedDict()
+    _versions = {}
+    # user_id -> (data version, monotonic time) of a load that exceeded MAX_BYTES
+    _oversized = {}
+    _lock = threading.RLock()
+    hits = 0
+    misses = 0
+
+    # Tells this process's version counters apart from other instances' and earlier runs'
+    INSTANCE = os.urandom(4).hex()
+
+    @classmethod
+    def version(cls, user_id: str) -> int:
+        return cls._versions.get(user_id, 0)
+
+    @classmethod
+    def data_tag(cls, user_id: str) -> str:
+        """
+        Opaque tag that changes whenever the user's data version does. Writes
+        through other instances are not counted here, so the tag also rolls
+        over every TTL_SECONDS, the staleness cached columns already allow.
+        """
+        return f"{cls.INSTANCE}.{cls.version(user_id)}.{int(time.time() // cls.TTL_SECONDS)}"
+
+    @classmethod
+    def invalidate(cls, user_id: str) -> int:
+        """Marks the user's data as changed; returns the new data version."""
+        with cls._lock:
+            cls._versions[user_id] = cls.version(user_id) + 1
+            cls._entries.pop(user_id, None)
+            cls._oversized.pop(user_id, None)
+            return cls._versions[user_id]
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+            cls._oversized.clear()
+
+    @classmethod
+    def _fresh(cls, user_id: str) -> Optional[_CacheEntry]:
+        entry = cls._entries.get(user_id)
+        if entry is None:
+            return None
+        if entry.version != cls.version(user_id) or time.monotonic() - entry.loaded_at > cls.TTL_SECONDS:
+            del cls._entries[user_id]
+            return None
+        return entry
+
+    @classmethod
+    def peek(cls, user_id: str) -> Optional[TransactionColumns]:
+        """The user's cached columns if present and fresh, without loading on a miss."""
+        with cls._lock:
+            entry = cls._fresh(user_id)
+            if entry is None:
+                return None
+            cls._entries.move_to_end(user_id)
+            cls.hits += 1
+            return entry.columns
+
+    @classmethod
+    def get(cls, user_id: str, loader: Callable[[], Iterable[List[Dict]]]) -> Optional[TransactionColumns]:
+        """
+        Returns the user's columns, calling `loader` for pages of cleaned rows
+        on a miss. Returns None if the user's data alone exceeds the memory
+        cap; loading stops at the page that crosses it.
+        """
+        with cls._lock:
+            columns = cls.peek(user_id)
+            if columns is not None:
+                return columns
+            cls.misses += 1
+            version = cls.version(user_id)
+            oversized = cls._oversized.get(user_id)
+            if oversized is not None:
+                if oversized[0] == version and time.monotonic() - oversized[1] <= cls.TTL_SECONDS:
+                    return None
+                del cls._oversized[user_id]
+
+        # Load outside the lock so other users are not blocked on DynamoDB
+        columns = TransactionColumns(user_id)
+        pages = iter(loader())
+        try:
+            for page in pages:
+                columns.extend(page)
+                if columns.used_nbytes > cls.MAX_BYTES:
+                    logger.warning(f"Transactions for {user_id} exceed the cache cap; not caching")
+                    with cls._lock:
+                        cls._oversized[user_id] = (version, time.monotonic())
+                    return None
+        finally:
+            close = getattr(pages, 'close', None)
+            if close is not None:
+                close()
+        columns.trim()
+
+        with cls._lock:
+            # A write during the load makes this snapshot stale: serve it, don't keep it
+            if version == cls.version(user_id):
+                cls._entries[user_id] = _CacheEntry(columns, version, time.monotonic())
+                cls._entries.move_to_end(user_id)
+                cls._evict()
+        return columns
+
+    @classmethod
+    def append(cls, user_id: str, record: Dict):
+        """Write-through for a newly stored, cleaned transaction."""
+        with cls._lock:
+            entry = cls._fresh(user_id)
+            version = cls.version(user_id) + 1
+            cls._versions[user_id] = version
+            if entry is not None:
+                entry.columns.append(record)
+                entry.version = version
+                cls._evict()
+
+    @classmethod
+    def nbytes(cls) -> int:
+        return sum(entry.columns.nbytes for entry in cls._entries.values())
+
+    @classmethod
+    def _evict(cls):
+        total = cls.nbytes()
+        while total > cls.MAX_BYTES and cls._entries:
+            _, entry = cls._entries.popitem(last=False)
+            total -= entry.columns.nbytes
@@ -1,40 +1,156 @@
-from typing import List, Optional, Dict
+from typing import AsyncIterator, Iterator, List, Optional, Dict, Tuple
+import os
 import re
 from datetime import datetime
-from services.db_service import DynamoDBService
+import logging
+from services.storage import KeyCollisionError, get_store
+from services.rollup_service import RollupService
+from services.budget_service import BudgetService
+from services.data_prep_service import DataPrepService
+from services.transaction_cache import TransactionCache, TransactionColumns
+from services.aws_clients import run_blocking
+from services.single_flight import SingleFlight
+from services.id_generator import SnowflakeGenerator
+
+logger = logging.getLogger(__name__)
+
+# Owner of transactions when the caller does not identify a user
+DEFAULT_USER_ID = os.getenv('DEFAULT_USER_ID', 'demo-user')
 
 class TransactionService:
-    # In-memory store REMOVED in favor of DynamoDB
+    # Transactions live in the configured storage backend (services.storage)
     
+    # Concurrent full-table reads share one scan
+    scan_flight = SingleFlight("get_all_transactions")
+    # Transaction ids; writes are conditional, and a colliding id is replaced and retried
+    ids = SnowflakeGenerator()
+    MAX_ID_ATTEMPTS = 3
+    id_collisions = 0
+
+    @classmethod
+    def get_all_transactions(cls, parallel: bool = False) -> List[Dict]:
+        """
+        Every transaction in the table. Callers arriving while a scan is in
+        flight share its result list, which must not be mutated.
+        """
+        # Full-table readers (batch jobs, migrations) can opt into a parallel scan
+        return cls.scan_flight.do("all", get_store().get_all_transactions, parallel=parallel)
+
+    @classmethod
+    async def aget_all_transactions(cls, parallel: bool = False) -> List[Dict]:
+        return await cls.scan_flight.ado("all", run_blocking, get_store().get_all_transactions, parallel=parallel)
+
     @classmethod
-    def get_all_transactions(cls) -> List[Dict]:
-        return DynamoDBService.get_all_transactions()
+    def iter_user_transaction_pages(cls, user_id: str = DEFAULT_USER_ID, date_from: str = None, date_to: str = None,
+                                    category: str = None, page_size: int = None) -> Iterator[List[Dict]]:
+        for items, _ in get_store().iter_user_pages(user_id, date_from, date_to, category, page_size):
+            yield items
 
     @classmethod
-    def add_transaction(cls, amount: float, category: str, merchant: str, date: str = None) -> Dict:
+    async def aiter_user_transaction_pages(cls, user_id: str = DEFAULT_USER_ID, date_from: str = None,
+                                           date_to: str = None, category: str = None,
+                                           page_size: int = None) -> AsyncIterator[List[Dict]]:
+        async for items, _ in get_store().aiter_user_pages(user_id, date_from, date_to, category, page_size):
+            yield items
+
+    @classmethod
+    def get_user_transactions(cls, user_id: str = DEFAULT_USER_ID, date_from: str = None, date_to: str = None,
+                              category: str = None) -> List[Dict]:
+        items = []
+        for page in cls.iter_user_transaction_pages(user_id, date_from, date_to, category):
+            items.extend(page)
+        return items
+
+    @classmethod
+    def get_user_columns(cls, user_id: str = DEFAULT_USER_ID) -> Optional[TransactionColumns]:
+        """
+        The user's transactions as cached NumPy columns, for vectorized filters
+        and sums. None when the user's data exceeds the cache cap.
+        """
+        return TransactionCache.get(user_id, lambda: cls.iter_user_transaction_pages(user_id))
+
+    @classmethod
+    def get_user_transactions_page(cls, limit: int, cursor: str = None, user_id: str = DEFAULT_USER_ID,
+                                   date_from: str = None, date_to: str = None,
+                                   category: str = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Returns up to `limit` of the user's transactions after `cursor`, plus
+        the cursor of the next page (None once the range is exhausted).
+        Raises ValueError for a malformed cursor.
+        """
+        store = get_store()
+        start_key = store.decode_cursor(cursor) if cursor else None
+        items = []
+        pages = store.iter_user_pages(user_id, date_from, date_to, category, limit, start_key)
+        for page, last_key in pages:
+            remaining = limit - len(items)
+            items.extend(page[:remaining])
+            if len(items) >= limit:
+                has_more = len(page) > remaining or last_key is not None
+                next_cursor = None
+                if has_more:
+                    next_cursor = store.encode_cursor(store.key_of(items[-1], category))
+                return items, next_cursor
+        return items, None
+
+    @classmethod
+    async def aget_user_columns(cls, user_id: str = DEFAULT_USER_ID) -> Optional[TransactionColumns]:
+        # Cache hits return without leaving the event loop; misses load on the AWS executor
+        columns = TransactionCache.peek(user_id)
+        if columns is not None:
+            return columns
+        return await run_blocking(cls.get_user_columns, user_id)
+
+    @classmethod
+    def data_version(cls, user_id: str = DEFAULT_USER_ID) -> str:
+        """Changes on every write to the user's transactions; used as an HTTP validator."""
+        return TransactionCache.data_tag(user_id)
+
+    @classmethod
+    async def aget_user_transactions_page(cls, limit: int, cursor: str = None, user_id: str = DEFAULT_USER_ID,
+                                          date_from: str = None, date_to: str = None,
+                                          category: str = None) -> Tuple[List[Dict], Optional[str]]:
+        return await run_blocking(cls.get_user_transactions_page, limit, cursor, user_id, date_from, date_to, category)
+
+    @classmethod
+    def add_transaction(cls, amount: float, category: str, merchant: str, date: str = None,
+                        user_id: str = DEFAULT_USER_ID) -> Dict:
         if date is None:
             date = datetime.now().strftime("%Y-%m-%d")
         
-        # ID generation strategy: Simple timestamp or UUID is better for distributed systems
-        # For hackathon/demo, we can use a timestamp int
-        import time
-        new_id = int(time.time() * 1000) 
-
         new_tx = {
-            "id": new_id,
+            "id": cls.ids.next_id(),
+            "user_id": user_id,
             "category": category,
             "amount": amount,
             "date": date,
             "merchant": merchant
         }
-        
-        success = DynamoDBService.add_transaction(new_tx)
+
+        # Normalize once at write time so reads never need DataPrepService.
+        # Callers get the transaction back as they described it.
+        stored_tx = DataPrepService.canonicalize(dict(new_tx))
+        for attempt in range(cls.MAX_ID_ATTEMPTS):
+            try:
+                success = get_store().add_transaction(stored_tx, if_absent=True)
+                break
+            except KeyCollisionError as e:
+                # Only possible if two processes share a worker id
+                cls.id_collisions += 1
+                logger.warning(f"Transaction id collision on {e}, attempt {attempt + 1}")
+                new_tx["id"] = stored_tx["id"] = cls.ids.next_id()
+        else:
+            return None
         if success:
+            # Keep the monthly/category rollups, budget counters and the column cache current at write time
+            RollupService.record(stored_tx)
+            BudgetService.record(stored_tx)
+            TransactionCache.append(user_id, stored_tx)
             return new_tx
         return None
 
     @classmethod
-    def extract_from_message(cls, message: str) -> Optional[Dict]:
+    def parse_message(cls, message: str) -> Optional[Dict]:
         """
         Attempts to extract transaction details from a natural language message.
         Patterns supported:
@@ -58,10 +174,27 @@ class TransactionService:
         if match:
             data = match.groupdict()
             try:
-                amount = float(data['amount'])
-                category = data['category'].strip().title()
-                merchant = data['merchant'].strip().title()
-                return cls.add_transaction(amount, category, merchant)
+                return {
+                    "amount": float(data['amount']),
+                    "category": data['category'].strip().title(),
+                    "merchant": data['merchant'].strip().title(),
+                }
             except ValueError:
                 return None
         return None
+
+    @classmethod
+    def extract_from_message(cls, message: str, user_id: str = DEFAULT_USER_ID) -> Optional[Dict]:
+        """Records the transaction described in a message, if any (see parse_message)."""
+        parsed = cls.parse_message(message)
+        if parsed is None:
+            return None
+        return cls.add_transaction(**parsed, user_id=user_id)
+
+    @classmethod
+    async def aextract_from_message(cls, message: str, user_id: str = DEFAULT_USER_ID) -> Optional[Dict]:
+        # Parsing stays on the event loop; only a matching message costs a storage write
+        parsed = cls.parse_message(message)
+        if parsed is None:
+            return None
+        return await run_blocking(cls.add_transaction, **parsed, user_id=user_id)
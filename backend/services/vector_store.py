@@ -0,0 +1,249 @@
+import os
+import json
+import zlib
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+from services.lexical_index import tokenize
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class HashingEmbedder:
+    """
+    Offline embedding function: word unigrams and character 4-grams are
+    feature-hashed into a fixed number of signed buckets and L2-normalized.
+    Character n-grams let related word forms ("invest", "investing",
+    "investments") land near each other without a trained model.
+
+    Any object with `name`, `dim` and `embed(texts) -> float32 (n, dim)`
+    can be used in its place.
+    """
+    name = "hashing-v1"
+    NGRAM = 4
+    NGRAM_WEIGHT = 0.5
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self._features = lru_cache(maxsize=100000)(self._token_features)
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        h = zlib.crc32(feature.encode('utf-8'))
+        return h % self.dim, (1.0 if (h >> 31) & 1 else -1.0)
+
+    def _token_features(self, token: str) -> Tuple[Tuple[int, float], ...]:
+        features = [self._bucket(token)]
+        padded = f"<{token}>"
+        for i in range(max(len(padded) - self.NGRAM + 1, 0)):
+            index, sign = self._bucket(padded[i:i + self.NGRAM])
+            features.append((index, sign * self.NGRAM_WEIGHT))
+        return tuple(features)
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        import numpy as np
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                for index, weight in self._features(token):
+                    vectors[row, index] += weight
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+class VectorStore:
+    """
+    Append-only store of unit vectors in a memory-mapped float16/float32
+    matrix (`vectors.bin`), with passage texts in `texts.jsonl`.
+
+    Appends extend the files in place, so adding passages never rebuilds the
+    store. Search is a batched matrix product over fixed-size blocks with a
+    running top-k, or, once `build_clusters` has run, is restricted to the
+    rows of the `nprobe` nearest k-means centroids (an IVF index). Matrices
+    whose float32 form fits RESIDENT_BYTES are converted once and kept in
+    memory for search; larger ones are converted block by block per query.
+    """
+    BLOCK_ROWS = 16384
+    RESIDENT_BYTES = int(os.getenv('VECTOR_STORE_RESIDENT_BYTES', str(256 * 1024 * 1024)))
+
+    def __init__(self, directory: str, embedder=None, dtype: str = 'float16'):
+        import numpy as np
+        self.directory = directory
+        self.embedder = embedder or HashingEmbedder()
+        os.makedirs(directory, exist_ok=True)
+        meta = self._read_meta()
+        if meta and (meta['dim'] != self.embedder.dim or meta['embedder'] != self.embedder.name):
+            raise ValueError(f"Vector store at {directory} was built with a different embedder")
+        self.dtype = np.dtype(meta['dtype'] if meta else dtype)
+        self.count = meta['count'] if meta else 0
+        self.texts = self._read_texts()[:self.count]
+        self.centroids = None
+        self.assignments = None
+        if os.path.exists(self._path('centroids.npy')):
+            self.centroids = np.load(self._path('centroids.npy'))
+            self.assignments = self._open_assignments()
+        self._vectors = self._open_vectors()
+        self._resident = None
+
+    def __len__(self):
+        return self.count
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read_meta(self) -> Optional[dict]:
+        if not os.path.exists(self._path('meta.json')):
+            return None
+        with open(self._path('meta.json')) as f:
+            return json.load(f)
+
+    def _write_meta(self):
+        tmp_path = self._path('meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'dim': self.embedder.dim, 'embedder': self.embedder.name,
+                       'dtype': self.dtype.name, 'count': self.count}, f)
+        os.replace(tmp_path, self._path('meta.json'))
+
+    def _read_texts(self) -> List[str]:
+        if not os.path.exists(self._path('texts.jsonl')):
+            return []
+        with open(self._path('texts.jsonl'), encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def _open_vectors(self):
+        import numpy as np
+        if not self.count:
+            return np.zeros((0, self.embedder.dim), dtype=self.dtype)
+        return np.memmap(self._path('vectors.bin'), dtype=self.dtype, mode='r',
+                         shape=(self.count, self.embedder.dim))
+
+    def _open_assignments(self):
+        import numpy as np
+        if not self.count:
+            return np.zeros(0, dtype=np.int32)
+        return np.memmap(self._path('assignments.bin'), dtype=np.int32, mode='r', shape=(self.count,))
+
+    @property
+    def vectors(self) -> "np.ndarray":
+        return self._vectors
+
+    def _search_matrix(self) -> "np.ndarray":
+        """float32 rows for scoring: the resident copy if it fits, else the stored matrix."""
+        import numpy as np
+        vectors = self._vectors
+        if vectors.dtype == np.float32 or len(vectors) * vectors.shape[1] * 4 > self.RESIDENT_BYTES:
+            return vectors
+        resident = self._resident
+        if resident is None or len(resident) != len(vectors):
+            resident = self._resident = np.asarray(vectors, dtype=np.float32)
+        return resident
+
+    def append(self, texts: Sequence[str], batch_size: int = 1024) -> int:
+        """Embeds and appends passages; returns the new passage count."""
+        import numpy as np
+        for start in range(0, len(texts), batch_size):
+            batch = list(texts[start:start + batch_size])
+            vectors = self.embedder.embed(batch).astype(self.dtype)
+            with open(self._path('vectors.bin'), 'ab') as f:
+                f.write(vectors.tobytes())
+            with open(self._path('texts.jsonl'), 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(text) + "\n" for text in batch)
+            if self.centroids is not None:
+                with open(self._path('assignments.bin'), 'ab') as f:
+                    f.write(self._nearest_centroids(vectors.astype(np.float32), 1)[:, 0].astype(np.int32).tobytes())
+            self.texts.extend(batch)
+            self.count += len(batch)
+            # Meta is written last: a crash mid-append leaves extra bytes that count ignores
+            self._write_meta()
+        self._vectors = self._open_vectors()
+        self._resident = None
+        if self.centroids is not None:
+            self.assignments = self._open_assignments()
+        return self.count
+
+    def _nearest_centroids(self, queries: "np.ndarray", nprobe: int) -> "np.ndarray":
+        import numpy as np
+        scores = queries @ self.centroids.T
+        nprobe = min(nprobe, len(self.centroids))
+        return np.argsort(-scores, axis=1)[:, :nprobe]
+
+    def build_clusters(self, n_clusters: int = None, iterations: int = 10, seed: int = 0):
+        """
+        Spherical k-means over the stored vectors (about sqrt(count) clusters by
+        default), saved as an IVF index that `search` uses when `nprobe` is set.
+        """
+        import numpy as np
+        if not self.count:
+            return
+        n_clusters = min(n_clusters or max(int(np.sqrt(self.count)), 1), self.count)
+        rng = np.random.default_rng(seed)
+        centroids = np.asarray(self.vectors[rng.choice(self.count, n_clusters, replace=False)], dtype=np.float32)
+        for _ in range(iterations):
+            assignments = self._assign_blocks(centroids)
+            sums = np.zeros_like(centroids)
+            for start in range(0, self.count, self.BLOCK_ROWS):
+                block = np.asarray(self.vectors[start:start + self.BLOCK_ROWS], dtype=np.float32)
+                np.add.at(sums, assignments[start:start + self.BLOCK_ROWS], block)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.where(norms == 0, 1, norms), centroids)
+
+        self.centroids = centroids.astype(np.float32)
+        np.save(self._path('centroids.npy'), self.centroids)
+        self._assign_blocks(self.centroids).astype(np.int32).tofile(self._path('assignments.bin'))
+        self.assignments = self._open_assignments()
+
+    def _assign_blocks(self, centroids: "np.ndarray") -> "np.ndarray":
+        import numpy as np
+        assignments = np.empty(self.count, dtype=np.int32)
+        for start in range(0, self.count, self.BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + self.BLOCK_ROWS], dtype=np.float32)
+            assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return assignments
+
+    @staticmethod
+    def _merge_top_k(best_scores, best_rows, scores, rows, k):
+        import numpy as np
+        scores = np.concatenate([best_scores, scores], axis=1)
+        rows = np.concatenate([best_rows, np.broadcast_to(rows, scores[:, best_rows.shape[1]:].shape)], axis=1)
+        if scores.shape[1] > k:
+            keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(scores, keep, axis=1)
+            rows = np.take_along_axis(rows, keep, axis=1)
+        return scores, rows
+
+    def search_vectors(self, queries: "np.ndarray", k: int = 4, nprobe: int = None) -> List[List[Tuple[int, float]]]:
+        """Batched cosine top-k for unit query vectors; one ranked list per query."""
+        import numpy as np
+        queries = np.asarray(queries, dtype=np.float32)
+        n_queries = len(queries)
+        # Snapshot the matrix: a concurrent append reopens it with more rows
+        vectors, assignments = self._search_matrix(), self.assignments
+        if not len(vectors) or not n_queries:
+            return [[] for _ in range(n_queries)]
+
+        if nprobe and assignments is not None and len(assignments) == len(vectors):
+            probes = self._nearest_centroids(queries, nprobe)
+            results = []
+            for query, clusters in zip(queries, probes):
+                rows = np.flatnonzero(np.isin(assignments, clusters))
+                scores = np.asarray(vectors[rows], dtype=np.float32) @ query
+                top = np.argsort(-scores, kind='stable')[:k]
+                results.append([(int(rows[i]), float(scores[i])) for i in top])
+            return results
+
+        best_scores = np.full((n_queries, 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((n_queries, 0), dtype=np.int64)
+        for start in range(0, len(vectors), self.BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + self.BLOCK_ROWS], dtype=np.float32)
+            scores = queries @ block.T
+            rows = np.arange(start, start + len(block))
+            best_scores, best_rows = self._merge_top_k(best_scores, best_rows, scores, rows, k)
+
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        return [[(int(r), float(s)) for r, s in zip(rows, scores)] for rows, scores in zip(best_rows, best_scores)]
+
+    def search(self, query: str, k: int = 4, nprobe: int = None) -> List[Tuple[int, float]]:
+        return self.search_vectors(self.embedder.embed([query]), k, nprobe)[0]
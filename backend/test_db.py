@@ -24,6 +24,7 @@ def test_dynamodb():
     # 2. Add Transaction
     new_tx = {
         "id": int(time.time() * 1000),
+        "user_id": "test-user",
         "amount": 105.50,
         "category": "Test-Category",
         "merchant": "Test-Merchant",
@@ -41,9 +42,9 @@ def test_dynamodb():
         print(f"❌ Add Transaction failed: {e}")
 
     # 3. Get Transactions
-    print("\nFetching all transactions...")
+    print("\nFetching the test user's transactions...")
     try:
-        items = DynamoDBService.get_all_transactions()
+        items = [item for page, _ in DynamoDBService.iter_user_pages(new_tx['user_id']) for item in page]
         print(f"Items found: {len(items)}")
         
         found = False
@@ -53,9 +54,9 @@ def test_dynamodb():
                 found = True
         
         if found:
-            print("✅ Verification: created transaction found in scan results.")
+            print("✅ Verification: created transaction found in query results.")
         else:
-            print("❌ Verification: created transaction NOT found in scan results (eventual consistency delay might apply).")
+            print("❌ Verification: created transaction NOT found in query results (eventual consistency delay might apply).")
             
     except Exception as e:
         print(f"❌ Get Transactions failed: {e}")
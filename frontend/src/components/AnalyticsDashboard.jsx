@@ -115,11 +115,16 @@ const AnalyticsDashboard = ({ userGoals = [], onChatPrompt = () => { } }) => {
                 const res = await fetch('http://127.0.0.1:8000/api/spending');
                 const rawData = await res.json();
 
-                // Process for Chart (Simple aggregation by month for demo)
-                // This is a placeholder aggregation
+                // Monthly totals come from the backend rollups
                 if (view === 'expenses') {
-                    // Keep mock chart data for stability unless we implement full aggregation
-                    const expenseData = [
+                    const aggRes = await fetch('http://127.0.0.1:8000/api/aggregates');
+                    const aggregates = await aggRes.json();
+                    const monthly = (aggregates.monthly || []).slice(-6);
+                    // Keep mock chart data until there is recorded spending
+                    const expenseData = monthly.length > 0 ? monthly.map(m => ({
+                        name: new Date(`${m.month}-01T00:00:00`).toLocaleString('en-US', { month: 'short' }),
+                        amount: m.total
+                    })) : [
                         { name: 'Jun', amount: 2400 }, { name: 'Jul', amount: 1398 },
                         { name: 'Aug', amount: 9800 }, { name: 'Sep', amount: 3908 },
                         { name: 'Oct', amount: 4800 }, { name: 'Nov', amount: 3800 }
@@ -54,7 +54,7 @@ const ChatInterface = ({ initialPrompt = '', onPromptConsumed = () => { } }) =>
         try {
             const response = await fetch('/api/chat', {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
+                headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
                 body: JSON.stringify({ message: userMsg.text })
             });
 
@@ -62,9 +62,38 @@ const ChatInterface = ({ initialPrompt = '', onPromptConsumed = () => { } }) =>
                 throw new Error(`Server error: ${response.status}`);
             }
 
-            const data = await response.json();
-            const botMsg = { id: Date.now() + 1, type: 'bot', text: data.response, context: data.context };
-            setMessages(prev => [...prev, botMsg]);
+            // Older backends ignore the Accept header and answer with plain JSON
+            if (!response.body || !(response.headers.get('content-type') || '').includes('text/event-stream')) {
+                const data = await response.json();
+                const botMsg = { id: Date.now() + 1, type: 'bot', text: data.response, context: data.context };
+                setMessages(prev => [...prev, botMsg]);
+                return;
+            }
+
+            // Render tokens as they arrive instead of waiting for the whole answer
+            const botId = Date.now() + 1;
+            setMessages(prev => [...prev, { id: botId, type: 'bot', text: '', context: [] }]);
+            setLoading(false);
+            const updateBot = (patch) => setMessages(prev => prev.map(m => (m.id === botId ? { ...m, ...patch(m) } : m)));
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const events = buffer.split('\n\n');
+                buffer = events.pop();
+                for (const raw of events) {
+                    const lines = raw.split('\n');
+                    const event = lines[0].replace('event: ', '');
+                    const data = JSON.parse(lines[1].replace('data: ', ''));
+                    if (event === 'context') updateBot(() => ({ context: data }));
+                    else if (event === 'token') updateBot(m => ({ text: m.text + data.text }));
+                    else if (event === 'done') updateBot(() => ({ text: data.response }));
+                }
+            }
         } catch (err) {
             console.error('Chat Error', err);
             const errorMsg = { id: Date.now() + 1, type: 'bot', text: 'Sorry, I am having trouble connecting to the financial brain right now.' };
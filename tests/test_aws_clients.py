@@ -0,0 +1,46 @@
+import sys
+import os
+import asyncio
+import threading
+
+import pytest
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from services.aws_clients import iterate_blocking
+
+
+def test_cancelled_iteration_closes_after_the_pending_next():
+    started, release, closed = threading.Event(), threading.Event(), threading.Event()
+
+    def pages():
+        try:
+            yield "first"
+            started.set()
+            release.wait(5)
+            yield "second"
+        finally:
+            closed.set()
+
+    async def consume():
+        async for _ in iterate_blocking(pages()):
+            pass
+
+    async def main():
+        task = asyncio.ensure_future(consume())
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        # The cancellation reaches the caller instead of "generator already executing"
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not closed.is_set()
+
+    asyncio.run(main())
+    release.set()
+    assert closed.wait(5)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
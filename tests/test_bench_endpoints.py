@@ -0,0 +1,52 @@
+import sys
+import os
+import argparse
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from benchmarks import bench_endpoints
+from services.bedrock_service import BedrockService
+from services.report_service import ReportService
+from services import storage
+
+
+def test_suite_reports_percentiles_and_injected_throttles(monkeypatch):
+    # The suite turns these caches off for the run; restore them for other tests
+    monkeypatch.setattr(ReportService.cache, "max_entries", ReportService.cache.max_entries)
+    monkeypatch.setattr(BedrockService, "CACHE_ENABLED", BedrockService.CACHE_ENABLED)
+    args = argparse.Namespace(
+        rows=[500], users=5, endpoints=list(bench_endpoints.ENDPOINTS), concurrency=[4], requests=12, warmup=1,
+        storage="dynamodb", seed=1, db_latency=0.0, db_jitter=0.0, db_throttle=0.3, model_latency=0.0, model_jitter=0.0,
+        model_throttle=0.0, backoff_scale=0.0, bedrock_cache=False, report_cache=False, output=None, compare=None,
+    )
+    report = bench_endpoints.run(args)
+
+    assert report["meta"]["config"]["db_throttle"] == 0.3
+    assert [r["endpoint"] for r in report["results"]] == list(bench_endpoints.ENDPOINTS)
+    for r in report["results"]:
+        assert r["requests"] == 12 and r["p50_ms"] <= r["p95_ms"] <= r["p99_ms"] <= r["max_ms"]
+    chat = report["results"][1]
+    assert chat["stand_in_calls"]["bedrock"] == 13
+    assert sum(r["stand_in_calls"]["dynamodb_throttles"] for r in report["results"]) > 0
+
+
+def test_suite_runs_against_sqlite(monkeypatch):
+    monkeypatch.setattr(storage, "_store", storage.get_store())
+    monkeypatch.setattr(ReportService.cache, "max_entries", ReportService.cache.max_entries)
+    monkeypatch.setattr(BedrockService, "CACHE_ENABLED", BedrockService.CACHE_ENABLED)
+    args = argparse.Namespace(
+        rows=[500], users=5, endpoints=["spending", "smartspend", "export-summary"], concurrency=[4], requests=8,
+        warmup=1, storage="sqlite", seed=1, db_latency=0.0, db_jitter=0.0, db_throttle=0.0, model_latency=0.0,
+        model_jitter=0.0, model_throttle=0.0, backoff_scale=0.0, bedrock_cache=False, report_cache=False,
+        output=None, compare=None,
+    )
+    report = bench_endpoints.run(args)
+
+    for r in report["results"]:
+        assert r["errors"] == 0 and r["stand_in_calls"]["dynamodb"] == 0
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,116 @@
+import sys
+import os
+
+import pytest
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from services.budget_service import BudgetService
+from services.db_service import DynamoDBService
+from services.transaction_service import TransactionService
+from benchmarks.local_aws import install_dynamodb
+
+
+def test_checks_account_for_spend_in_each_window():
+    resource = install_dynamodb()
+    BudgetService.clear()
+    BudgetService.set_limits("u1", {"Food": {"day": 50, "week": 120, "month": 400}})
+    # Wednesday; Monday is in the same ISO week, the 1st in the same month
+    TransactionService.add_transaction(30.0, "Food", "Walmart", date="2024-05-15", user_id="u1")
+    TransactionService.add_transaction(60.0, "Food", "Walmart", date="2024-05-13", user_id="u1")
+    TransactionService.add_transaction(200.0, "Food", "Walmart", date="2024-05-01", user_id="u1")
+    TransactionService.add_transaction(75.0, "Food", "Walmart", date="2024-05-15", user_id="u2")
+
+    result = BudgetService.check("u1", 15.0, "Food", date="2024-05-15")
+    assert result["allowed"]
+    assert result["windows"]["day"] == {"spent": 30.0, "limit": 50.0, "remaining": 20.0}
+    assert result["windows"]["week"]["spent"] == 90.0
+    assert result["windows"]["month"]["spent"] == 290.0
+
+    result = BudgetService.check("u1", 25.0, "Food", date="2024-05-15")
+    assert not result["allowed"]
+    assert "daily limit" in result["alert"]
+
+    # Hot checks need no DynamoDB reads, and local writes update the hot copy
+    calls = resource.Table(DynamoDBService.BUDGET_TABLE_NAME).calls
+    TransactionService.add_transaction(20.0, "Food", "Walmart", date="2024-05-15", user_id="u1")
+    result = BudgetService.check("u1", 1.0, "Food", date="2024-05-15")
+    assert result["windows"]["day"]["spent"] == 50.0 and not result["allowed"]
+    assert resource.Table(DynamoDBService.BUDGET_TABLE_NAME).calls == calls + 3
+
+    # A cold process sees the same totals from the DynamoDB counters
+    BudgetService.clear()
+    assert BudgetService.check("u1", 0.0, "Food", date="2024-05-15")["windows"]["month"]["spent"] == 310.0
+
+
+def test_rebuild_and_default_limits():
+    install_dynamodb()
+    BudgetService.clear()
+    DynamoDBService.add_transaction({"id": 1, "user_id": "u3", "category": "Shopping", "amount": 280.0,
+                                     "date": "2024-05-02", "merchant": "Store"})
+    assert BudgetService.check("u3", 50.0, "Shopping", date="2024-05-20")["allowed"]
+
+    assert BudgetService.rebuild("u3", date="2024-05-20") == 1
+    result = BudgetService.check("u3", 50.0, "Shopping", date="2024-05-20")
+    assert not result["allowed"] and "monthly limit of $300.00" in result["alert"]
+
+    with pytest.raises(ValueError):
+        BudgetService.set_limits("u3", {"Food": {"year": 10}})
+
+
+def test_batch_matches_single_checks():
+    install_dynamodb()
+    BudgetService.clear()
+    BudgetService.set_limits("u4", {"Food": {"day": 50, "month": 400}})
+    TransactionService.add_transaction(30.0, "Food", "Walmart", date="2024-05-15", user_id="u4")
+    amounts = [10.0, 25.0, 500.0, 250.0, 350.0, 15.0]
+    categories = ["Food", "Food", "Food", "Shopping", "Shopping", "Food"]
+
+    result = BudgetService.check_batch("u4", amounts, categories, date="2024-05-15")
+    singles = [BudgetService.check("u4", a, c, date="2024-05-15") for a, c in zip(amounts, categories)]
+    assert result["allowed"] == [s["allowed"] for s in singles]
+    labels = [result["alert_labels"][code] for code in result["alert_codes"]]
+    assert labels == ["ok", "over_daily_limit", "over_daily_limit", "ok", "over_monthly_limit", "ok"]
+
+    # As one cart, the third Food item pushes the day over its limit
+    cart = BudgetService.check_batch("u4", [10.0, 5.0, 15.0], ["Food", "Shopping", "Food"],
+                                     date="2024-05-15", cumulative=True)
+    assert cart["allowed"] == [True, True, False]
+
+    with pytest.raises(ValueError):
+        BudgetService.check_batch("u4", [1.0], [])
+
+
+def test_counter_table_expires_rows_through_ttl():
+    resource = install_dynamodb()
+    assert resource.meta.client.ttl == {DynamoDBService.BUDGET_TABLE_NAME: "expires_at"}
+    # Provisioning again leaves TTL as it is instead of failing
+    DynamoDBService.init_table()
+    assert resource.meta.client.ttl == {DynamoDBService.BUDGET_TABLE_NAME: "expires_at"}
+
+    TransactionService.add_transaction(8.0, "Food", "Cafe", date="2024-05-15", user_id="ttl")
+    rows = resource.Table(DynamoDBService.BUDGET_TABLE_NAME)._items.values()
+    assert rows and all(row["expires_at"] > 0 for row in rows if row["counter"] != "limits")
+
+
+def test_batch_endpoint_caps_cart_length():
+    install_dynamodb()
+    import main
+    from fastapi.testclient import TestClient
+    client = TestClient(main.app)
+    n = main.SMARTSPEND_MAX_BATCH
+    body = {"amounts": [1.0] * n, "categories": ["Food"] * n, "user_id": "u5"}
+    assert client.post("/api/smartspend/batch", json=body).status_code == 200
+    body["amounts"].append(1.0)
+    body["categories"].append("Food")
+    assert client.post("/api/smartspend/batch", json=body).status_code == 422
+
+
+if __name__ == "__main__":
+    test_checks_account_for_spend_in_each_window()
+    test_rebuild_and_default_limits()
+    test_batch_matches_single_checks()
+    test_counter_table_expires_rows_through_ttl()
+    test_batch_endpoint_caps_cart_length()
+    print("All tests passed!")
@@ -0,0 +1,47 @@
+import sys
+import os
+import json
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from fastapi.testclient import TestClient
+
+from services.bedrock_service import BedrockService
+from benchmarks.local_aws import install_bedrock, install_dynamodb
+
+
+def test_stream_matches_full_response_for_nova_and_titan(monkeypatch):
+    for model_id in ("amazon.nova-pro-v1:0", "amazon.titan-tg1-large"):
+        monkeypatch.setenv("BEDROCK_MODEL_ID", model_id)
+        client = install_bedrock()
+        parts = list(BedrockService.stream_response("How do I build an emergency fund?"))
+        assert len(parts) > 1
+        assert "".join(parts) == BedrockService.generate_response("How do I build an emergency fund?")
+        # The completed stream was cached, so only the streaming call reached the model
+        assert client.calls == 1
+
+
+def test_chat_endpoint_streams_sse_and_keeps_json():
+    install_dynamodb()
+    install_bedrock()
+    import main
+    client = TestClient(main.app)
+
+    with client.stream("POST", "/api/chat", json={"message": "Tips for paying off credit card debt?"},
+                       headers={"Accept": "text/event-stream"}) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [block.split("\n") for block in response.read().decode().strip().split("\n\n")]
+    names = [lines[0][len("event: "):] for lines in events]
+    data = [json.loads(lines[1][len("data: "):]) for lines in events]
+    assert names[0] == "context" and names[-1] == "done" and "token" in names
+    streamed = "".join(d["text"] for name, d in zip(names, data) if name == "token")
+
+    plain = client.post("/api/chat", json={"message": "Tips for paying off credit card debt?"}).json()
+    assert plain["response"] == streamed == data[-1]["response"]
+    assert plain["context"] == data[0]
+
+
+if __name__ == "__main__":
+    test_chat_endpoint_streams_sse_and_keeps_json()
+    print("All tests passed!")
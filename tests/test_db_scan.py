@@ -0,0 +1,104 @@
+import sys
+import os
+
+import pytest
+from botocore.exceptions import ClientError
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from services.db_service import DynamoDBService
+from services.transaction_service import TransactionService
+from benchmarks.local_aws import install_dynamodb, seed_transactions
+
+
+def test_scan_follows_last_evaluated_key():
+    install_dynamodb()
+    # More rows than fit in one scan page
+    seed_transactions(2500)
+    items = DynamoDBService.get_all_transactions()
+    assert len(items) == 2500
+    assert len({item['id'] for item in items}) == 2500
+    assert all(isinstance(item['amount'], float) for item in items)
+    assert all('date_id' not in item for item in items)
+
+
+def test_parallel_scan_matches_sequential():
+    install_dynamodb()
+    seed_transactions(3000, users=3)
+    sequential = DynamoDBService.get_all_transactions()
+    parallel = DynamoDBService.get_all_transactions(parallel=True, total_segments=6)
+    assert sorted(item['id'] for item in parallel) == sorted(item['id'] for item in sequential)
+
+
+def test_parallel_scan_stops_early():
+    install_dynamodb()
+    seed_transactions(3000)
+    pages = DynamoDBService.iter_parallel_pages(total_segments=4, page_size=10)
+    first = next(pages)
+    pages.close()
+    assert len(first) == 10
+
+
+def test_user_query_by_date_and_category():
+    install_dynamodb()
+    seed_transactions(1200, users=4)
+
+    october = TransactionService.get_user_transactions("user-1", date_from="2023-10-01", date_to="2023-10-31")
+    assert october
+    assert all(item['user_id'] == "user-1" and item['date'].startswith("2023-10") for item in october)
+    assert [item['date'] for item in october] == sorted(item['date'] for item in october)
+
+    food = TransactionService.get_user_transactions("user-1", category="Food")
+    assert food
+    assert all(item['category'] == "Food" and item['user_id'] == "user-1" for item in food)
+    # Burger King and Whole Foods rows are stored under the canonical Food category
+    expected = [i for i in range(1, 1201) if i % 4 == 1 and i % 5 in (0, 4)]
+    assert sorted(item['id'] for item in food) == expected
+
+
+def test_user_pages_resume_from_cursor():
+    install_dynamodb()
+    seed_transactions(300, users=2)
+    expected = [item['id'] for item in TransactionService.get_user_transactions("user-0", category="Shopping")]
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = TransactionService.get_user_transactions_page(7, cursor, "user-0", category="Shopping")
+        seen.extend(item['id'] for item in page)
+        if not cursor:
+            break
+    assert seen == expected
+
+
+def test_error_mid_pagination_is_raised(monkeypatch):
+    install_dynamodb()
+    seed_transactions(2500)
+    table = DynamoDBService.get_table()
+    calls = []
+
+    def failing(method):
+        def call(**kwargs):
+            calls.append(method.__name__)
+            if len(calls) > 1:
+                raise ClientError({"Error": {"Code": "InternalServerError", "Message": "boom"}}, method.__name__)
+            return method(**kwargs)
+        return call
+
+    monkeypatch.setattr(table, "query", failing(table.query))
+    with pytest.raises(ClientError):
+        TransactionService.get_user_transactions("user-0")
+
+    calls.clear()
+    monkeypatch.setattr(table, "scan", failing(table.scan))
+    with pytest.raises(ClientError):
+        DynamoDBService.get_all_transactions()
+
+
+if __name__ == "__main__":
+    test_scan_follows_last_evaluated_key()
+    test_parallel_scan_matches_sequential()
+    test_parallel_scan_stops_early()
+    test_user_query_by_date_and_category()
+    test_user_pages_resume_from_cursor()
+    print("All tests passed!")
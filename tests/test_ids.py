@@ -0,0 +1,66 @@
+import sys
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from services.id_generator import SnowflakeGenerator
+from services.transaction_service import TransactionService
+from benchmarks.local_aws import install_dynamodb
+
+
+def test_ids_unique_and_monotonic_per_thread():
+    generator = SnowflakeGenerator(worker_id=5)
+    per_thread = {}
+
+    def generate(n):
+        per_thread[threading.get_ident()] = ids = [generator.next_id() for _ in range(n)]
+        return ids
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        batches = list(pool.map(generate, [5000] * 16))
+    all_ids = [i for batch in batches for i in batch]
+    assert len(set(all_ids)) == len(all_ids) == 80000
+    assert all(batch == sorted(batch) for batch in batches)
+    assert max(all_ids) < 2 ** 53
+    assert SnowflakeGenerator.parse(all_ids[0])["worker_id"] == 5
+
+
+def test_clock_regression_keeps_ids_increasing(monkeypatch):
+    generator = SnowflakeGenerator(worker_id=1)
+    clock = iter([1000, 1000, 990, 990, 1001])
+    monkeypatch.setattr(generator, "_now_ms", lambda: next(clock))
+    ids = [generator.next_id() for _ in range(5)]
+    assert ids == sorted(set(ids))
+    assert generator.clock_regressions == 2
+
+
+def test_concurrent_inserts_do_not_overwrite(monkeypatch):
+    install_dynamodb()
+    monkeypatch.setattr(TransactionService, "id_collisions", 0)
+
+    def insert(i):
+        return TransactionService.add_transaction(1.0, "Food", f"Shop {i}", date="2024-06-01", user_id="stress")
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        results = list(pool.map(insert, range(3000)))
+    assert all(results)
+    assert len(TransactionService.get_user_transactions("stress")) == 3000
+    assert TransactionService.id_collisions == 0
+
+    # Another process with the same worker id replays an id: the conditional put catches it
+    taken = results[0]["id"]
+    replay = iter([taken])
+    real_next = TransactionService.ids.next_id
+    monkeypatch.setattr(TransactionService.ids, "next_id", lambda: next(replay, None) or real_next())
+    added = TransactionService.add_transaction(2.0, "Food", "Replay", date="2024-06-01", user_id="stress")
+    assert added["id"] != taken
+    assert TransactionService.id_collisions == 1
+    assert len(TransactionService.get_user_transactions("stress")) == 3001
+
+
+if __name__ == "__main__":
+    test_ids_unique_and_monotonic_per_thread()
+    print("All tests passed!")
@@ -0,0 +1,110 @@
+import sys
+import os
+import asyncio
+
+import pytest
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from services.import_service import ImportOffsetError, ImportService
+from services.rollup_service import RollupService
+from services.transaction_service import TransactionService
+from benchmarks.local_aws import install_dynamodb
+
+CSV = (
+    'Date,Description,Amount,Balance\n'
+    + ''.join(f'2024-03-{day:02d},"Coffee, Shop",-4.50,{1000 - day * 4.5:.2f}\n' for day in range(1, 21))
+    + '03/21/2024,"Multi\nline payee",-20.00,900.00\n'
+    + '2024-03-22,Payroll,2500.00,3400.00\n'
+    + 'not a date,Broken,-1.00,0\n'
+).encode()
+
+
+def chunks(data: bytes, size: int, fail_after: int = None):
+    async def stream():
+        for i in range(0, len(data), size):
+            if fail_after is not None and i >= fail_after:
+                raise ConnectionError("client went away")
+            yield data[i:i + size]
+    return stream()
+
+
+def test_interrupted_csv_import_resumes_without_duplicates(tmp_path, monkeypatch):
+    install_dynamodb()
+    monkeypatch.setattr(ImportService, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(ImportService, "BATCH_SIZE", 5)
+    job = ImportService.create_job("imp", "csv", job_id="march")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(ImportService.aimport_stream("march", chunks(CSV, 64, fail_after=600)))
+    ImportService._jobs.clear()  # state must survive a restart
+    job = ImportService.get_job("march")
+    assert job.status == "interrupted" and 0 < job.offset < len(CSV)
+    with pytest.raises(ImportOffsetError):
+        asyncio.run(ImportService.aimport_stream("march", chunks(CSV, 64), offset=0))
+
+    result = asyncio.run(ImportService.aimport_stream("march", chunks(CSV[job.offset:], 64), offset=job.offset))
+    assert result["status"] == "complete"
+    assert (result["rows_read"], result["written"], result["skipped"], result["errors"]) == (23, 21, 1, 1)
+    rows = TransactionService.get_user_transactions("imp")
+    assert len(rows) == 21
+    assert {"Multi\nline payee", "Coffee, Shop"} <= {row["merchant"] for row in rows}
+    assert RollupService.get_aggregates("imp")["total"] == 110.0
+
+    # Importing the same export again writes nothing new
+    again = ImportService.create_job("imp", "csv")
+    result = asyncio.run(ImportService.aimport_stream(again.job_id, chunks(CSV, 1000)))
+    assert (result["written"], result["duplicates"]) == (0, 21)
+    assert RollupService.get_aggregates("imp")["count"] == 21
+
+
+def test_identical_rows_in_one_file_are_kept(tmp_path, monkeypatch):
+    install_dynamodb()
+    monkeypatch.setattr(ImportService, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(ImportService, "BATCH_SIZE", 1)
+    # No reference or balance column: two coffees on the same day look the same
+    csv = b"Date,Description,Amount\n2024-04-02,Coffee Shop,-4.50\n2024-04-02,Coffee Shop,-4.50\n" \
+          b"2024-04-03,Bakery,-3.00\n2024-04-03,Bakery,-3.00\n2024-04-03,Bakery,-3.00\n"
+
+    job = ImportService.create_job("twins", "csv")
+    result = asyncio.run(ImportService.aimport_stream(job.job_id, chunks(csv, 16)))
+    assert (result["written"], result["duplicates"]) == (5, 0)
+    assert RollupService.get_aggregates("twins")["total"] == 18.0
+
+    # An upload resumed between two identical rows keeps counting them
+    job = ImportService.create_job("twins-resumed", "csv")
+    with pytest.raises(ConnectionError):
+        asyncio.run(ImportService.aimport_stream(job.job_id, chunks(csv, 16, fail_after=112)))
+    ImportService._jobs.clear()
+    job = ImportService.get_job(job.job_id)
+    assert job.offset == csv.index(b"2024-04-03") + 24  # after the first Bakery row
+    asyncio.run(ImportService.aimport_stream(job.job_id, chunks(csv[job.offset:], 16), offset=job.offset))
+    assert len(TransactionService.get_user_transactions("twins-resumed")) == 5
+
+    again = ImportService.create_job("twins", "csv")
+    result = asyncio.run(ImportService.aimport_stream(again.job_id, chunks(csv, 1000)))
+    assert (result["written"], result["duplicates"]) == (0, 5)
+    assert len(TransactionService.get_user_transactions("twins")) == 5
+
+
+def test_ofx_import(tmp_path, monkeypatch):
+    install_dynamodb()
+    monkeypatch.setattr(ImportService, "STATE_DIR", str(tmp_path))
+    ofx = b"OFXHEADER:100\n<OFX><BANKTRANLIST>" + b"".join(
+        b"<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>2024031%d120000<TRNAMT>-%d.00<FITID>F%d<NAME>UBER *TRIP</STMTTRN>"
+        % (i, 10 + i, i) for i in range(3)
+    ) + b"</BANKTRANLIST></OFX>"
+    path = tmp_path / "statement.ofx"
+    path.write_bytes(ofx)
+
+    job = ImportService.create_job("ofx-user", "ofx")
+    result = ImportService.import_file(str(path), job.job_id, chunk_size=50)
+    assert (result["written"], result["progress"]) == (3, 1.0)
+    rows = TransactionService.get_user_transactions("ofx-user")
+    assert [row["amount"] for row in rows] == [10.0, 11.0, 12.0]
+    assert rows[0]["date"] == "2024-03-10" and rows[0]["category"] == "Transport"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
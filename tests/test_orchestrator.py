@@ -0,0 +1,76 @@
+import sys
+import os
+import asyncio
+import threading
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from services.agents.orchestrator import AgentOrchestrator, SimulationAgent
+from services.bedrock_service import BedrockService
+from benchmarks.local_aws import install_bedrock
+
+
+def test_detect_intents_keeps_single_agent_precedence():
+    assert AgentOrchestrator.detect_intents("What is my risk if I simulate a raise?") == \
+        ["risk_assessment", "scenario_simulation"]
+    assert AgentOrchestrator.detect_intent("What is my risk if I simulate a raise?") == "risk_assessment"
+    assert AgentOrchestrator.detect_intents("Budget tips") == ["general_advice"]
+
+
+def test_fan_out_runs_agents_in_parallel_and_degrades_on_timeout(monkeypatch):
+    install_bedrock(latency=0.2)
+    message = "What if I lose my job, what is my risk and what should I do?"
+
+    result = asyncio.run(AgentOrchestrator.afan_out(message, ["Keep an emergency fund."], debug=True))
+    assert [a["status"] for a in result["agents"]] == ["ok", "ok", "ok"]
+    # Three 200 ms agents finish in about the time of one
+    assert result["total_ms"] < 500
+    assert "**Risk Assessment**" in result["response"] and "**Advice**" in result["response"]
+
+    monkeypatch.setitem(AgentOrchestrator.DEADLINES, "scenario_simulation", 0.05)
+    result = asyncio.run(AgentOrchestrator.afan_out(message, use_cache=False, debug=True))
+    statuses = {a["agent"]: a["status"] for a in result["agents"]}
+    assert statuses == {"risk_assessment": "ok", "scenario_simulation": "timeout", "general_advice": "ok"}
+    assert "Scenario Simulation unavailable" in result["response"]
+    assert "agents" not in asyncio.run(AgentOrchestrator.afan_out("Budget tips"))
+
+
+def test_failed_agent_is_left_out_of_the_answer(monkeypatch):
+    install_bedrock()
+    invoke = BedrockService._invoke
+
+    def flaky_invoke(model_id, prompt, config):
+        if prompt.startswith("Analyze risk"):
+            raise ConnectionError("bedrock unreachable")
+        return invoke(model_id, prompt, config)
+
+    monkeypatch.setattr(BedrockService, "_invoke", staticmethod(flaky_invoke))
+    message = "What is my risk and what should I do?"
+    result = asyncio.run(AgentOrchestrator.afan_out(message, use_cache=False, debug=True))
+    statuses = {a["agent"]: a["status"] for a in result["agents"]}
+    assert statuses == {"risk_assessment": "error", "general_advice": "ok"}
+    assert "Error connecting" not in result["response"] and "bedrock unreachable" not in result["response"]
+    assert "Risk Assessment unavailable" in result["response"]
+    # Single-agent callers still get the error as text
+    assert BedrockService.generate_response("Analyze risk for request: x", use_cache=False).startswith(
+        "Error connecting to AWS Bedrock")
+
+
+def test_simulation_prompt_is_built_off_the_event_loop(monkeypatch):
+    install_bedrock()
+    threads = []
+    build = SimulationAgent.prompt
+
+    def prompt(query):
+        threads.append(threading.current_thread())
+        return build(query)
+
+    monkeypatch.setattr(SimulationAgent, "prompt", staticmethod(prompt))
+    asyncio.run(AgentOrchestrator.afan_out("Simulate 10 years of saving"))
+    assert threads and threading.main_thread() not in threads
+
+
+if __name__ == "__main__":
+    test_detect_intents_keeps_single_agent_precedence()
+    print("All tests passed!")
@@ -0,0 +1,87 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from services.lexical_index import BM25Index, tokenize
+from services.rag_service import RAGService
+from services.vector_store import HashingEmbedder, VectorStore
+
+PASSAGES = [
+    "Capital gains tax is 15% for long-term investments.",
+    "Inflation is currently at 3.2%.",
+    "Average savings account APY is 4.5%.",
+    "Credit card interest compounds monthly; credit card debt is expensive.",
+]
+
+
+def test_tokenize_drops_stop_words():
+    assert tokenize("What is the capital gains tax on my investments?") == ["capital", "gains", "tax", "investments"]
+
+
+def test_bm25_ranking_and_round_trip(tmp_path):
+    index = BM25Index.build(PASSAGES)
+    assert index.search("credit card")[0][0] == 3
+    assert [doc for doc, _ in index.search("capital gains tax savings")] == [0, 2]
+    assert index.search("the of and") == []
+
+    index.save(str(tmp_path))
+    loaded = BM25Index.load(str(tmp_path))
+    assert loaded.search("credit card") == index.search("credit card")
+    assert loaded.passage(1) == PASSAGES[1]
+
+
+def test_retrieve_context_uses_corpus():
+    context = RAGService.retrieve_context("What is the capital gains tax?")
+    assert context[0].startswith("Tax Rule 2024")
+    assert len(context) <= RAGService.TOP_K
+    assert RAGService.retrieve_context("zzzz qqqq") == [RAGService.FALLBACK]
+
+
+def test_vector_store_append_reopen_and_clusters(tmp_path):
+    store = VectorStore(str(tmp_path), HashingEmbedder(dim=128))
+    store.append(PASSAGES[:2])
+    store.append(PASSAGES[2:])
+    assert len(store) == 4 and store.vectors.dtype.name == 'float16'
+
+    reopened = VectorStore(str(tmp_path), HashingEmbedder(dim=128))
+    assert reopened.search("credit card interest", k=1)[0][0] == 3
+    exact = reopened.search_vectors(reopened.embedder.embed(PASSAGES), k=2)
+    assert [hits[0][0] for hits in exact] == [0, 1, 2, 3]
+
+    # Probing every cluster must agree with the exhaustive search
+    reopened.build_clusters(n_clusters=2)
+    assert reopened.search("savings account", k=2, nprobe=2) == reopened.search("savings account", k=2)
+
+
+def test_retrieve_ranked_fuses_lexical_and_semantic():
+    ranked = RAGService.retrieve_ranked("investing for retirement")
+    assert ranked and all(r['lexical_score'] is not None or r['semantic_score'] is not None for r in ranked)
+    assert [r['score'] for r in ranked] == sorted((r['score'] for r in ranked), reverse=True)
+
+
+def test_added_passages_survive_a_rebuild(tmp_path, monkeypatch):
+    corpus = tmp_path / "knowledge"
+    corpus.mkdir()
+    (corpus / "base.txt").write_text("\n\n".join(PASSAGES))
+    monkeypatch.setattr(RAGService, "CORPUS_DIR", str(corpus))
+    monkeypatch.setattr(RAGService, "INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setattr(RAGService, "_index", None)
+    monkeypatch.setattr(RAGService, "_vectors", None)
+
+    assert RAGService.add_passages(["Roth IRA contributions\n\ngrow tax-free."]) == len(PASSAGES) + 1
+    assert RAGService.get_vector_store().texts[-1] == "Roth IRA contributions grow tax-free."
+
+    RAGService._index = None
+    RAGService._vectors = None
+    assert not RAGService._index_is_fresh()
+    index = RAGService.get_index()
+    assert len(index) == len(RAGService.get_vector_store()) == len(PASSAGES) + 1
+    assert index.passage(index.search("roth ira")[0][0]) == "Roth IRA contributions grow tax-free."
+
+
+if __name__ == "__main__":
+    test_tokenize_drops_stop_words()
+    test_retrieve_context_uses_corpus()
+    print("All tests passed!")
@@ -0,0 +1,76 @@
+import sys
+import os
+import re
+import asyncio
+
+import pytest
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from services.report_service import ReportService
+from services.transaction_service import TransactionService
+from services.transaction_cache import TransactionCache
+from benchmarks.local_aws import install_dynamodb
+
+
+def _collect(user_id):
+    async def run():
+        return [chunk async for chunk in ReportService.amonthly_report(user_id)]
+    return asyncio.run(run())
+
+
+def _check_structure(pdf: bytes) -> int:
+    """Checks every xref offset points at its object; returns the page count."""
+    assert pdf.startswith(b"%PDF-1.4") and pdf.endswith(b"%%EOF\n")
+    startxref = int(re.search(rb"startxref\n(\d+)", pdf).group(1))
+    assert pdf[startxref:].startswith(b"xref")
+    entries = re.findall(rb"(\d{10}) 00000 n ", pdf[startxref:])
+    for number, offset in enumerate(entries, 1):
+        assert pdf[int(offset):].startswith(b"%d 0 obj" % number)
+    return int(re.search(rb"/Type /Pages /Kids \[[^\]]*\] /Count (\d+)", pdf).group(1))
+
+
+def test_monthly_report_streams_pages_and_is_cached_per_data_version(monkeypatch):
+    install_dynamodb()
+    ReportService.cache.clear()
+    monkeypatch.setattr(ReportService, "PAGE_SIZE", 50)
+    for i in range(240):
+        TransactionService.add_transaction(10.0 + i, "Food", f"Cafe (#{i})", date=f"2024-0{1 + i % 3}-{1 + i % 28:02d}",
+                                           user_id="r1")
+
+    chunks = _collect("r1")
+    pdf = b"".join(chunks)
+    pages = _check_structure(pdf)
+    # Overview, then 240 rows over three monthly tables
+    assert pages >= 5 and len(chunks) == pages + 2
+    assert ReportService.cache.stats()["entries"] == 1
+
+    # Unchanged data is served from the cache in one piece
+    assert _collect("r1") == [pdf]
+
+    # A new transaction changes the data version, so the report is rebuilt
+    TransactionService.add_transaction(5.0, "Food", "Cafe", date="2024-03-02", user_id="r1")
+    rebuilt = _collect("r1")
+    assert len(rebuilt) > 1 and ReportService.cache.stats()["entries"] == 2
+
+    # So does a write that leaves every total as it was
+    TransactionCache.invalidate("r1")
+    assert len(_collect("r1")) > 1 and ReportService.cache.stats()["entries"] == 3
+
+
+def test_summary_pdf_renders_once_per_version(monkeypatch):
+    install_dynamodb()
+    ReportService.cache.clear()
+    monkeypatch.setattr(ReportService, "PROCESS_WORKERS", 0)
+    TransactionService.add_transaction(12.0, "Transport", "Uber", date="2024-04-02", user_id="r2")
+
+    first = asyncio.run(ReportService.asummary_pdf("r2"))
+    assert first.startswith(b"%PDF")
+    misses = ReportService.cache.stats()["misses"]
+    assert asyncio.run(ReportService.asummary_pdf("r2")) is first
+    assert ReportService.cache.stats()["misses"] == misses
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
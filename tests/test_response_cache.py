@@ -0,0 +1,93 @@
+import sys
+import os
+import asyncio
+import sqlite3
+import threading
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from services.response_cache import ResponseCache, cache_key
+from services.bedrock_service import BedrockService
+from benchmarks.local_aws import install_bedrock
+
+
+def test_lru_ttl_and_size_limits():
+    cache = ResponseCache(ttl_seconds=60, max_entries=2, max_bytes=10)
+    cache.put("a", "1234")
+    cache.put("b", "5678")
+    assert cache.get("a") == "1234"
+    cache.put("c", "90")  # over max_entries: evicts "b", the least recently used
+    assert cache.get("b") is None and cache.get("a") == "1234"
+    cache.put("d", "abcdefgh")  # over max_bytes: evicts until the total fits
+    assert cache.get("d") == "abcdefgh" and cache.get("a") is None
+
+    cache.ttl_seconds = -1
+    assert cache.get("d") is None
+    assert cache.stats()["hits"] == 3 and cache.stats()["evictions"] == 3
+
+
+def test_disk_store_survives_restart(tmp_path):
+    path = str(tmp_path / "responses.db")
+    ResponseCache(path=path).put("key", "answer")
+    restarted = ResponseCache(path=path)
+    assert restarted.get("key") == "answer"
+    assert restarted.get("key") == "answer"
+    assert restarted.stats()["disk_hits"] == 1 and restarted.stats()["hits"] == 1
+
+
+def test_disk_store_trims_only_past_its_limits(tmp_path):
+    path = str(tmp_path / "responses.db")
+    cache = ResponseCache(max_entries=10, max_bytes=1000, path=path)
+    statements = []
+    cache._connection().set_trace_callback(statements.append)
+    for i in range(10):
+        cache.put(f"k{i}", "x" * 10)
+    assert not any(sql.startswith("DELETE") for sql in statements)
+
+    cache.put("k10", "x" * 10)  # the 11th row trims back to 90% of max_entries
+    rows = sqlite3.connect(path).execute("SELECT key FROM responses ORDER BY stored_at").fetchall()
+    assert [key for key, in rows] == ["k2", "k3", "k4", "k5", "k6", "k7", "k8", "k9", "k10"]
+
+    cache.put("big", "y" * 950)  # over max_bytes: the oldest rows go until 900 bytes fit
+    rows = sqlite3.connect(path).execute("SELECT key FROM responses").fetchall()
+    assert [key for key, in rows] == ["big"]
+    assert (cache._disk_rows, cache._disk_bytes) == (1, 950)
+
+
+def test_aget_reads_disk_off_the_event_loop(tmp_path, monkeypatch):
+    path = str(tmp_path / "responses.db")
+    ResponseCache(path=path).put("key", "answer")
+    restarted = ResponseCache(path=path)
+    threads = []
+    disk_get = restarted._disk_get
+
+    def tracked_disk_get(key):
+        threads.append(threading.current_thread())
+        return disk_get(key)
+    monkeypatch.setattr(restarted, "_disk_get", tracked_disk_get)
+
+    async def lookup():
+        return await restarted.aget("key"), await restarted.aget("key"), await restarted.aget("other")
+
+    assert asyncio.run(lookup()) == ("answer", "answer", None)
+    assert len(threads) == 2 and threading.main_thread() not in threads
+    assert restarted.stats()["disk_hits"] == 1 and restarted.stats()["hits"] == 1
+    assert restarted.stats()["misses"] == 1
+
+
+def test_generate_response_caches_by_normalized_prompt():
+    client = install_bedrock()
+    first = BedrockService.generate_response("What if  I save\n$200 a month?")
+    assert BedrockService.generate_response("What if I save $200 a month?") == first
+    assert client.calls == 1
+
+    BedrockService.generate_response("What if I save $200 a month?", use_cache=False)
+    assert client.calls == 2
+    assert cache_key("m", "p", {"t": 1}) != cache_key("m", "p", {"t": 2})
+
+
+if __name__ == "__main__":
+    test_lru_ttl_and_size_limits()
+    test_generate_response_caches_by_normalized_prompt()
+    print("All tests passed!")
@@ -0,0 +1,56 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from services.db_service import DynamoDBService
+from services.rollup_service import RollupService
+from services.transaction_service import TransactionService
+from benchmarks.local_aws import install_dynamodb, seed_transactions
+
+
+def test_rollups_updated_on_write():
+    install_dynamodb()
+    TransactionService.add_transaction(12.0, "Taxi", "UBER *TRIP", date="2023-10-26", user_id="u1")
+    TransactionService.add_transaction(30.0, "Food", "Walmart", date="2023-10-27", user_id="u1")
+    TransactionService.add_transaction(8.5, "Food", "Walmart", date="2023-11-02", user_id="u1")
+    TransactionService.add_transaction(99.0, "Food", "Walmart", date="2023-11-02", user_id="u2")
+
+    aggregates = RollupService.get_aggregates("u1")
+    assert aggregates["total"] == 50.5
+    assert aggregates["count"] == 3
+    assert aggregates["monthly"] == [
+        {"month": "2023-10", "total": 42.0, "count": 2},
+        {"month": "2023-11", "total": 8.5, "count": 1},
+    ]
+    # Uber rows are bucketed under the cleaned category
+    assert aggregates["categories"][0] == {"category": "Food", "total": 38.5, "count": 2}
+    assert {"category": "Transport", "total": 12.0, "count": 1} in aggregates["categories"]
+
+    november = RollupService.get_aggregates("u1", month_from="2023-11", month_to="2023-11")
+    assert november["total"] == 8.5
+
+
+def test_rebuild_matches_raw_data():
+    install_dynamodb()
+    seed_transactions(500, users=2)
+    # Drifted and stale buckets
+    DynamoDBService.increment_rollup("user-0", "2023-01", "Food", 1000.0)
+    DynamoDBService.increment_rollup("user-0", "1999-01", "Food", 5.0)
+
+    RollupService.rebuild(user_id="user-0")
+    rows = TransactionService.get_user_transactions("user-0")
+    aggregates = RollupService.get_aggregates("user-0")
+    assert aggregates["count"] == len(rows) == 250
+    assert abs(aggregates["total"] - sum(row["amount"] for row in rows)) < 0.01
+    assert "1999-01" not in [m["month"] for m in aggregates["monthly"]]
+
+    rebuilt = RollupService.rebuild(segments=4)
+    assert set(rebuilt) == {"user-0", "user-1"}
+
+
+if __name__ == "__main__":
+    test_rollups_updated_on_write()
+    test_rebuild_matches_raw_data()
+    print("All tests passed!")
@@ -0,0 +1,63 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from services.simulation_service import MonteCarloEngine, SimulationParams, SimulationTooLargeError
+
+
+def test_zero_volatility_matches_linear_savings():
+    params = SimulationParams(savings=1000, income=3000, expenses=2000, debt=0, return_mean=0, return_vol=0,
+                              inflation_mean=0, inflation_vol=0, months=24, paths=10, seed=1)
+    result = MonteCarloEngine.run(params)
+    assert result["bands"]["month"] == [12, 24]
+    assert result["bands"]["savings"]["50"] == [13000, 25000]
+    assert result["bands"]["savings"]["5"] == result["bands"]["savings"]["95"]
+
+
+def test_debt_payment_comes_out_of_savings_until_paid_off():
+    params = SimulationParams(savings=0, income=1000, expenses=1000, debt=300, debt_rate=0, debt_payment=100,
+                              return_mean=0, return_vol=0, inflation_mean=0, inflation_vol=0, months=12,
+                              paths=4, seed=1)
+    result = MonteCarloEngine.run(params)
+    assert result["debt_payoff_month"] == 3
+    assert result["bands"]["savings"]["50"] == [-300]
+    assert result["final"]["probability_shortfall"] == 1.0
+
+
+def test_seeded_runs_do_not_depend_on_chunk_size():
+    goals = [{"name": "Car", "amount": 40000, "month": 30}]
+    whole = MonteCarloEngine.run(SimulationParams(paths=10000, seed=7, goals=goals))
+    chunked = MonteCarloEngine.run(SimulationParams(paths=10000, seed=7, goals=goals, chunk_size=4096))
+    assert whole == chunked
+    assert whole != MonteCarloEngine.run(SimulationParams(paths=10000, seed=8, goals=goals))
+
+    probability = whole["goals"][0]["probability"]
+    assert 0 < probability < 1
+    bands = whole["bands"]["real_savings"]
+    assert np.all(np.array(bands["5"]) <= np.array(bands["50"]))
+    assert np.all(np.array(bands["50"]) <= np.array(bands["95"]))
+
+
+def test_invalid_params_raise_value_error():
+    with pytest.raises(ValueError):
+        SimulationParams(return_distribution="cauchy")
+    with pytest.raises(ValueError):
+        SimulationParams(paths=SimulationParams.MAX_PATHS + 1)
+    # Monthly bands over 100 years for every allowed path: about 2.7 GB of results
+    with pytest.raises(SimulationTooLargeError):
+        SimulationParams(paths=SimulationParams.MAX_PATHS, months=1200, band_step=1)
+    assert SimulationParams(paths=SimulationParams.MAX_PATHS, months=1200).result_bytes \
+        <= SimulationParams.MAX_RESULT_BYTES
+
+
+if __name__ == "__main__":
+    test_zero_volatility_matches_linear_savings()
+    test_debt_payment_comes_out_of_savings_until_paid_off()
+    test_seeded_runs_do_not_depend_on_chunk_size()
+    test_invalid_params_raise_value_error()
+    print("All tests passed!")
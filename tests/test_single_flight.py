@@ -0,0 +1,75 @@
+import sys
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from services.single_flight import SingleFlight
+from services.bedrock_service import BedrockService
+from benchmarks.local_aws import install_bedrock
+
+
+def test_threads_share_one_execution_and_errors():
+    flight = SingleFlight("test-sync")
+    runs = []
+
+    def slow(value):
+        runs.append(value)
+        time.sleep(0.05)
+        return [value]
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: flight.do("k", slow, 1), range(8)))
+    assert len(runs) == 1 and all(r is results[0] for r in results)
+    assert flight.stats() == {"calls": 8, "executions": 1, "coalesced": 7, "in_flight": 0}
+
+    def fail():
+        raise RuntimeError("boom")
+    try:
+        flight.do("k", fail)
+        assert False, "expected the leader's exception"
+    except RuntimeError:
+        pass
+    # Completed calls are forgotten: the next call runs again
+    assert flight.do("k", lambda: 2) == 2
+
+
+def test_async_callers_and_sync_followers_share_a_call():
+    flight = SingleFlight("test-async")
+    runs = []
+
+    async def compute():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        leader = asyncio.ensure_future(flight.ado("k", compute))
+        await asyncio.sleep(0)
+        # A thread joining the async leader's in-flight call
+        sync_result = loop.run_in_executor(None, flight.do, "k", lambda: "not run")
+        cancelled = asyncio.ensure_future(flight.ado("k", compute))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        return await asyncio.gather(leader, flight.ado("k", compute), sync_result)
+
+    assert asyncio.run(scenario()) == ["done", "done", "done"]
+    assert len(runs) == 1 and flight.stats()["coalesced"] == 3
+
+
+def test_identical_concurrent_prompts_invoke_bedrock_once():
+    client = install_bedrock(latency=0.05)
+    with ThreadPoolExecutor(6) as pool:
+        answers = set(pool.map(lambda _: BedrockService.generate_response("Re-run my risk analysis"), range(6)))
+    assert len(answers) == 1 and client.calls == 1
+
+
+if __name__ == "__main__":
+    test_threads_share_one_execution_and_errors()
+    test_async_callers_and_sync_followers_share_a_call()
+    test_identical_concurrent_prompts_invoke_bedrock_once()
+    print("All tests passed!")
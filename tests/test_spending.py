@@ -0,0 +1,81 @@
+import sys
+import os
+import gzip
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from fastapi.testclient import TestClient
+
+from services.db_service import DynamoDBService
+from services.transaction_cache import TransactionCache
+from services.transaction_service import TransactionService
+from benchmarks.local_aws import install_dynamodb
+
+
+def test_spending_etag_skips_dynamodb_until_data_changes():
+    resource = install_dynamodb()
+    TransactionCache.clear()
+    import main
+    client = TestClient(main.app)
+    for i in range(3):
+        TransactionService.add_transaction(10.0 + i, "Food", f"Cafe {i}", date=f"2024-02-0{i + 1}", user_id="etag")
+
+    first = client.get("/api/spending", params={"user_id": "etag"}, headers={"Accept-Encoding": "identity"})
+    assert first.status_code == 200 and "content-encoding" not in first.headers
+    assert [row["amount"] for row in first.json()] == [10.0, 11.0, 12.0]
+    etag = first.headers["etag"]
+
+    calls = resource.Table(DynamoDBService.TABLE_NAME).calls
+    TransactionCache.clear()
+    again = client.get("/api/spending", params={"user_id": "etag"}, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.headers["etag"] == etag
+    assert resource.Table(DynamoDBService.TABLE_NAME).calls == calls
+
+    # Another range of the same data has its own tag
+    other = client.get("/api/spending", params={"user_id": "etag", "from": "2024-02-02"},
+                       headers={"If-None-Match": etag})
+    assert other.status_code == 200 and len(other.json()) == 2
+
+    TransactionService.add_transaction(5.0, "Food", "Cafe", date="2024-02-04", user_id="etag")
+    changed = client.get("/api/spending", params={"user_id": "etag"}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert len(changed.json()) == 4
+
+
+def test_spending_rejects_impossible_dates():
+    install_dynamodb()
+    TransactionCache.clear()
+    import main
+    client = TestClient(main.app)
+    TransactionService.add_transaction(10.0, "Food", "Cafe", date="2024-02-01", user_id="dates")
+
+    # Both the cached-columns and the paged branches
+    for params in ({"from": "2024-13-01"}, {"to": "2024-02-30", "limit": 5}):
+        response = client.get("/api/spending", params={"user_id": "dates", **params})
+        assert response.status_code == 400 and "date" in response.json()["detail"]
+    assert client.get("/api/spending", params={"user_id": "dates", "from": "2024-02-01"}).status_code == 200
+
+
+def test_spending_gzip_matches_plain_body():
+    install_dynamodb()
+    import main
+    client = TestClient(main.app)
+    for i in range(600):
+        TransactionService.add_transaction(1.0 + i, "Transport", "Uber", date="2024-03-01", user_id="gz")
+
+    plain = client.get("/api/spending", params={"user_id": "gz"}, headers={"Accept-Encoding": "identity"})
+    with client.stream("GET", "/api/spending", params={"user_id": "gz"},
+                       headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        raw = b"".join(response.iter_raw())
+    assert gzip.decompress(raw) == plain.content
+    assert len(raw) < len(plain.content) / 4
+    assert len(plain.json()) == 600
+
+
+if __name__ == "__main__":
+    test_spending_etag_skips_dynamodb_until_data_changes()
+    test_spending_rejects_impossible_dates()
+    test_spending_gzip_matches_plain_body()
+    print("All tests passed!")
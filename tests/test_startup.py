@@ -0,0 +1,25 @@
+import sys
+import os
+import json
+import subprocess
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend'))
+
+
+def test_import_defers_heavy_modules_and_table_setup():
+    # A fresh process, as on a serverless cold start
+    code = (
+        "import sys, json, main\n"
+        "from services.db_service import DynamoDBService\n"
+        "print(json.dumps({'loaded': [m for m in ('boto3', 'botocore.config', 'reportlab', 'dotenv', 'numpy') if m in sys.modules],"
+        " 'resource': DynamoDBService._resource is not None}))"
+    )
+    env = dict(os.environ, VERCEL="1")
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, env=env, capture_output=True, text=True, check=True)
+    state = json.loads(out.stdout.strip().splitlines()[-1])
+    assert state == {"loaded": [], "resource": False}
+
+
+if __name__ == "__main__":
+    test_import_defers_heavy_modules_and_table_setup()
+    print("All tests passed!")
@@ -0,0 +1,76 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from datetime import date, timedelta
+
+import pytest
+
+from services import storage
+from services.budget_service import BudgetService
+from services.rollup_service import RollupService
+from services.sqlite_service import SQLiteService
+from services.storage import KeyCollisionError
+from services.transaction_cache import TransactionCache
+from services.transaction_service import TransactionService
+from benchmarks.local_aws import install_dynamodb, install_sqlite
+
+
+def _exercise(user_id: str) -> dict:
+    """The same writes and reads through the services, whatever the backend."""
+    TransactionCache.clear()
+    BudgetService.clear()
+    today = date.today()
+    rows = [(12.5, "Food", "Cafe", today), (40.0, "Transport", "Uber", today),
+            (7.25, "Food", "Bakery", today - timedelta(days=40)), (99.0, "Shopping", "Store", today - timedelta(days=70))]
+    for amount, category, merchant, day in rows:
+        TransactionService.add_transaction(amount, category, merchant, date=day.isoformat(), user_id=user_id)
+    BudgetService.set_limits(user_id, {"Food": {"day": 15}})
+
+    first, cursor = TransactionService.get_user_transactions_page(3, user_id=user_id)
+    rest, end = TransactionService.get_user_transactions_page(3, cursor=cursor, user_id=user_id)
+    strip = lambda items: [(t["amount"], t["category"], t["date"]) for t in items]
+    return {
+        "pages": (strip(first), strip(rest), end),
+        "food": strip(TransactionService.get_user_transactions(user_id, category="Food")),
+        "recent": strip(TransactionService.get_user_transactions(user_id, date_from=(today - timedelta(days=1)).isoformat())),
+        "aggregates": RollupService.get_aggregates(user_id),
+        "budget": BudgetService.check(user_id, 5.0, "Food"),
+    }
+
+
+def test_sqlite_matches_dynamodb(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "_store", storage.get_store())
+    install_dynamodb()
+    expected = _exercise("parity")
+    install_sqlite(str(tmp_path / "parity.sqlite3"))
+    assert _exercise("parity") == expected
+    assert expected["budget"]["allowed"] is False and len(expected["pages"][0]) == 3
+
+
+def test_sqlite_store_keys_and_schema(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "_store", storage.get_store())
+    install_sqlite(str(tmp_path / "store.sqlite3"))
+    tx = {"id": 1, "user_id": "u", "category": "Food", "amount": 3.5, "date": "2024-01-02", "merchant": "M",
+          "note": "kept in extra"}
+    assert SQLiteService.add_transaction(tx, if_absent=True)
+    with pytest.raises(KeyCollisionError):
+        SQLiteService.add_transaction(tx, if_absent=True)
+    assert SQLiteService.batch_add_transactions([dict(tx, id=i) for i in range(2, 5)]) == 3
+    assert SQLiteService.existing_date_ids("u", ["2024-01-02#1", "2024-01-02#9"]) == {"2024-01-02#1"}
+    assert SQLiteService.get_all_transactions()[0] == tx
+
+    db = SQLiteService.connection()
+    assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    plans = [" ".join(row[-1] for row in db.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+             for sql, params in ((SQLiteService.USER_PAGE, ("u", "", "", "~", 10)),
+                                 (SQLiteService.CATEGORY_PAGE, ("u", "Food", "", "", "~", 10)),
+                                 (SQLiteService.ROLLUPS, ("u", "", "~")))]
+    assert all("SCAN" not in plan for plan in plans)
+    assert "transactions_user_category" in plans[1]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
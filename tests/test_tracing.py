@@ -0,0 +1,77 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+import boto3
+from botocore.stub import Stubber
+from fastapi.testclient import TestClient
+
+from services import tracing
+from benchmarks.local_aws import install_bedrock, install_dynamodb
+
+
+def _spans(header: str) -> dict:
+    spans = {}
+    for entry in header.split(", "):
+        name, *params = entry.split(";")
+        spans[name] = float(dict(p.split("=", 1) for p in params)["dur"])
+    return spans
+
+
+def test_chat_server_timing_and_metrics(monkeypatch):
+    install_dynamodb()
+    install_bedrock()
+    import main
+    client = TestClient(main.app)
+
+    message = {"message": "How should I budget for a trip?", "user_id": "trace"}
+    # Stage names and AWS latencies are not exposed by default
+    response = client.post("/api/chat", json=message)
+    assert response.status_code == 200 and "server-timing" not in response.headers
+
+    monkeypatch.setattr(tracing, "TRACE_TOKEN", "s3cret")
+    assert "server-timing" not in client.post("/api/chat", json=message,
+                                              headers={"X-Trace-Token": "wrong"}).headers
+    response = client.post("/api/chat", json={**message, "fresh": True}, headers={"X-Trace-Token": "s3cret"})
+    spans = _spans(response.headers["server-timing"])
+    for stage in ("extract", "retrieve", "route", "agent.general_advice", "bedrock-runtime.InvokeModel", "agents"):
+        assert stage in spans
+    assert spans["total"] >= spans["agents"] >= spans["bedrock-runtime.InvokeModel"]
+
+    metrics = client.get("/metrics").text
+    assert 'fintwin_span_seconds_count{span="retrieve"}' in metrics
+    assert 'fintwin_request_duration_seconds_count{method="POST",route="/api/chat",status="200"}' in metrics
+    assert tracing.TOKENS.value(os.getenv('BEDROCK_MODEL_ID', 'amazon.nova-pro-v1:0'), "output") > 0
+    assert 'fintwin_cache_misses_total{cache="bedrock"}' in metrics
+
+    # Unsampled requests are still counted, but carry no trace
+    monkeypatch.setattr(tracing, "SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(tracing, "SERVER_TIMING", True)
+    before = tracing.REQUEST_SECONDS.count("GET", "/", "200")
+    assert "server-timing" in client.get("/").headers  # opted in, so traced
+    monkeypatch.setattr(tracing, "SERVER_TIMING", False)
+    assert "server-timing" not in client.get("/").headers
+    assert tracing.REQUEST_SECONDS.count("GET", "/", "200") == before + 2
+
+
+def test_instrumented_boto3_client_records_calls_and_errors():
+    client = boto3.client("dynamodb", region_name="us-east-1", aws_access_key_id="x", aws_secret_access_key="x")
+    tracing.instrument_client(client)
+    before = tracing.AWS_CALL_SECONDS.count("dynamodb", "GetItem")
+    with Stubber(client) as stub:
+        stub.add_response("get_item", {"Item": {"id": {"N": "1"}}})
+        stub.add_client_error("get_item", service_error_code="ProvisionedThroughputExceededException")
+        client.get_item(TableName="t", Key={"id": {"N": "1"}})
+        try:
+            client.get_item(TableName="t", Key={"id": {"N": "1"}})
+        except client.exceptions.ProvisionedThroughputExceededException:
+            pass
+    assert tracing.AWS_CALL_SECONDS.count("dynamodb", "GetItem") == before + 2
+    assert tracing.AWS_ERRORS.value("dynamodb", "GetItem", "ProvisionedThroughputExceededException") >= 1
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
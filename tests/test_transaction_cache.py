@@ -0,0 +1,100 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from services.transaction_cache import TransactionCache, TransactionColumns, StringInterner
+from services.transaction_service import TransactionService
+from benchmarks.local_aws import install_dynamodb, seed_transactions
+
+ROWS = [
+    {"id": 1, "category": "Food", "amount": 25.5, "date": "2023-10-25", "merchant": "Burger King #123"},
+    {"id": 2, "category": "Transport", "amount": 12.0, "date": "2023-10-26", "merchant": "Uber"},
+    {"id": 3, "category": "Food", "amount": 45.0, "date": "2023-11-28", "merchant": "Whole Foods Market"},
+]
+
+
+def test_columns_filters_and_sums():
+    columns = TransactionColumns.from_records("u1", ROWS, StringInterner())
+    assert columns.total() == 82.5
+    assert columns.category_totals() == {"Food": 70.5, "Transport": 12.0}
+    assert columns.monthly_totals() == {"2023-10": 37.5, "2023-11": 45.0}
+
+    october = columns.mask(date_from="2023-10-01", date_to="2023-10-31")
+    assert columns.total(october) == 37.5
+    assert columns.total(columns.mask(category="Food")) == 70.5
+    assert columns.total(columns.mask(category="Unknown")) == 0.0
+
+    columns.append({"id": 4, "category": "Rent", "amount": 900.0, "date": "2023-10-01", "merchant": "Landlord"})
+    records = columns.to_records(columns.mask(date_to="2023-10-31"))
+    assert [r["id"] for r in records] == [4, 1, 2]
+    assert records[0] == {"id": 4, "user_id": "u1", "category": "Rent", "amount": 900.0,
+                          "date": "2023-10-01", "merchant": "Landlord"}
+
+
+def test_write_through_and_invalidation():
+    install_dynamodb()
+    TransactionCache.clear()
+    seed_transactions(40, users=1, user_prefix="cache")
+
+    columns = TransactionService.get_user_columns("cache-0")
+    assert len(columns) == 40
+    assert TransactionService.get_user_columns("cache-0") is columns
+
+    TransactionService.add_transaction(10.0, "Taxi", "UBER *TRIP", date="2024-01-15", user_id="cache-0")
+    cached = TransactionService.get_user_columns("cache-0")
+    assert cached is columns and len(cached) == 41
+    # Cached rows are already cleaned
+    assert cached.category_totals(cached.mask(date_from="2024-01-01"))["Transport"] == 10.0
+
+    TransactionCache.invalidate("cache-0")
+    reloaded = TransactionService.get_user_columns("cache-0")
+    assert reloaded is not columns and len(reloaded) == 41
+
+
+def test_memory_cap_evicts_least_recent():
+    TransactionCache.clear()
+    original_cap = TransactionCache.MAX_BYTES
+    try:
+        # Each entry owns its interned strings, and they count towards the cap
+        TransactionCache.MAX_BYTES = 2 * TransactionColumns.from_records("x", ROWS).nbytes
+        TransactionCache.get("a", lambda: [ROWS])
+        TransactionCache.get("b", lambda: [ROWS])
+        TransactionCache.get("a", lambda: [ROWS])
+        TransactionCache.get("c", lambda: [ROWS])
+        assert list(TransactionCache._entries) == ["a", "c"]
+    finally:
+        TransactionCache.MAX_BYTES = original_cap
+        TransactionCache.clear()
+
+
+def test_oversized_user_stops_loading_at_the_cap():
+    TransactionCache.clear()
+    original_cap = TransactionCache.MAX_BYTES
+    pages_read = []
+
+    def pages():
+        for i in range(100):
+            pages_read.append(i)
+            yield [dict(row, id=i * 10 + row["id"]) for row in ROWS]
+
+    try:
+        TransactionCache.MAX_BYTES = TransactionColumns.from_records("x", ROWS * 3).used_nbytes
+        assert TransactionCache.get("big", pages) is None
+        assert len(pages_read) == 4
+        # Remembered until the user's data changes
+        assert TransactionCache.get("big", pages) is None and len(pages_read) == 4
+        TransactionCache.invalidate("big")
+        assert TransactionCache.get("big", pages) is None and len(pages_read) == 8
+    finally:
+        TransactionCache.MAX_BYTES = original_cap
+        TransactionCache.clear()
+
+
+if __name__ == "__main__":
+    test_columns_filters_and_sums()
+    test_write_through_and_invalidation()
+    test_memory_cap_evicts_least_recent()
+    test_oversized_user_stops_loading_at_the_cap()
+    print("All tests passed!")
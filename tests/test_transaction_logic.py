@@ -5,9 +5,12 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
 
 from services.transaction_service import TransactionService
+from benchmarks.local_aws import install_dynamodb
 
 def test_extraction():
     print("Testing extraction logic...")
+    # Extracted transactions are recorded; keep them off the live table
+    install_dynamodb()
     
     # Test Case 1: Standard
     msg1 = "I spent $50.00 on Food at Walmart"